@@ -0,0 +1,284 @@
+"""
+api_load_test.py – drive mixed dashboard traffic at server_v2 in-process.
+
+Boots the FastAPI app inside this process (httpx ASGITransport, no sockets)
+against either an in-memory Mongo stand-in (mongomock-motor, the default)
+or a real mongod, seeds users with competitors and reports whose digests are
+the size a real scan produces, then runs concurrent clients issuing a
+weighted mix of the routes the dashboard polls. Prints request count,
+errors, throughput and p50/p95/p99/max latency per route.
+
+The app's lifespan is not run: no scan worker pool or scheduler is started,
+and scan routes are not part of the mix. Client and server share one event
+loop, so latencies include client-side overhead – compare runs with each
+other, not with production numbers.
+
+Requires: mongomock-motor (in backend/requirements.txt) unless --mongo points at a mongod
+
+Run: python api_load_test.py [--users 50 --reports 20 --products 300]
+                             [--clients 32 --duration 20]
+                             [--mix dashboard=40,reports=20,latest=15,report=10,me=10,competitors=5]
+     python api_load_test.py --mongo mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+
+import httpx
+
+from backend import server_v2 as server
+from backend.agent_core.matcher_v2 import ProductMatcher
+from backend.auth_crypto import pwd_context
+from backend.db_indexes import ensure_indexes
+from backend.stats_store import refresh_user_stats
+
+
+# name → (route label, path builder)
+ROUTES = {
+    "dashboard":   ("GET /api/dashboard/stats",   lambda u: "/api/dashboard/stats"),
+    "reports":     ("GET /api/reports",           lambda u: "/api/reports"),
+    "latest":      ("GET /api/reports/latest",    lambda u: "/api/reports/latest"),
+    "report":      ("GET /api/reports/{id}",      lambda u: f"/api/reports/{random.choice(u['reports'])}"),
+    "me":          ("GET /api/auth/me",           lambda u: "/api/auth/me"),
+    "competitors": ("GET /api/competitors",       lambda u: "/api/competitors"),
+    "health":      ("GET /api/health",            lambda u: "/api/health"),
+}
+DEFAULT_MIX = "dashboard=40,reports=20,latest=15,report=10,me=10,competitors=5"
+
+BRANDS = ["Amazon Pay", "Flipkart", "Myntra", "Swiggy", "Zomato", "Google Play",
+          "Steam", "Xbox", "Uber", "Croma", "Tanishq", "PVR", "BookMyShow", "Nykaa",
+          "Ajio", "Decathlon", "Starbucks", "Dominos", "Lifestyle", "Titan"]
+DENOMS = [100, 250, 500, 1000, 2000, 5000]
+
+
+# ──────────────────────────────────────────────────────────────
+# SEEDING
+# ──────────────────────────────────────────────────────────────
+
+def _products(n: int, rng: random.Random, site: str) -> list[dict]:
+    rows = []
+    for i in range(n):
+        brand = rng.choice(BRANDS)
+        denom = rng.choice(DENOMS)
+        price = round(denom * rng.uniform(0.92, 1.0), 2) if rng.random() > 0.15 else None
+        sig = "_".join(brand.lower().split())
+        rows.append({
+            "name": f"{brand} Gift Card", "price": price,
+            "variant_value": denom if price else None,
+            "min_price": price, "max_price": None, "discount_pct": None,
+            "category": "gift_card", "signature": sig,
+            "url": f"https://www.{site}.example/{sig}-{denom}-{i}",
+        })
+    return rows
+
+
+def _digest(n_products: int, n_comps: int, rng: random.Random) -> dict:
+    baseline = _products(n_products, rng, "baseline")
+    matcher = ProductMatcher()
+    competitors = []
+    for c in range(n_comps):
+        products = _products(n_products, rng, f"competitor{c}")
+        competitors.append({
+            "name": f"Competitor {c + 1}",
+            "products": products,
+            "diff": matcher.match(baseline, products),
+            "insights": {
+                "summary": "Competitor undercuts on popular denominations.",
+                "product_gaps": [f"{b} not carried" for b in rng.sample(BRANDS, 5)],
+                "recommendations": ["Match ₹500 pricing", "Add ₹2000 denominations"],
+            },
+        })
+    changes = [
+        {"type": "price_change", "competitor": "Competitor 1",
+         "product": f"{rng.choice(BRANDS)} Gift Card", "variant": rng.choice(DENOMS),
+         "old_price": 500, "new_price": 480, "pct_change": -4.0, "direction": "down"}
+        for _ in range(rng.randint(0, 30))
+    ]
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "baseline": {"name": "Baseline", "products": baseline},
+        "competitors": competitors,
+        "changes": {"status": "changes_detected" if changes else "no_changes",
+                    "total": len(changes), "changes": changes},
+    }
+
+
+async def seed(db, args) -> list[dict]:
+    """Insert users, competitors and reports; returns [{id, token, reports}]."""
+    rng = random.Random(args.seed)
+    password_hash = pwd_context.hash("load-test-password")
+    # A handful of distinct digests, shared between reports, keeps seeding fast.
+    digests = [_digest(args.products, args.competitors, rng) for _ in range(min(5, args.reports) or 1)]
+    now = datetime.now(timezone.utc)
+    users = []
+
+    for u in range(args.users):
+        email = f"load-{u}-{uuid.uuid4().hex[:6]}@example.com"
+        res = await db.users.insert_one({
+            "name": f"Load User {u}", "email": email, "password": password_hash,
+            "created_at": now.isoformat(),
+        })
+        uid = str(res.inserted_id)
+
+        await db.competitors.insert_many([
+            {"user_id": uid, "name": "Baseline" if c == 0 else f"Competitor {c}",
+             "website": f"https://www.site{c}.example", "is_baseline": c == 0,
+             "pages_to_monitor": [], "created_at": now.isoformat()}
+            for c in range(args.competitors + 1)
+        ])
+
+        report_ids = []
+        for r in range(args.reports):
+            digest = digests[r % len(digests)]
+            res = await db.reports.insert_one({
+                "user_id": uid, "status": "success",
+                "report_date": (now - timedelta(hours=r)).strftime("%B %d, %Y • %H:%M"),
+                "changes_count": digest["changes"]["total"],
+                "gaps_count": sum(len(c["diff"]["missing"]) for c in digest["competitors"]),
+                "digest": digest,
+                "created_at": (now - timedelta(hours=r)).isoformat(),
+            })
+            report_ids.append(str(res.inserted_id))
+
+        await refresh_user_stats(db, uid)
+        users.append({"id": uid, "token": server.create_token(uid, email), "reports": report_ids})
+    return users
+
+
+# ──────────────────────────────────────────────────────────────
+# TRAFFIC
+# ──────────────────────────────────────────────────────────────
+
+def _parse_mix(spec: str) -> tuple[list[str], list[float]]:
+    names, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise SystemExit(f"Unknown route in --mix: {name} (choose from {', '.join(ROUTES)})")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+async def _client_loop(http, users, names, weights, deadline, samples, errors):
+    while time.perf_counter() < deadline:
+        user = random.choice(users)
+        label, path = ROUTES[random.choices(names, weights)[0]]
+        if label == ROUTES["report"][0] and not user["reports"]:
+            continue
+        t0 = time.perf_counter()
+        try:
+            r = await http.get(path(user), headers={"Authorization": f"Bearer {user['token']}"})
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples.setdefault(label, []).append((time.perf_counter() - t0) * 1000)
+        if not ok:
+            errors[label] = errors.get(label, 0) + 1
+
+
+def _pct(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _report(samples: dict, errors: dict, elapsed: float) -> list[dict]:
+    rows = []
+    for label in sorted(samples):
+        v = samples[label]
+        rows.append({
+            "route": label, "requests": len(v), "errors": errors.get(label, 0),
+            "rps": round(len(v) / elapsed, 1),
+            "p50_ms": round(_pct(v, .50), 2), "p95_ms": round(_pct(v, .95), 2),
+            "p99_ms": round(_pct(v, .99), 2), "max_ms": round(max(v), 2),
+            "mean_ms": round(statistics.mean(v), 2),
+        })
+    return rows
+
+
+# ──────────────────────────────────────────────────────────────
+# MAIN
+# ──────────────────────────────────────────────────────────────
+
+def _connect(mongo: str):
+    if mongo == "mock":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("mongomock-motor is not installed: pip install mongomock-motor "
+                             "(or pass --mongo mongodb://…)")
+        return AsyncMongoMockClient()
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(mongo)
+
+
+async def main_async(args):
+    client = _connect(args.mongo)
+    db_name = f"ci_loadtest_{uuid.uuid4().hex[:8]}"
+    db = client[db_name]
+    server.client, server.db = client, db
+
+    try:
+        if args.mongo != "mock":
+            await ensure_indexes(db)
+
+        t0 = time.perf_counter()
+        users = await seed(db, args)
+        sample_size = len(json.dumps((await db.reports.find_one({}, {"_id": 0}))["digest"]))
+        print(f"🌱 Seeded {args.users} users × {args.reports} reports "
+              f"(~{sample_size / 1024:.0f} KB digest) in {time.perf_counter() - t0:.1f}s")
+
+        names, weights = _parse_mix(args.mix)
+        samples, errors = {}, {}
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest",
+                                     timeout=60) as http:
+            print(f"🚀 {args.clients} clients for {args.duration:.0f}s – mix {args.mix}")
+            t0 = time.perf_counter()
+            deadline = t0 + args.duration
+            await asyncio.gather(*(
+                _client_loop(http, users, names, weights, deadline, samples, errors)
+                for _ in range(args.clients)
+            ))
+            elapsed = time.perf_counter() - t0
+    finally:
+        if args.mongo != "mock":
+            await client.drop_database(db_name)
+        client.close()
+
+    rows = _report(samples, errors, elapsed)
+    if args.json:
+        print(json.dumps({"args": vars(args), "routes": rows}, indent=2))
+        return
+
+    total = sum(r["requests"] for r in rows)
+    print(f"\n📊 {total} requests in {elapsed:.1f}s ({total / elapsed:.0f} req/s)\n")
+    print(f"{'route':<28}{'n':>7}{'err':>5}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for r in rows:
+        print(f"{r['route']:<28}{r['requests']:>7}{r['errors']:>5}{r['rps']:>8.1f}"
+              f"{r['p50_ms']:>8.1f}ms{r['p95_ms']:>7.1f}ms{r['p99_ms']:>7.1f}ms{r['max_ms']:>7.1f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="In-process API load test")
+    ap.add_argument("--mongo", default="mock", help='"mock" (mongomock-motor) or a MongoDB URL')
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--reports", type=int, default=20, help="reports per user")
+    ap.add_argument("--products", type=int, default=300, help="products per site in each digest")
+    ap.add_argument("--competitors", type=int, default=3, help="competitors per user")
+    ap.add_argument("--clients", type=int, default=32, help="concurrent clients")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds of traffic")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="route=weight,… (" + ", ".join(ROUTES) + ")")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+auth_load_test.py – show that concurrent logins don't stall other routes.
+
+Fires a burst of concurrent /api/auth/login calls while probing /api/health
+and /api/dashboard/stats in a tight loop, then prints probe latency before
+and during the burst plus the server's auth_crypto pool stats. With bcrypt
+on the event loop the "during" p95 climbs to roughly logins × bcrypt cost;
+with the auth thread pool it should stay close to the idle baseline.
+
+Run against a live server:
+    python auth_load_test.py --url http://localhost:8001 --logins 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _summary(label: str, values: list[float]) -> str:
+    if not values:
+        return f"  {label:<22} (no samples)"
+    return (
+        f"  {label:<22} n={len(values):<4} "
+        f"p50={_pct(values, .50):7.1f}ms  p95={_pct(values, .95):7.1f}ms  "
+        f"max={max(values):7.1f}ms  mean={statistics.mean(values):7.1f}ms"
+    )
+
+
+async def _probe(client, path, headers, stop: asyncio.Event, out: list):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            await client.get(path, headers=headers)
+        except httpx.HTTPError:
+            pass
+        out.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.02)
+
+
+async def _probe_window(client, headers, seconds: float) -> dict:
+    stop = asyncio.Event()
+    samples = {"/api/health": [], "/api/dashboard/stats": []}
+    tasks = [
+        asyncio.create_task(_probe(client, path, headers, stop, out))
+        for path, out in samples.items()
+    ]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return samples
+
+
+async def main_async(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        email = f"loadtest-{uuid.uuid4().hex[:8]}@example.com"
+        creds = {"email": email, "password": "load-test-password"}
+        r = await client.post("/api/auth/register", json={"name": "Load Test", **creds})
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        print(f"🔐 Test user: {email}")
+        print("⏱  Idle baseline…")
+        idle = await _probe_window(client, headers, args.idle)
+
+        print(f"🚀 Burst: {args.logins} concurrent logins…")
+        stop = asyncio.Event()
+        during = {"/api/health": [], "/api/dashboard/stats": []}
+        probes = [
+            asyncio.create_task(_probe(client, path, headers, stop, out))
+            for path, out in during.items()
+        ]
+
+        async def one_login():
+            t0 = time.perf_counter()
+            resp = await client.post("/api/auth/login", json=creds)
+            return resp.status_code, (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(one_login() for _ in range(args.logins)))
+        burst_s = time.perf_counter() - t0
+        stop.set()
+        await asyncio.gather(*probes)
+
+        stats = (await client.get("/api/health")).json().get("auth_crypto", {})
+
+    ok = sum(1 for status, _ in results if status == 200)
+    print(f"\n📊 {ok}/{args.logins} logins OK in {burst_s:.2f}s")
+    print(_summary("login", [ms for _, ms in results]))
+    for path in idle:
+        print(_summary(f"{path} idle", idle[path]))
+        print(_summary(f"{path} burst", during[path]))
+    if stats:
+        print(f"\n🧵 auth_crypto: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent login stall test")
+    parser.add_argument("--url", default="http://localhost:8001", help="Server base URL")
+    parser.add_argument("--logins", type=int, default=50, help="Concurrent logins in the burst")
+    parser.add_argument("--idle", type=float, default=2.0, help="Seconds of idle baseline probing")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
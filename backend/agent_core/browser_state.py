@@ -0,0 +1,208 @@
+"""
+browser_state.py – warm browser sessions for SmartScraper across runs.
+
+    storage state  cookies + localStorage per site, saved after a parse that
+                   produced rows and loaded into the next run's context while
+                   younger than BROWSER_STATE_TTL_HOURS – consent banners,
+                   first-visit bot checks and A/B buckets stay settled.
+    asset cache    scripts, stylesheets, fonts and images served from disk
+                   through context.route(). Playwright contexts are
+                   incognito, so Chromium's own HTTP cache never outlives a
+                   run; this one honours Cache-Control (no-store / no-cache /
+                   private are skipped, max-age sets the expiry). Expired
+                   entries are deleted when looked up, and each site's cache
+                   is capped at BROWSER_CACHE_MAX_BYTES, oldest entries
+                   evicted first.
+
+Both are keyed by site domain (fixtures.site_key) and shared by every parser:
+
+    memory/browser_state/woohoo.in.json
+    memory/browser_cache/woohoo.in/<sha1(url)>.body + .json
+
+Fixture record/replay runs never use either – they must stay hermetic.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+
+from backend.agent_core.fixtures import site_key
+
+
+BROWSER_STATE     = os.environ.get("BROWSER_STATE", "1") != "0"
+BROWSER_STATE_DIR = os.environ.get("BROWSER_STATE_DIR", "memory/browser_state")
+BROWSER_STATE_TTL_HOURS = float(os.environ.get("BROWSER_STATE_TTL_HOURS", "72"))
+BROWSER_CACHE_DIR = os.environ.get("BROWSER_CACHE_DIR", "memory/browser_cache")
+# Freshness for cacheable assets that don't send max-age
+BROWSER_CACHE_DEFAULT_TTL = int(os.environ.get("BROWSER_CACHE_DEFAULT_TTL", "86400"))
+BROWSER_CACHE_MAX_ENTRY = 10 * 1024 * 1024
+# Per site; rotating hashed bundle / image URLs would otherwise grow it forever
+BROWSER_CACHE_MAX_BYTES = int(os.environ.get("BROWSER_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+ASSET_PATTERN = re.compile(
+    r"\.(?:m?js|css|woff2?|ttf|otf|png|jpe?g|gif|webp|avif|svg|ico)(?:[?#]|$)", re.IGNORECASE
+)
+# The cached body is stored decoded, so these no longer describe it
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def state_path(url: str, state_dir: str = BROWSER_STATE_DIR) -> str:
+    return os.path.join(state_dir, f"{site_key(url)}.json")
+
+
+def context_options(url: str, state_dir: str = BROWSER_STATE_DIR) -> dict:
+    """browser.new_context() kwargs restoring the site's saved session, if still fresh."""
+    path = state_path(url, state_dir)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return {}
+    if age > BROWSER_STATE_TTL_HOURS * 3600:
+        print(f"  🍪 Stored session for {site_key(url)} expired – starting cold")
+        return {}
+    return {"storage_state": path}
+
+
+def save(context, url: str, state_dir: str = BROWSER_STATE_DIR):
+    """Persist the context's cookies + localStorage for the next run."""
+    path = state_path(url, state_dir)
+    try:
+        os.makedirs(state_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        context.storage_state(path=tmp)
+        os.replace(tmp, path)    # scan workers may save the same site concurrently
+    except Exception as e:
+        print(f"  ⚠️  Could not save browser session: {e}")
+
+
+def _freshness(headers: dict) -> int:
+    """Seconds a response may be served from the cache (0 = don't store)."""
+    cc = headers.get("cache-control", "").lower()
+    if any(d in cc for d in ("no-store", "no-cache", "private")):
+        return 0
+    m = _MAX_AGE.search(cc)
+    return int(m.group(1)) if m else BROWSER_CACHE_DEFAULT_TTL
+
+
+class AssetCache:
+    """Disk cache for static assets of one site, installed on a context with attach()."""
+
+    def __init__(self, url: str, cache_dir: str = BROWSER_CACHE_DIR,
+                 max_bytes: int = BROWSER_CACHE_MAX_BYTES):
+        self.dir = os.path.join(cache_dir, site_key(url))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._size = 0      # bytes on disk, as of attach() plus our own stores
+
+    def attach(self, context):
+        os.makedirs(self.dir, exist_ok=True)
+        self._size = sum(size for _mtime, _key, size in self._entries())
+        context.route(ASSET_PATTERN, self._handle)
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = os.path.join(self.dir, hashlib.sha1(url.encode()).hexdigest())
+        return f"{key}.json", f"{key}.body"
+
+    def _handle(self, route):
+        request = route.request
+        if request.method != "GET":
+            route.fallback()
+            return
+        meta_path, body_path = self._paths(request.url)
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["expires"] > time.time() and os.path.exists(body_path):
+                route.fulfill(status=meta["status"], headers=meta["headers"], path=body_path)
+                self.hits += 1
+                self.bytes_served += meta["size"]
+                return
+            self._drop(meta_path, body_path)     # expired, or its body is gone
+        except OSError:
+            pass
+        except (ValueError, KeyError):
+            self._drop(meta_path, body_path)
+
+        try:
+            response = route.fetch()
+        except Exception:
+            route.fallback()
+            return
+        self.misses += 1
+        ttl = _freshness(response.headers)
+        if response.status == 200 and ttl:
+            self._store(meta_path, body_path, response, ttl)
+        route.fulfill(response=response)
+
+    def _store(self, meta_path: str, body_path: str, response, ttl: int):
+        try:
+            body = response.body()
+            if len(body) > BROWSER_CACHE_MAX_ENTRY:
+                return
+            tmp = f"{body_path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, body_path)
+            tmp = f"{meta_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({
+                    "url":     response.url,
+                    "status":  response.status,
+                    "headers": {k: v for k, v in response.headers.items()
+                                if k.lower() not in _DROP_HEADERS},
+                    "size":    len(body),
+                    "expires": time.time() + ttl,
+                }, f)
+            os.replace(tmp, meta_path)    # meta last: a visible entry always has its body
+            self._size += len(body)
+            if self._size > self.max_bytes:
+                self._evict()
+        except Exception:
+            pass
+
+    def _drop(self, meta_path: str, body_path: str):
+        for path in (meta_path, body_path):     # meta first: the entry vanishes at once
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        """(mtime, key path, bytes) of every stored entry."""
+        entries = []
+        try:
+            names = os.listdir(self.dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".body"):
+                continue
+            key = os.path.join(self.dir, name[:-len(".body")])
+            try:
+                st = os.stat(f"{key}.body")
+            except OSError:
+                continue
+            size = st.st_size
+            try:
+                size += os.path.getsize(f"{key}.json")
+            except OSError:
+                pass                            # orphaned body: still evictable
+            entries.append((st.st_mtime, key, size))
+        return entries
+
+    def _evict(self):
+        """Delete the oldest entries until the site's cache fits max_bytes again."""
+        entries = sorted(self._entries())
+        total = sum(size for _mtime, _key, size in entries)
+        for _mtime, key, size in entries:
+            if total <= self.max_bytes:
+                break
+            self._drop(f"{key}.json", f"{key}.body")
+            total -= size
+        self._size = total
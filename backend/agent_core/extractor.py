@@ -1,112 +1,157 @@
-from playwright.sync_api import sync_playwright
+import asyncio
+import os
 import re
 
+from backend.agent_core import fetch_policy
+
+
+EXTRACT_CONCURRENCY = int(os.environ.get("EXTRACT_CONCURRENCY", "6"))
+EXTRACT_LINK_TIMEOUT = float(os.environ.get("EXTRACT_LINK_TIMEOUT", "45"))  # seconds per product page
+
+PRICE_SELS = [
+    "[class*=price]",
+    "[class*=amount]",
+    "[class*=value]"
+]
+
+# Everything the extractor needs from a product page in one round trip:
+#   name     – first <h1> text
+#   variants – first "₹?NN…" number in each button/span/div whose text has ₹
+#   prices   – text of the first element per price selector (null if none)
+_PAGE_JS = r"""
+(priceSels) => {
+    const h1 = document.querySelector("h1");
+    const variants = new Set();
+    for (const el of document.querySelectorAll("button, span, div")) {
+        const txt = el.innerText || "";
+        if (!txt.includes("₹")) continue;
+        const m = txt.match(/₹?\s?(\d{2,5})/);
+        if (m) variants.add(m[1]);
+    }
+    return {
+        name: h1 ? (h1.innerText || "").trim() : null,
+        variants: Array.from(variants),
+        prices: priceSels.map(sel => {
+            const el = document.querySelector(sel);
+            return el ? (el.innerText || "") : null;
+        }),
+    };
+}
+"""
+
 
 class Extractor:
+    """
+    Visit product pages from a Navigator site map and build product rows.
+
+    Pages are loaded EXTRACT_CONCURRENCY at a time over one browser context;
+    each page is read with a single evaluate() call and gets its own
+    EXTRACT_LINK_TIMEOUT, so one slow page can't hold up the rest.
+    """
 
     def extract(self, site_map):
 
         print("📦 Extracting product details...")
 
-        products = []
-
-        with sync_playwright() as p:
-
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-
-            for link in site_map["product_links"]:
-
-                try:
-                    page.goto(link, timeout=60000)
-                    page.wait_for_timeout(2500)
-
-                    # -------------------------------------------------
-                    # PRODUCT NAME (STRICT)
-                    # -------------------------------------------------
-                    name = None
-
-                    h1 = page.locator("h1").first
-
-                    if h1.count() > 0:
-                        name = h1.inner_text().strip()
-
-                    if not name:
-                        continue
-
-                    # -------------------------------------------------
-                    # VARIANT / DENOMINATION DETECTION ⭐
-                    # Only look inside product container
-                    # -------------------------------------------------
-                    variant_values = set()
-
-                    variant_nodes = page.locator(
-                        "button:has-text('₹'), span:has-text('₹'), div:has-text('₹')"
-                    ).all()
-
-                    for node in variant_nodes:
-
-                        try:
-                            txt = node.inner_text()
-
-                            match = re.search(r"\₹?\s?(\d{2,5})", txt)
-
-                            if match:
-                                val = int(match.group(1))
-
-                                # avoid crazy numbers like 999999
-                                if 10 <= val <= 50000:
-                                    variant_values.add(val)
-
-                        except:
-                            pass
-
-                    # -------------------------------------------------
-                    # PRICE EXTRACTION ⭐
-                    # Try strong selectors first
-                    # -------------------------------------------------
-                    price = None
-
-                    price_locators = [
-                        "[class*=price]",
-                        "[class*=amount]",
-                        "[class*=value]"
-                    ]
-
-                    for sel in price_locators:
-                        el = page.locator(sel).first
-                        if el.count() > 0:
-                            txt = el.inner_text()
-                            m = re.search(r"\₹?\s?([\d,]+)", txt)
-                            if m:
-                                price = m.group(1)
-                                break
-
-                    # -------------------------------------------------
-                    # BUILD PRODUCTS
-                    # -------------------------------------------------
-                    if variant_values:
-
-                        for v in variant_values:
-
-                            products.append({
-                                "name": f"{name} {v}",
-                                "price": v,       # denomination = price
-                                "url": link
-                            })
-
-                    else:
-                        products.append({
-                            "name": name,
-                            "price": price,
-                            "url": link
-                        })
-
-                except Exception as e:
-                    print(f"⚠️ Extract error: {e}")
-
-            browser.close()
+        products = asyncio.run(self._extract_all(site_map["product_links"]))
 
         print(f"📦 Extracted {len(products)} products")
 
         return products
+
+    async def _extract_all(self, links):
+        from playwright.async_api import async_playwright
+
+        slots = asyncio.Semaphore(EXTRACT_CONCURRENCY)
+
+        async with async_playwright() as p:
+
+            browser = await p.chromium.launch(headless=True)
+            try:
+                context = await browser.new_context()
+
+                async def one(link):
+                    async with slots:
+                        return await self._extract_link(context, link)
+
+                per_link = await asyncio.gather(*(one(link) for link in links))
+            finally:
+                await browser.close()
+
+        # Keep site-map order
+        return [row for rows in per_link for row in rows]
+
+    async def _extract_link(self, context, link) -> list[dict]:
+        page = await context.new_page()
+        try:
+            data = await asyncio.wait_for(self._read_page(page, link), EXTRACT_LINK_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⏱ Extract timeout: {link}")
+            return []
+        except Exception as e:
+            print(f"⚠️ Extract error: {e}")
+            return []
+        finally:
+            await page.close()
+
+        return self._build_rows(link, data)
+
+    async def _read_page(self, page, link) -> dict:
+        await fetch_policy.goto_async(page, link, timeout=60000)
+        await page.wait_for_timeout(2500)
+        return await page.evaluate(_PAGE_JS, PRICE_SELS)
+
+    def _build_rows(self, link, data: dict) -> list[dict]:
+
+        # -------------------------------------------------
+        # PRODUCT NAME (STRICT)
+        # -------------------------------------------------
+        name = data.get("name")
+
+        if not name:
+            return []
+
+        # -------------------------------------------------
+        # VARIANT / DENOMINATION DETECTION ⭐
+        # -------------------------------------------------
+        variant_values = set()
+
+        for raw in data.get("variants") or []:
+            val = int(raw)
+
+            # avoid crazy numbers like 999999
+            if 10 <= val <= 50000:
+                variant_values.add(val)
+
+        # -------------------------------------------------
+        # PRICE EXTRACTION ⭐
+        # Try strong selectors first
+        # -------------------------------------------------
+        price = None
+
+        for txt in data.get("prices") or []:
+            if txt is None:
+                continue
+            m = re.search(r"\₹?\s?([\d,]+)", txt)
+            if m:
+                price = m.group(1)
+                break
+
+        # -------------------------------------------------
+        # BUILD PRODUCTS
+        # -------------------------------------------------
+        if variant_values:
+            return [
+                {
+                    "name": f"{name} {v}",
+                    "price": v,       # denomination = price
+                    "url": link
+                }
+                for v in variant_values
+            ]
+
+        return [{
+            "name": name,
+            "price": price,
+            "url": link
+        }]
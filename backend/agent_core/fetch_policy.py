@@ -0,0 +1,296 @@
+"""
+fetch_policy.py – one throttling / retry policy for every fetcher.
+
+Per site domain (www. ignored):
+
+    token bucket     FETCH_RATE requests/second, bursts of FETCH_BURST;
+                     callers wait for a token instead of firing at once
+    retries          failed attempts are retried with full-jitter exponential
+                     backoff (FETCH_BACKOFF_BASE · 2^n, capped at
+                     FETCH_BACKOFF_MAX; a 429's Retry-After wins when longer)
+    circuit breaker  FETCH_BREAKER_FAILURES consecutive failures open the
+                     circuit for FETCH_BREAKER_COOLDOWN seconds – calls fail
+                     fast with CircuitOpenError. After the cooldown it is
+                     half-open: one caller gets a probe lease (everyone else
+                     still fails fast); the probe succeeding closes the
+                     circuit, failing re-opens it for another cooldown.
+
+A failure is a retryable exception (network / navigation errors) or a
+429 / 5xx response. When attempts run out on a status, the last response is
+returned as-is so callers keep their own status handling.
+
+Bucket and breaker state lives in FETCH_STATE_FILE, read and written under
+an exclusive flock, so the server, the scheduler and every spawned scan
+worker on the host draw from the same buckets and see the same breakers.
+(Without fcntl – Windows – the lock is per process.)
+
+Entry points: get() for requests, goto() / goto_async() for Playwright pages,
+call() / call_async() for anything else, acquire() / acquire_async() for a
+bare rate-limit token.
+
+Inside `with bypassed():` all of them go straight through – one attempt, no
+token, nothing recorded. Fixture record/replay runs use it: a replay abort
+must not open the live site's circuit, and throttling would skew benchmarks.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+
+from backend.agent_core.tracing import current_span
+
+
+FETCH_RATE             = float(os.environ.get("FETCH_RATE", "2"))       # per domain, 0 = unlimited
+FETCH_BURST            = float(os.environ.get("FETCH_BURST", "4"))
+FETCH_ATTEMPTS         = int(os.environ.get("FETCH_ATTEMPTS", "3"))       # HTTP requests
+NAV_ATTEMPTS           = int(os.environ.get("NAV_ATTEMPTS", "2"))         # browser navigations
+FETCH_BACKOFF_BASE     = float(os.environ.get("FETCH_BACKOFF_BASE", "1"))
+FETCH_BACKOFF_MAX      = float(os.environ.get("FETCH_BACKOFF_MAX", "30"))
+FETCH_BREAKER_FAILURES = int(os.environ.get("FETCH_BREAKER_FAILURES", "5"))
+FETCH_BREAKER_COOLDOWN = float(os.environ.get("FETCH_BREAKER_COOLDOWN", "300"))
+# How long a half-open probe may take before another caller gets to probe
+FETCH_PROBE_LEASE      = float(os.environ.get("FETCH_PROBE_LEASE", "120"))
+FETCH_STATE_FILE       = os.environ.get("FETCH_STATE_FILE", "memory/fetch_policy.json")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching while a domain's circuit is open."""
+
+
+class RetryableStatus(Exception):
+    """A 429 / 5xx response, carried through the retry loop."""
+
+    def __init__(self, response, status: int):
+        super().__init__(f"HTTP {status}")
+        self.response = response
+        self.status = status
+        self.retry_after = None
+        headers = getattr(response, "headers", None) or {}
+        try:
+            self.retry_after = min(float(headers.get("retry-after") or headers.get("Retry-After")),
+                                   FETCH_BACKOFF_MAX)
+        except (TypeError, ValueError):
+            pass
+
+
+def _new_state(now: float) -> dict:
+    return {"tokens": FETCH_BURST, "stamp": now,
+            "failures": 0, "open_until": 0.0, "probe_until": 0.0}
+
+
+_lock = threading.Lock()
+_bypass: ContextVar = ContextVar("fetch_policy_bypass", default=False)
+
+
+@contextmanager
+def bypassed(active: bool = True):
+    """Fetches in the block skip the policy (when `active`)."""
+    token = _bypass.set(active)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+@contextmanager
+def _domain_state(domain: str):
+    """The domain's shared state dict; changes are written back on exit."""
+    with _lock:
+        os.makedirs(os.path.dirname(FETCH_STATE_FILE) or ".", exist_ok=True)
+        with open(FETCH_STATE_FILE, "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)     # released when the file closes
+            f.seek(0)
+            try:
+                states = json.loads(f.read() or "{}")
+            except ValueError:
+                states = {}
+            state = states.setdefault(domain, _new_state(time.time()))
+            yield state
+            f.seek(0)
+            f.truncate()
+            json.dump(states, f)
+
+
+def domain_of(url: str) -> str:
+    return urlparse(url).netloc.lower().removeprefix("www.") or "unknown"
+
+
+def _reserve(url: str) -> float:
+    """Pass the breaker and take a token; seconds to wait for that token."""
+    domain = domain_of(url)
+    with _domain_state(domain) as state:
+        now = time.time()
+        if state["open_until"]:
+            if state["open_until"] > now:
+                raise CircuitOpenError(f"{domain}: circuit open after {state['failures']} failures")
+            if state["probe_until"] > now:
+                raise CircuitOpenError(f"{domain}: circuit half-open, probe in flight")
+            state["probe_until"] = now + FETCH_PROBE_LEASE    # this caller is the probe
+
+        if FETCH_RATE <= 0:
+            return 0.0
+        # Take a token, possibly one not yet refilled, and wait for it
+        state["tokens"] = min(FETCH_BURST, state["tokens"] + (now - state["stamp"]) * FETCH_RATE)
+        state["stamp"] = now
+        state["tokens"] -= 1
+        return 0.0 if state["tokens"] >= 0 else -state["tokens"] / FETCH_RATE
+
+
+def _record(url: str, ok: bool):
+    domain = domain_of(url)
+    with _domain_state(domain) as state:
+        if ok:
+            state.update(failures=0, open_until=0.0, probe_until=0.0)
+            return
+        state["failures"] += 1
+        # A failed half-open probe re-opens at once; a closed circuit opens at the threshold
+        if state["open_until"] or state["failures"] >= FETCH_BREAKER_FAILURES:
+            state["open_until"] = time.time() + FETCH_BREAKER_COOLDOWN
+            state["probe_until"] = 0.0
+            print(f"  🚧 {domain}: {state['failures']} failures in a row – pausing "
+                  f"{FETCH_BREAKER_COOLDOWN:.0f}s")
+
+
+def is_open(url: str) -> bool:
+    """True while calls for url's domain would fail fast."""
+    if _bypass.get():
+        return False
+    with _domain_state(domain_of(url)) as state:
+        now = time.time()
+        return bool(state["open_until"]) and (state["open_until"] > now
+                                              or state["probe_until"] > now)
+
+
+def backoff(attempt: int, retry_after: float | None = None) -> float:
+    """Full-jitter delay before retry number `attempt` (1-based)."""
+    delay = random.uniform(0, min(FETCH_BACKOFF_MAX, FETCH_BACKOFF_BASE * 2 ** (attempt - 1)))
+    return max(delay, retry_after or 0)
+
+
+def acquire(url: str):
+    """Block until the domain's bucket has a token (CircuitOpenError if open)."""
+    if _bypass.get():
+        return
+    wait = _reserve(url)
+    if wait:
+        current_span().count("throttle_ms", int(wait * 1000))
+        time.sleep(wait)
+
+
+async def acquire_async(url: str):
+    if _bypass.get():
+        return
+    wait = _reserve(url)
+    if wait:
+        current_span().count("throttle_ms", int(wait * 1000))
+        await asyncio.sleep(wait)
+
+
+def call(url: str, fn, attempts: int | None = None, retry_on: tuple = (Exception,)):
+    """fn() under the policy for url's domain; exceptions in retry_on are retried."""
+    if _bypass.get():
+        return fn()
+    attempts = attempts or FETCH_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        acquire(url)
+        try:
+            result = fn()
+        except retry_on as e:
+            _record(url, ok=False)
+            if attempt == attempts or is_open(url):
+                raise
+            delay = backoff(attempt, getattr(e, "retry_after", None))
+            print(f"  ↻ {domain_of(url)} attempt {attempt} failed ({e}) – retrying in {delay:.1f}s")
+            current_span().count("fetch_retries")
+            time.sleep(delay)
+        else:
+            _record(url, ok=True)
+            return result
+
+
+async def call_async(url: str, fn, attempts: int | None = None, retry_on: tuple = (Exception,)):
+    """Async call(): fn is a coroutine function."""
+    if _bypass.get():
+        return await fn()
+    attempts = attempts or FETCH_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        await acquire_async(url)
+        try:
+            result = await fn()
+        except retry_on as e:
+            _record(url, ok=False)
+            if attempt == attempts or is_open(url):
+                raise
+            delay = backoff(attempt, getattr(e, "retry_after", None))
+            print(f"  ↻ {domain_of(url)} attempt {attempt} failed ({e}) – retrying in {delay:.1f}s")
+            current_span().count("fetch_retries")
+            await asyncio.sleep(delay)
+        else:
+            _record(url, ok=True)
+            return result
+
+
+def get(url: str, session=None, attempts: int | None = None, **kwargs):
+    """requests GET (on `session` if given) under the policy; kwargs go to .get()."""
+    import requests
+
+    http = session or requests
+    retried = []
+
+    def attempt():
+        for stale in retried:      # free the connection of a response we retried past
+            stale.close()
+        retried.clear()
+        r = http.get(url, **kwargs)
+        if r.status_code in RETRY_STATUSES:
+            retried.append(r)
+            raise RetryableStatus(r, r.status_code)
+        return r
+
+    try:
+        return call(url, attempt, attempts,
+                    retry_on=(requests.RequestException, RetryableStatus))
+    except RetryableStatus as e:
+        return e.response
+
+
+def goto(page, url: str, attempts: int | None = None, **kwargs):
+    """page.goto() under the policy (sync Playwright)."""
+    def attempt():
+        response = page.goto(url, **kwargs)
+        if response is not None and response.status in RETRY_STATUSES:
+            raise RetryableStatus(response, response.status)
+        return response
+
+    try:
+        return call(url, attempt, attempts or NAV_ATTEMPTS)
+    except RetryableStatus as e:
+        return e.response
+
+
+async def goto_async(page, url: str, attempts: int | None = None, **kwargs):
+    """page.goto() under the policy (async Playwright)."""
+    async def attempt():
+        response = await page.goto(url, **kwargs)
+        if response is not None and response.status in RETRY_STATUSES:
+            raise RetryableStatus(response, response.status)
+        return response
+
+    try:
+        return await call_async(url, attempt, attempts or NAV_ATTEMPTS)
+    except RetryableStatus as e:
+        return e.response
@@ -0,0 +1,88 @@
+"""
+fixtures.py – record/replay network fixtures for SmartScraper parsers.
+
+    record  – scrape live; Playwright writes every response the page sees
+              (HTML, XHR JSON, in-page fetch() calls) into a HAR file.
+    replay  – serve those responses back through context.route_from_har();
+              anything not in the HAR is aborted, so nothing reaches the
+              network and a parser run is repeatable byte for byte.
+
+One HAR per site domain, under SCRAPER_FIXTURE_DIR:
+
+    fixtures/scrapers/woohoo.in.har
+    fixtures/scrapers/woohoo.in.expected.json   (rows from the recording run)
+
+SmartScraper picks the mode up from SCRAPER_FIXTURES (or its constructor);
+parser_fixtures.py at the repo root records and checks fixtures.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+
+SCRAPER_FIXTURES    = os.environ.get("SCRAPER_FIXTURES", "")     # "", record, replay
+SCRAPER_FIXTURE_DIR = os.environ.get("SCRAPER_FIXTURE_DIR", "fixtures/scrapers")
+
+MODES = ("record", "replay")
+
+
+def site_key(url: str) -> str:
+    return urlparse(url).netloc.lower().removeprefix("www.") or "unknown"
+
+
+def har_path(url: str, fixture_dir: str = SCRAPER_FIXTURE_DIR) -> str:
+    return os.path.join(fixture_dir, f"{site_key(url)}.har")
+
+
+def expected_path(url: str, fixture_dir: str = SCRAPER_FIXTURE_DIR) -> str:
+    return os.path.join(fixture_dir, f"{site_key(url)}.expected.json")
+
+
+def context_options(mode: str | None, url: str, fixture_dir: str = SCRAPER_FIXTURE_DIR) -> dict:
+    """Extra browser.new_context() kwargs for a fixture mode."""
+    if not mode:
+        return {}
+    if mode not in MODES:
+        raise ValueError(f"Unknown fixture mode: {mode!r}")
+    # Service workers answer requests outside page routing – keep them out
+    # of both recording and replay.
+    opts = {"service_workers": "block"}
+    if mode == "record":
+        os.makedirs(fixture_dir, exist_ok=True)
+        opts.update(record_har_path=har_path(url, fixture_dir),
+                    record_har_content="embed")
+    return opts
+
+
+def attach(context, mode: str | None, url: str, fixture_dir: str = SCRAPER_FIXTURE_DIR):
+    """Route a fresh context from its HAR when replaying."""
+    if mode != "replay":
+        return
+    path = har_path(url, fixture_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No fixture recorded for {url} ({path})")
+    context.route_from_har(path, not_found="abort")
+
+
+def save_expected(url: str, rows: list[dict], fixture_dir: str = SCRAPER_FIXTURE_DIR):
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(expected_path(url, fixture_dir), "w") as f:
+        json.dump({
+            "url":         url,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "rows":        rows,
+        }, f, indent=2)
+
+
+def load_expected(fixture_dir: str = SCRAPER_FIXTURE_DIR) -> list[dict]:
+    """Every recorded fixture's {url, recorded_at, rows}."""
+    if not os.path.isdir(fixture_dir):
+        return []
+    out = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.endswith(".expected.json"):
+            with open(os.path.join(fixture_dir, name)) as f:
+                out.append(json.load(f))
+    return out
@@ -11,14 +11,19 @@ Fixes:
 import os
 import json
 import re
-from anthropic import Anthropic
+
+from backend.agent_core.tracing import span
 
 
 class InsightEngine:
 
     def __init__(self):
         api_key = os.environ.get("ANTHROPIC_API_KEY") or os.environ.get("LLM_API_KEY")
-        self.client = Anthropic(api_key=api_key) if api_key else None
+        self.client = None
+        if api_key:
+            # Imported here: the SDK is slow to load and unused on the rule-based path
+            from anthropic import Anthropic
+            self.client = Anthropic(api_key=api_key)
 
     def generate(self, baseline_name: str, baseline_products: list,
                  competitor_name: str, diff: dict, changes: list) -> dict:
@@ -31,10 +36,11 @@ class InsightEngine:
             except Exception as e:
                 print(f"  ⚠️  AI insight failed ({e}), using rule-based fallback")
 
-        return self._rule_based_insights(
-            baseline_name, baseline_products,
-            competitor_name, diff, changes
-        )
+        with span("rule_based_insights"):
+            return self._rule_based_insights(
+                baseline_name, baseline_products,
+                competitor_name, diff, changes
+            )
 
     # ─────────────────────────────────────────────────────────
     # AI PATH
@@ -92,11 +98,17 @@ Recent {competitor_name} changes:
 Be specific, data-driven, and actionable. Return ONLY valid JSON, no markdown, no extra text.
 """
 
-        response = self.client.messages.create(
-            model="claude-sonnet-4-5",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with span("llm_call", model="claude-sonnet-4-5") as sp:
+            sp.add_bytes(len(prompt.encode()))
+            response = self.client.messages.create(
+                model="claude-sonnet-4-5",
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                sp.count("input_tokens", getattr(usage, "input_tokens", 0) or 0)
+                sp.count("output_tokens", getattr(usage, "output_tokens", 0) or 0)
 
         text = response.content[0].text.strip()
         text = re.sub(r"^```json\s*|\s*```$", "", text, flags=re.DOTALL).strip()
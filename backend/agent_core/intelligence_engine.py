@@ -1,19 +1,21 @@
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
 
 
 class IntelligenceEngine:
 
     def __init__(self):
 
+        # Loaded here rather than at import so merely importing this module
+        # (run_agent_v3 does at startup) doesn't read .env or load the SDK.
+        from dotenv import load_dotenv
+        load_dotenv()
+
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.client = None
 
         if self.api_key:
             try:
+                from openai import OpenAI
                 self.client = OpenAI(api_key=self.api_key)
             except Exception as e:
                 print(f"⚠️ OpenAI init failed: {e}")
@@ -1,128 +1,187 @@
-from playwright.sync_api import sync_playwright
+import asyncio
+import os
 from urllib.parse import urljoin, urlparse
-import time
+
+from backend.agent_core import fetch_policy
+from backend.agent_core.sitemap_discovery import SitemapDiscovery
+
+
+MAX_CATEGORIES = 4
+MAX_PRODUCTS = 60
+CATEGORY_TIMEOUT = 45  # seconds per category page, navigation included
+
+# auto: sitemap first, browser crawl if it finds nothing | sitemap | crawl
+NAVIGATOR_DISCOVERY = os.environ.get("NAVIGATOR_DISCOVERY", "auto")
+
+# Every anchor on the page as deduplicated [href, text] pairs.
+_ANCHORS_JS = """
+() => {
+    const seen = new Set();
+    const out = [];
+    for (const a of document.querySelectorAll("a[href]")) {
+        const href = a.getAttribute("href");
+        const text = (a.innerText || "").trim();
+        const key = href + "\\u0000" + text;
+        if (seen.has(key)) continue;
+        seen.add(key);
+        out.push([href, text]);
+    }
+    return out;
+}
+"""
+
+# First link inside each product card, deduplicated, in document order.
+_CARD_LINKS_JS = """
+(cardSel) => {
+    const seen = new Set();
+    const out = [];
+    for (const card of document.querySelectorAll(cardSel)) {
+        const a = card.querySelector("a");
+        const href = a && a.getAttribute("href");
+        if (!href || seen.has(href)) continue;
+        seen.add(href);
+        out.push(href);
+    }
+    return out;
+}
+"""
+
+CARD_SEL = "[class*=product], [class*=card], [class*=grid]"
+
+BLOCKED = ["faq", "privacy", "login", "account", "google.com", "youtube", "help"]
+CATEGORY_HINTS = ["gift", "voucher", "category", "store"]
+PRODUCT_HINTS = ["product", "voucher", "gift"]
 
 
 class Navigator:
+    """
+    Find product links for a site: from its sitemaps when it publishes them
+    (sitemap_discovery.py), otherwise by crawling – category pages from the
+    landing page, then product links inside each category.
+
+    Each page is read with a single in-page script (anchors / card links come
+    back in one payload) and filtered here; categories are crawled
+    concurrently, one page each, with a per-category timeout. Either way at
+    most MAX_PRODUCTS links come back.
+    """
 
     def discover(self, url):
 
+        if NAVIGATOR_DISCOVERY in ("auto", "sitemap"):
+            print(f"🧠 Navigator V3 reading sitemaps: {url}")
+            site_map = SitemapDiscovery(max_products=MAX_PRODUCTS).discover(url)
+            if site_map and site_map["product_links"]:
+                return site_map
+            if NAVIGATOR_DISCOVERY == "sitemap":
+                return {"url": url, "product_links": [], "source": "sitemap"}
+            print("  ↪ No usable sitemap – crawling")
+
         print(f"🧠 Navigator V3 crawling: {url}")
+        return asyncio.run(self._discover(url))
 
-        product_links = []
+    async def _discover(self, url):
+        from playwright.async_api import async_playwright
 
         base_domain = urlparse(url).netloc
 
-        MAX_CATEGORIES = 4
-        MAX_PRODUCTS = 60
-        CATEGORY_TIMEOUT = 12  # seconds per category
-
-        with sync_playwright() as p:
-
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-
-            page.goto(url, timeout=60000)
-            page.wait_for_timeout(3000)
-
-            anchors = page.locator("a").all()
-
-            category_links = []
-
-            # ------------------------------------------------
-            # STEP 1 — STRICT CATEGORY FILTER
-            # ------------------------------------------------
-            for a in anchors:
-
-                try:
-                    href = a.get_attribute("href") or ""
-                    text = (a.inner_text() or "").lower()
+        async with async_playwright() as p:
 
-                    full = urljoin(url, href)
+            browser = await p.chromium.launch(headless=True)
+            try:
+                context = await browser.new_context()
+                page = await context.new_page()
 
-                    parsed = urlparse(full)
+                await fetch_policy.goto_async(page, url, timeout=60000)
+                await page.wait_for_timeout(3000)
 
-                    # ✅ SAME DOMAIN ONLY
-                    if parsed.netloc != base_domain:
-                        continue
+                anchors = await page.evaluate(_ANCHORS_JS)
+                await page.close()
 
-                    # ❌ BLOCK garbage pages
-                    if any(x in full.lower() for x in [
-                        "faq", "privacy", "login", "account",
-                        "google.com", "youtube", "help"
-                    ]):
-                        continue
+                # ------------------------------------------------
+                # STEP 1 — STRICT CATEGORY FILTER
+                # ------------------------------------------------
+                category_links = self._category_links(url, base_domain, anchors)
+                print(f"📂 Categories detected: {len(category_links)}")
 
-                    if any(x in full.lower() for x in [
-                        "gift", "voucher", "category", "store"
-                    ]):
-                        category_links.append(full)
+                # ------------------------------------------------
+                # STEP 2 — PRODUCT DISCOVERY (concurrent)
+                # ------------------------------------------------
+                per_category = await asyncio.gather(*(
+                    self._crawl_category(context, cat, base_domain)
+                    for cat in category_links
+                ))
+            finally:
+                await browser.close()
 
-                except:
-                    pass
+        # Dedupe in category order, then cap
+        product_links = list(dict.fromkeys(
+            link for links in per_category for link in links
+        ))[:MAX_PRODUCTS]
 
-            category_links = list(set(category_links))[:MAX_CATEGORIES]
-
-            print(f"📂 Categories detected: {len(category_links)}")
-
-            # ------------------------------------------------
-            # STEP 2 — PRODUCT DISCOVERY
-            # ------------------------------------------------
-            for cat in category_links:
+        print(f"✅ Navigator V3 found {len(product_links)} REAL product links")
 
-                print(f"➡️ Entering category: {cat}")
+        return {
+            "url": url,
+            "product_links": product_links,
+            "source": "crawl",
+        }
 
-                start = time.time()
+    def _category_links(self, url, base_domain, anchors) -> list[str]:
+        category_links = []
 
-                try:
-                    page.goto(cat, timeout=30000)
-                    page.wait_for_timeout(2500)
+        for href, _text in anchors or []:
 
-                    cards = page.locator(
-                        "[class*=product], [class*=card], [class*=grid]"
-                    ).all()
+            full = urljoin(url, href or "")
 
-                    for c in cards:
+            # ✅ SAME DOMAIN ONLY
+            if urlparse(full).netloc != base_domain:
+                continue
 
-                        # ⏱ TIME SAFETY
-                        if time.time() - start > CATEGORY_TIMEOUT:
-                            print("⏱ Category timeout reached")
-                            break
+            # ❌ BLOCK garbage pages
+            if any(x in full.lower() for x in BLOCKED):
+                continue
 
-                        link = c.locator("a").first
+            if any(x in full.lower() for x in CATEGORY_HINTS):
+                category_links.append(full)
 
-                        href = link.get_attribute("href") if link else None
+        return list(dict.fromkeys(category_links))[:MAX_CATEGORIES]
 
-                        if not href:
-                            continue
+    async def _crawl_category(self, context, cat, base_domain) -> list[str]:
 
-                        full = urljoin(cat, href)
+        print(f"➡️ Entering category: {cat}")
 
-                        parsed = urlparse(full)
+        page = await context.new_page()
+        try:
+            hrefs = await asyncio.wait_for(self._card_links(page, cat), CATEGORY_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⏱ Category timeout reached: {cat}")
+            return []
+        except Exception as e:
+            print(f"⚠️ Category error: {e}")
+            return []
+        finally:
+            await page.close()
 
-                        # SAME DOMAIN ONLY
-                        if parsed.netloc != base_domain:
-                            continue
+        product_links = []
 
-                        if any(x in full.lower() for x in [
-                            "product", "voucher", "gift"
-                        ]):
-                            product_links.append(full)
+        for href in hrefs:
 
-                        # 🧠 LIMIT PRODUCTS
-                        if len(product_links) >= MAX_PRODUCTS:
-                            break
+            full = urljoin(cat, href)
 
-                except Exception as e:
-                    print(f"⚠️ Category error: {e}")
+            # SAME DOMAIN ONLY
+            if urlparse(full).netloc != base_domain:
+                continue
 
-            browser.close()
+            if any(x in full.lower() for x in PRODUCT_HINTS):
+                product_links.append(full)
 
-        product_links = list(set(product_links))
+            # 🧠 LIMIT PRODUCTS
+            if len(product_links) >= MAX_PRODUCTS:
+                break
 
-        print(f"✅ Navigator V3 found {len(product_links)} REAL product links")
+        return product_links
 
-        return {
-            "url": url,
-            "product_links": product_links
-        }
+    async def _card_links(self, page, cat) -> list[str]:
+        await fetch_policy.goto_async(page, cat, timeout=30000)
+        await page.wait_for_timeout(2500)
+        return await page.evaluate(_CARD_LINKS_JS, CARD_SEL)
@@ -8,17 +8,22 @@ Run flow:
   4. Generate insights (AI or rule-based)
   5. Detect changes vs yesterday
   6. Save snapshot + generate HTML report
+
+Every stage runs inside a tracing span; run() returns the digest with a
+`profile` section (per-stage timings, counts and bytes – see tracing.py).
 """
 
 import os
 import json
 from datetime import datetime
 
-from backend.agent_core.smart_scraper import SmartScraper
 from backend.agent_core.matcher_v2 import ProductMatcher
-from backend.agent_core.insight_engine import InsightEngine
 from backend.agent_core.change_detector_v2 import ChangeDetectorV2
-from backend.reporting.report_generator import generate_report
+from backend.agent_core.tracing import Tracer, span
+
+# SmartScraper (Playwright), InsightEngine (Anthropic SDK) and the report
+# renderer are imported on first use: a run fed entirely from the shared
+# scrape cache never loads Playwright, and importing this module stays cheap.
 
 
 HISTORY_DIR = "intelligence_data/history"
@@ -28,25 +33,75 @@ REPORT_PATH = "reports/competitive_report.html"
 
 class CIAgentOrchestrator:
 
-    def __init__(self, config: dict):
+    # Events that complete one unit of work towards `total`
+    STEP_EVENTS = {"products_extracted", "changes_detected", "insights_done", "report_generated"}
+
+    def __init__(self, config: dict, on_event=None, prefetched: dict | None = None):
+        """
+        on_event: optional callable(event, data) receiving structured progress
+        events – run_started, source_started, products_extracted, match_done,
+        changes_detected, insights_done, report_generated, run_done. `data`
+        always carries `done`/`total` step counts. The callback may raise to
+        abort the run (used for scan cancellation).
+
+        prefetched: optional url → products already scraped for this run
+        (the scheduler's shared scrape cache); those URLs are not re-scraped.
+        """
         self.config = config
-        self.scraper = SmartScraper()
+        self.prefetched = prefetched or {}
+        self._on_event = on_event
+        self._done = 0
+        self._total = 0
+        self._scraper = None
+        self._insight_engine = None
         self.matcher = ProductMatcher()
-        self.insight_engine = InsightEngine()
         self.change_detector = ChangeDetectorV2()
 
+    @property
+    def scraper(self):
+        if self._scraper is None:
+            from backend.agent_core.smart_scraper import SmartScraper
+            self._scraper = SmartScraper()
+        return self._scraper
+
+    @property
+    def insight_engine(self):
+        if self._insight_engine is None:
+            from backend.agent_core.insight_engine import InsightEngine
+            self._insight_engine = InsightEngine()
+        return self._insight_engine
+
     # ──────────────────────────────────────────────────────────
     # PUBLIC
     # ──────────────────────────────────────────────────────────
 
     def run(self) -> dict:
+        tracer = Tracer()
+        with tracer.activate():
+            digest = self._run()
+        digest["profile"] = tracer.profile()
+        return digest
+
+    # ──────────────────────────────────────────────────────────
+    # PRIVATE
+    # ──────────────────────────────────────────────────────────
+
+    def _run(self) -> dict:
         print("\n🚀 CI Agent starting…\n")
 
+        # baseline + each competitor + change detection + insights + report
+        n_comps = len(self.config.get("competitors", []))
+        self._done, self._total = 0, 1 + n_comps + 1 + n_comps + 1
+        self._emit("run_started", sources=1 + n_comps)
+
         # ── 1. Baseline ──────────────────────────────────────
         baseline_cfg = self.config.get("baseline", {})
         print(f"📥 Scraping baseline: {baseline_cfg.get('name')}")
-        baseline_products = self._scrape_source(baseline_cfg)
+        self._emit("source_started", source=baseline_cfg.get("name"), role="baseline")
+        baseline_products = self._scrape_source(baseline_cfg, role="baseline")
         print(f"   → {len(baseline_products)} baseline products loaded\n")
+        self._emit("products_extracted", source=baseline_cfg.get("name"),
+                   role="baseline", count=len(baseline_products))
 
         # ── 2. Competitors ───────────────────────────────────
         competitor_results = []
@@ -54,16 +109,27 @@ class CIAgentOrchestrator:
         for comp_cfg in self.config.get("competitors", []):
             name = comp_cfg.get("name")
             print(f"🔍 Processing competitor: {name}")
-            comp_products = self._scrape_source(comp_cfg)
+            self._emit("source_started", source=name, role="competitor")
+            comp_products = self._scrape_source(comp_cfg, role="competitor")
             print(f"   → {len(comp_products)} products scraped")
-
-            diff = self.matcher.match(baseline_products, comp_products)
+            self._emit("products_extracted", source=name, role="competitor",
+                       count=len(comp_products))
+
+            with span("match", source=name) as sp:
+                diff = self.matcher.match(baseline_products, comp_products)
+                sp.count("baseline", len(baseline_products))
+                sp.count("competitor", len(comp_products))
+                sp.count("matched", len(diff["matched"]))
             print(
                 f"   → matched:{len(diff['matched'])}  "
                 f"missing:{len(diff['missing'])}  "
                 f"variant_gaps:{len(diff['variant_gaps'])}  "
                 f"price_diffs:{len(diff['price_diffs'])}"
             )
+            self._emit("match_done", source=name,
+                       matched=len(diff["matched"]), missing=len(diff["missing"]),
+                       variant_gaps=len(diff["variant_gaps"]),
+                       price_diffs=len(diff["price_diffs"]))
 
             competitor_results.append({
                 "name": name,
@@ -74,51 +140,66 @@ class CIAgentOrchestrator:
             print()
 
         # ── 3. Load yesterday + detect changes ───────────────
-        yesterday = self._load_yesterday()
-        digest = {
-            "generated_at": datetime.now().isoformat(),
-            "baseline": {
-                "name": baseline_cfg.get("name"),
-                "products": baseline_products,
-            },
-            "competitors": competitor_results,
-        }
-
-        changes = self.change_detector.detect(digest, yesterday)
-        digest["changes"] = changes
+        with span("change_detection") as sp:
+            yesterday = self._load_yesterday()
+            digest = {
+                "generated_at": datetime.now().isoformat(),
+                "baseline": {
+                    "name": baseline_cfg.get("name"),
+                    "products": baseline_products,
+                },
+                "competitors": competitor_results,
+            }
+
+            changes = self.change_detector.detect(digest, yesterday)
+            digest["changes"] = changes
+            sp.set(has_yesterday=yesterday is not None)
+            sp.count("changes", changes.get("total", 0))
 
         if changes.get("total", 0):
             print(f"📈 {changes['total']} changes detected vs yesterday\n")
         else:
             print("✅ No changes vs yesterday\n")
+        self._emit("changes_detected", total_changes=changes.get("total", 0))
 
         # ── 4. Generate insights ─────────────────────────────
         for comp in competitor_results:
             print(f"💡 Generating insights for {comp['name']}…")
-            comp["insights"] = self.insight_engine.generate(
-                baseline_name=baseline_cfg.get("name", "Baseline"),
-                baseline_products=baseline_products,
-                competitor_name=comp["name"],
-                diff=comp["diff"],
-                changes=changes.get("changes", []),
-            )
+            with span("insights", source=comp["name"]):
+                comp["insights"] = self.insight_engine.generate(
+                    baseline_name=baseline_cfg.get("name", "Baseline"),
+                    baseline_products=baseline_products,
+                    competitor_name=comp["name"],
+                    diff=comp["diff"],
+                    changes=changes.get("changes", []),
+                )
+            self._emit("insights_done", source=comp["name"])
 
         # ── 5. Persist ────────────────────────────────────────
-        self._save_snapshot(digest)
-        self._save_latest(digest)
+        with span("persist") as sp:
+            sp.add_bytes(self._save_snapshot(digest))
+            self._save_latest(digest)
 
         # ── 6. Report ─────────────────────────────────────────
         print("\n📄 Generating HTML report…")
-        generate_report(digest, REPORT_PATH)
+        with span("report_render") as sp:
+            from backend.reporting.report_generator import generate_report
+            generate_report(digest, REPORT_PATH)
+            if os.path.exists(REPORT_PATH):
+                sp.add_bytes(os.path.getsize(REPORT_PATH))
+        self._emit("report_generated")
 
         print("\n✅ CI Agent run complete.\n")
+        self._emit("run_done", total_changes=changes.get("total", 0))
         return digest
 
-    # ──────────────────────────────────────────────────────────
-    # PRIVATE
-    # ──────────────────────────────────────────────────────────
+    def _emit(self, event: str, **data):
+        if event in self.STEP_EVENTS:
+            self._done += 1
+        if self._on_event:
+            self._on_event(event, {"done": self._done, "total": self._total, **data})
 
-    def _scrape_source(self, source_cfg: dict) -> list[dict]:
+    def _scrape_source(self, source_cfg: dict, role: str = "competitor") -> list[dict]:
         """Scrape using the URL (and optional pages) in source_cfg."""
         url = source_cfg.get("url")
         pages = source_cfg.get("pages_to_monitor", [])
@@ -130,11 +211,20 @@ class CIAgentOrchestrator:
             print(f"  ⚠️  No URL for {source_cfg.get('name')}")
             return []
 
-        try:
-            return self.scraper.scrape(url)
-        except Exception as e:
-            print(f"  ❌ Scrape failed: {e}")
-            return []
+        with span("scrape", source=source_cfg.get("name"), role=role, url=url) as sp:
+            if url in self.prefetched:
+                print("   ♻️  Using shared scrape cache")
+                sp.set(cached=True)
+                rows = self.prefetched[url]
+            else:
+                try:
+                    rows = self.scraper.scrape(url)
+                except Exception as e:
+                    print(f"  ❌ Scrape failed: {e}")
+                    sp.set(failed=type(e).__name__)
+                    rows = []
+            sp.count("products", len(rows))
+            return rows
 
     def _load_yesterday(self) -> dict | None:
         if not os.path.exists(HISTORY_DIR):
@@ -149,13 +239,14 @@ class CIAgentOrchestrator:
         except Exception:
             return None
 
-    def _save_snapshot(self, digest: dict):
+    def _save_snapshot(self, digest: dict) -> int:
         os.makedirs(HISTORY_DIR, exist_ok=True)
         today = datetime.now().strftime("%Y-%m-%d")
         path = os.path.join(HISTORY_DIR, f"{today}.json")
         with open(path, "w") as f:
             json.dump(digest, f, indent=2)
         print(f"💾 Snapshot saved → {path}")
+        return os.path.getsize(path)
 
     def _save_latest(self, digest: dict):
         os.makedirs(os.path.dirname(LATEST_FILE), exist_ok=True)
@@ -1,4 +1,4 @@
-import requests
+from backend.agent_core import fetch_policy
 
 
 class ProductIngestionEngine:
@@ -48,7 +48,7 @@ class ProductIngestionEngine:
 
         print(f"📡 Fetching API: {api}")
 
-        res = requests.get(api, timeout=30)
+        res = fetch_policy.get(api, timeout=30)
         data = res.json()
 
         products = []
@@ -143,7 +143,7 @@ class ProductIngestionEngine:
                 browser = p.chromium.launch(headless=True)
                 page = browser.new_page()
 
-                page.goto(url, timeout=60000)
+                fetch_policy.goto(page, url, timeout=60000)
                 page.wait_for_timeout(5000)
 
                 items = page.evaluate("""
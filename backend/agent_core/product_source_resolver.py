@@ -1,6 +1,8 @@
 from playwright.sync_api import sync_playwright
 import json
 
+from backend.agent_core import fetch_policy
+
 
 class ProductSourceResolver:
 
@@ -42,7 +44,7 @@ class ProductSourceResolver:
 
             page.on("response", handle_response)
 
-            page.goto(url, timeout=60000)
+            fetch_policy.goto(page, url, timeout=60000)
 
             # ⭐ WAIT LONGER — APIs load async
             page.wait_for_timeout(8000)
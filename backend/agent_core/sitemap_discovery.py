@@ -0,0 +1,163 @@
+"""
+sitemap_discovery.py – product URL discovery from robots.txt and sitemaps.
+
+    robots.txt  → Sitemap: lines (else /sitemap.xml, /sitemap_index.xml)
+    sitemap     → <urlset> page URLs, or a <sitemapindex> of more sitemaps
+
+Sitemaps are fetched over plain HTTP and parsed as a stream (iterparse,
+with each finished entry cleared and detached from the root), so a 50k-URL
+sitemap never sits in memory as a tree; gzip is handled both as Content-Encoding and as .xml.gz files.
+URLs are kept when they are on the site's domain, allowed by robots.txt for
+our user agent, not on the blocklist, and match PRODUCT_PATTERN.
+
+Navigator.discover tries this first and only launches a browser crawl when
+it finds nothing.
+"""
+
+import gzip
+import io
+import os
+import re
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree.ElementTree import ParseError, iterparse
+
+import requests
+
+from backend.agent_core import fetch_policy
+
+
+SITEMAP_MAX_PRODUCTS = int(os.environ.get("SITEMAP_MAX_PRODUCTS", "500"))
+SITEMAP_MAX_FILES    = int(os.environ.get("SITEMAP_MAX_FILES", "50"))
+SITEMAP_TIMEOUT      = float(os.environ.get("SITEMAP_TIMEOUT", "15"))
+
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
+
+PRODUCT_PATTERN = re.compile(
+    r"gift[-_]?cards?|e[-_]?gift|voucher|/product|/p/|/brand|recharge", re.IGNORECASE
+)
+BLOCKED = ("faq", "privacy", "login", "account", "help", "terms", "careers", "blog")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _host(netloc: str) -> str:
+    return netloc.lower().removeprefix("www.")
+
+
+def _local(tag: str) -> str:
+    """Tag name without its XML namespace."""
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapDiscovery:
+
+    def __init__(self, session: requests.Session | None = None,
+                 max_products: int = SITEMAP_MAX_PRODUCTS):
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+        self.max_products = max_products
+
+    def discover(self, url: str) -> dict | None:
+        """Navigator-style site map, or None when the site has no usable sitemap."""
+        root = f"{urlparse(url).scheme or 'https'}://{urlparse(url).netloc}"
+        robots, sitemaps = self._read_robots(root)
+        if not sitemaps:
+            sitemaps = [f"{root}/sitemap.xml", f"{root}/sitemap_index.xml"]
+
+        product_links = self._walk(sitemaps, urlparse(url).netloc, robots)
+        if product_links is None:
+            return None
+
+        print(f"🗺️  Sitemap discovery found {len(product_links)} product links")
+        return {"url": url, "product_links": product_links, "source": "sitemap"}
+
+    # ── robots.txt ─────────────────────────────────────────────
+
+    def _read_robots(self, root: str) -> tuple[RobotFileParser | None, list[str]]:
+        try:
+            r = fetch_policy.get(f"{root}/robots.txt", session=self.session,
+                                 timeout=SITEMAP_TIMEOUT)
+        except (requests.RequestException, fetch_policy.CircuitOpenError):
+            return None, []
+        if r.status_code != 200:
+            return None, []
+
+        lines = r.text.splitlines()
+        robots = RobotFileParser()
+        robots.parse(lines)
+        sitemaps = [
+            urljoin(root, line.split(":", 1)[1].strip())
+            for line in lines
+            if line.lower().startswith("sitemap:")
+        ]
+        return robots, list(dict.fromkeys(sitemaps))
+
+    # ── sitemaps ───────────────────────────────────────────────
+
+    def _walk(self, sitemaps: list[str], domain: str,
+              robots: RobotFileParser | None) -> list[str] | None:
+        """Product URLs from every reachable sitemap (None if none could be read)."""
+        queue, seen_maps = list(sitemaps), set()
+        found, read_any = {}, False
+
+        while queue and len(seen_maps) < SITEMAP_MAX_FILES and len(found) < self.max_products:
+            sm = queue.pop(0)
+            if sm in seen_maps:
+                continue
+            seen_maps.add(sm)
+
+            try:
+                for kind, loc in self._entries(sm):
+                    read_any = True
+                    if kind == "sitemap":
+                        queue.append(loc)
+                    elif self._is_product(loc, domain, robots):
+                        found[loc] = None
+                        if len(found) >= self.max_products:
+                            break
+            except (requests.RequestException, fetch_policy.CircuitOpenError,
+                    ParseError, OSError, EOFError) as e:
+                print(f"  ⚠️  Sitemap unreadable ({sm}): {e}")
+
+        return list(found) if read_any else None
+
+    def _entries(self, sitemap_url: str):
+        """Yield ("sitemap" | "url", loc) from one sitemap, streaming."""
+        with fetch_policy.get(sitemap_url, session=self.session,
+                              timeout=SITEMAP_TIMEOUT, stream=True) as r:
+            if r.status_code != 200:
+                return
+            r.raw.decode_content = True        # undo Content-Encoding: gzip
+            stream = io.BufferedReader(r.raw)
+            if stream.peek(2)[:2] == _GZIP_MAGIC:  # a .xml.gz file served as-is
+                stream = gzip.GzipFile(fileobj=stream)
+
+            root, loc = None, None
+            for event, elem in iterparse(stream, events=("start", "end")):
+                if root is None:
+                    root = elem                # <urlset> / <sitemapindex>
+                if event == "start":
+                    continue
+                tag = _local(elem.tag)
+                if tag == "loc":
+                    loc = (elem.text or "").strip()
+                elif tag in ("sitemap", "url"):
+                    if loc:
+                        yield tag, loc
+                    loc = None
+                    # Clearing elem alone keeps an empty element per entry
+                    # attached to the root; dropping the root's children doesn't
+                    root.clear()
+
+    def _is_product(self, loc: str, domain: str, robots: RobotFileParser | None) -> bool:
+        parsed = urlparse(loc)
+        if _host(parsed.netloc) != _host(domain):
+            return False
+        lower = loc.lower()
+        if any(x in lower for x in BLOCKED):
+            return False
+        if not PRODUCT_PATTERN.search(parsed.path):
+            return False
+        return robots is None or robots.can_fetch(USER_AGENT, loc)
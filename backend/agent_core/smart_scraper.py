@@ -13,13 +13,32 @@ SmartScraper v5 - Root cause fixes:
 
 4. Prices ALWAYS stored as variant_value (even for competitor products),
    so the pricing matrix can show actual numbers.
+
+5. Static tier: before any browser, one plain GET of the page is parsed for
+   JSON-LD, __NEXT_DATA__ and __INITIAL_STATE__ (static_html.py). If that
+   yields enough priced rows (STATIC_MIN_PRICED), Chromium is never launched.
+   Which tier won is remembered per URL (strategy_memory.py) and tried first
+   next run.
+
+6. Browser runs start warm: cookies/localStorage and static assets are kept
+   per site between runs (browser_state.py).
 """
 
+import os
 import re
 import json
+import time
 from urllib.parse import urlparse, urljoin
 
-from playwright.sync_api import sync_playwright
+from backend.agent_core import browser_state, fetch_policy, fixtures as _fixtures
+from backend.agent_core.strategy_memory import StrategyMemory
+from backend.agent_core.tracing import span, current_span
+
+
+# Try a plain HTTP fetch before launching Chromium (off: SCRAPER_STATIC_TIER=0)
+STATIC_TIER = os.environ.get("SCRAPER_STATIC_TIER", "1") != "0"
+# Fraction of static rows that must carry a price to skip the browser
+STATIC_MIN_PRICED = float(os.environ.get("STATIC_MIN_PRICED", "0.5"))
 
 
 # ─────────────────────────────────────────────────────────────
@@ -304,6 +323,84 @@ def _walk_payload(data, strict_brands: bool = True, base_url: str = None) -> lis
     return results
 
 
+# ─────────────────────────────────────────────────────────────
+# JSON-LD / EMBEDDED DATA
+# ─────────────────────────────────────────────────────────────
+
+def _json_ld_nodes(docs: list) -> list[dict]:
+    """Top-level JSON-LD nodes, with array wrappers and @graph containers flattened."""
+    nodes = []
+    for doc in docs:
+        for node in doc if isinstance(doc, list) else [doc]:
+            if isinstance(node, dict):
+                nodes.extend(n for n in node.get("@graph", [node]) if isinstance(n, dict))
+    return nodes
+
+
+def _is_ld_type(node: dict, name: str) -> bool:
+    t = node.get("@type")
+    return name in t if isinstance(t, list) else t == name
+
+
+def _json_ld_item_list(docs: list) -> list[dict]:
+    """Entries of every JSON-LD ItemList as {name, url, position, offers}, by position."""
+    products = []
+    for node in _json_ld_nodes(docs):
+        if not _is_ld_type(node, "ItemList"):
+            continue
+        for item in node.get("itemListElement", []):
+            if not isinstance(item, dict):
+                continue
+            # item can be {"@type":"ListItem","name":...,"url":...}
+            # or {"@type":"ListItem","item":{"name":...,"url":...}}
+            inner = item.get("item") if isinstance(item.get("item"), dict) else {}
+            name = item.get("name") or inner.get("name", "")
+            url_val = item.get("url") or inner.get("url")
+            if name and not _is_noise(name):
+                products.append({
+                    "name": name,
+                    "url": url_val,
+                    "position": item.get("position", len(products)),
+                    "offers": inner.get("offers"),
+                })
+    return sorted(products, key=lambda x: x.get("position", 0))
+
+
+def _offer_price(offers) -> float | None:
+    """Price of a JSON-LD Offer / AggregateOffer (first priced one of a list)."""
+    if isinstance(offers, list):
+        return next(filter(None, map(_offer_price, offers)), None)
+    if isinstance(offers, dict):
+        return _clean_price(offers.get("price") or offers.get("lowPrice"))
+    return None
+
+
+def _static_rows(data: dict, base_url: str) -> list[dict]:
+    """Product rows from a page's embedded data (static_html.embedded_data)."""
+    entries = [
+        {"name": n.get("name"), "url": n.get("url"), "offers": n.get("offers")}
+        for n in _json_ld_nodes(data["json_ld"]) if _is_ld_type(n, "Product")
+    ] + _json_ld_item_list(data["json_ld"])
+
+    rows = []
+    for p in entries:
+        name = p["name"]
+        if not isinstance(name, str) or _is_noise(name):
+            continue
+        price = _offer_price(p["offers"])
+        rows.append({
+            "name": name, "price": price, "variant_value": price,
+            "category": None,
+            "url": urljoin(base_url, p["url"]) if p.get("url") else None,
+            "signature": _get_signature(name) or _fallback_signature(name),
+        })
+
+    for key in ("next_data", "initial_state"):
+        if data.get(key):
+            rows.extend(_walk_payload(data[key], strict_brands=True, base_url=base_url))
+    return rows
+
+
 # ─────────────────────────────────────────────────────────────
 # KSTORE PARSER
 # ─────────────────────────────────────────────────────────────
@@ -316,6 +413,7 @@ class _KStoreParser:
 
     def extract(self, page, url: str) -> list[dict]:
         captured = []
+        captured_bytes = [0]
         base_url = "https://" + urlparse(url).netloc
 
         def on_response(response):
@@ -323,80 +421,100 @@ class _KStoreParser:
             if "json" not in ct:
                 return
             try:
-                data = response.json()
+                body = response.body()
+                data = json.loads(body)
                 txt = json.dumps(data).lower()
                 keywords = ("voucher", "denomination", "giftcard", "product",
                             "brand", "facevalue", "inr", "recharge", "egift")
                 if any(k in txt for k in keywords):
                     captured.append(data)
+                    captured_bytes[0] += len(body)
             except Exception:
                 pass
 
         page.on("response", on_response)
-        page.goto(url, wait_until="networkidle", timeout=60_000)
-        page.wait_for_timeout(5_000)
+        with span("navigate", url=url):
+            fetch_policy.goto(page, url, wait_until="networkidle", timeout=60_000)
+            page.wait_for_timeout(5_000)
 
         results = []
-        for payload in captured:
-            results.extend(_walk_payload(payload, strict_brands=True, base_url=base_url))
+        with span("xhr_payloads") as sp:
+            for payload in captured:
+                results.extend(_walk_payload(payload, strict_brands=True, base_url=base_url))
+            sp.count("payloads", len(captured))
+            sp.count("rows", len(results))
+            sp.add_bytes(captured_bytes[0])
 
         if not results:
-            results = self._dom_fallback(page, url)
+            with span("dom_fallback") as sp:
+                results = self._dom_fallback(page, url)
+                sp.count("rows", len(results))
 
         return results
 
+    # One in-page pass over the cards: for each card, the first element's text
+    # for every name selector (in priority order), the image alt, the INR
+    # amounts in its text and its href. Python applies the noise/brand/price
+    # rules so they stay in one place.
+    _DOM_CARDS_JS = r"""
+        ([cardSel, nameSels, limit]) => {
+            const priceRe = /(?:INR|₹)\s*([\d,]+(?:\.\d+)?)/gi;
+            return Array.from(document.querySelectorAll(cardSel)).slice(0, limit).map(card => {
+                const names = nameSels.map(sel => {
+                    const el = card.querySelector(sel);
+                    return el ? (el.innerText || "").trim() : null;
+                });
+                const img = card.querySelector("img");
+                const text = card.innerText || "";
+                return {
+                    names,
+                    alt: img ? img.getAttribute("alt") : null,
+                    prices: Array.from(text.matchAll(priceRe), m => m[1]),
+                    href: card.getAttribute("href"),
+                };
+            });
+        }
+    """
+    CARD_SEL = ("[class*=product], [class*=card], [class*=voucher], "
+                "[class*=item], a[href*='product'], a[href*='voucher']")
+    NAME_SELS = ["h2", "h3", "h4", "h5", "p.title", "[class*=name]", "[class*=title]", "p"]
+    MAX_CARDS = 300
+
     def _dom_fallback(self, page, base_url: str) -> list[dict]:
-        results = []
-        seen = set()
         try:
-            cards = page.locator(
-                "[class*=product], [class*=card], [class*=voucher], "
-                "[class*=item], a[href*='product'], a[href*='voucher']"
-            ).all()
-            for card in cards[:300]:
-                try:
-                    # Name
-                    name = ""
-                    for sel in ["h2", "h3", "h4", "h5", "p.title",
-                                "[class*=name]", "[class*=title]", "p"]:
-                        el = card.locator(sel).first
-                        if el.count() > 0:
-                            t = el.inner_text().strip()
-                            if t and not _is_noise(t) and len(t) > 3:
-                                name = t
-                                break
-                    if not name:
-                        img = card.locator("img").first
-                        if img.count() > 0:
-                            name = img.get_attribute("alt") or ""
-
-                    if not name or _is_noise(name) or name in seen:
-                        continue
-                    sig = _get_signature(name)
-                    if not sig:
-                        continue
-                    seen.add(name)
-
-                    # Price — KStore shows "INR 403" or "₹403"
-                    price = None
-                    full_text = card.inner_text()
-                    for m in re.finditer(r"(?:INR|₹)\s*([\d,]+(?:\.\d+)?)", full_text, re.IGNORECASE):
-                        v = _clean_price(m.group(1))
-                        if v:
-                            price = v
-                            break
-
-                    href = card.get_attribute("href") or ""
-                    url_val = urljoin(base_url, href) if href else None
-
-                    results.append({
-                        "name": name, "price": price, "variant_value": price,
-                        "category": None, "url": url_val, "signature": sig,
-                    })
-                except Exception:
-                    continue
+            cards = page.evaluate(self._DOM_CARDS_JS,
+                                  [self.CARD_SEL, self.NAME_SELS, self.MAX_CARDS])
         except Exception:
-            pass
+            return []
+        current_span().count("cards", len(cards or []))
+
+        results = []
+        seen = set()
+        for card in cards or []:
+            # Name
+            name = next(
+                (t for t in card.get("names") or []
+                 if t and not _is_noise(t) and len(t) > 3),
+                "",
+            ) or card.get("alt") or ""
+
+            if not name or _is_noise(name) or name in seen:
+                continue
+            sig = _get_signature(name)
+            if not sig:
+                continue
+            seen.add(name)
+
+            # Price — KStore shows "INR 403" or "₹403"
+            price = next(filter(None, map(_clean_price, card.get("prices") or [])), None)
+
+            href = card.get("href") or ""
+            url_val = urljoin(base_url, href) if href else None
+
+            results.append({
+                "name": name, "price": price, "variant_value": price,
+                "category": None, "url": url_val, "signature": sig,
+            })
         return results
 
 
@@ -461,27 +579,54 @@ class _WoohooParser:
         page.on("response", on_response)
 
         # ── Step 2: Navigate and read page 1 from __INITIAL_STATE__ ──
-        page.goto(url, wait_until="networkidle", timeout=60_000)
-        page.wait_for_timeout(3_000)
-        self._read_initial_state(page, all_products, pages_seen)
+        with span("navigate", url=url):
+            fetch_policy.goto(page, url, wait_until="networkidle", timeout=60_000)
+            page.wait_for_timeout(3_000)
+        with span("initial_state") as sp:
+            before = len(all_products)
+            self._read_initial_state(page, all_products, pages_seen)
+            sp.count("products", len(all_products) - before)
 
         # ── Step 3: Scroll to trigger lazy-load of pages 2–N ──
-        for _ in range(20):
-            page.evaluate("window.scrollBy(0, window.innerHeight * 2)")
-            page.wait_for_timeout(400)
-        page.wait_for_timeout(2_000)
+        with span("scroll") as sp:
+            before = len(all_products)
+            for _ in range(20):
+                page.evaluate("window.scrollBy(0, window.innerHeight * 2)")
+                page.wait_for_timeout(400)
+            page.wait_for_timeout(2_000)
+            sp.count("xhr_pages", len(pages_seen - {"1"}))
+            sp.count("products", len(all_products) - before)
 
         # ── Step 4: Fetch any remaining pages directly via API ──
         # Woohoo's category API is public — no auth needed.
         # We use page.evaluate() to make fetch() calls from inside the browser
         # (same origin, so cookies/headers are inherited automatically).
         already = {int(p) for p in pages_seen if p.isdigit()}
-        last_seen = max(already) if already else 1
+        with span("api_pages") as sp:
+            before = len(all_products)
+            self._fetch_remaining_pages(page, all_products, already)
+            sp.count("products", len(all_products) - before)
+
+        print(f"    📊 Woohoo total: {len(all_products)} products across {len(already)} pages")
+
+        # ── Convert to standard rows, filter empty ────────────
+        rows = []
+        for p in all_products:
+            if p.get("name") or p.get("product_name"):
+                row = self._to_row(p)
+                if row:
+                    rows.append(row)
+        return rows
+
+    def _fetch_remaining_pages(self, page, all_products: list, already: set):
+        """Fetch category pages not yet seen via in-page fetch() until one comes back empty."""
+        sp = current_span()
         for page_num in range(1, self.MAX_PAGES + 1):
             if page_num in already:
                 continue
             try:
                 api_url = f"https://www.woohoo.in/proxy/category/{self.CATEGORY_ID}?page={page_num}"
+                fetch_policy.acquire(api_url)
                 result = page.evaluate(f"""
                     async () => {{
                         try {{
@@ -497,6 +642,8 @@ class _WoohooParser:
                 """)
                 if not result:
                     break
+                sp.count("pages")
+                sp.add_bytes(len(json.dumps(result)))
                 products = (result.get("data", {})
                                   .get("_embedded", {})
                                   .get("products", []))
@@ -510,17 +657,6 @@ class _WoohooParser:
                 print(f"    ⚠️  Woohoo page {page_num} fetch failed: {e}")
                 break
 
-        print(f"    📊 Woohoo total: {len(all_products)} products across {len(already)} pages")
-
-        # ── Convert to standard rows, filter empty ────────────
-        rows = []
-        for p in all_products:
-            if p.get("name") or p.get("product_name"):
-                row = self._to_row(p)
-                if row:
-                    rows.append(row)
-        return rows
-
     def _read_initial_state(self, page, all_products: list, pages_seen: set):
         """Page 1 is embedded in window.__INITIAL_STATE__ in a <script> tag."""
         try:
@@ -545,15 +681,8 @@ class _WoohooParser:
             """)
             if not state_str:
                 return
-            state = json.loads(state_str)
-            # Navigate to products array: appReducer.category.data._embedded.products
-            products = (
-                state.get("appReducer", {})
-                     .get("category", {})
-                     .get("data", {})
-                     .get("_embedded", {})
-                     .get("products", [])
-            )
+            current_span().add_bytes(len(state_str))
+            products = self._initial_state_products(json.loads(state_str))
             if products:
                 pages_seen.add("1")
                 print(f"    📦 Woohoo __INITIAL_STATE__ (page 1): {len(products)} products")
@@ -561,6 +690,52 @@ class _WoohooParser:
         except Exception as e:
             print(f"    ⚠️  __INITIAL_STATE__ read failed: {e}")
 
+    @staticmethod
+    def _initial_state_products(state: dict) -> list[dict]:
+        # Navigate to products array: appReducer.category.data._embedded.products
+        return (
+            state.get("appReducer", {})
+                 .get("category", {})
+                 .get("data", {})
+                 .get("_embedded", {})
+                 .get("products", [])
+        )
+
+    def extract_static(self, data: dict, url: str, session) -> list[dict] | None:
+        """
+        Static tier: page 1 from the served __INITIAL_STATE__, pages 2+ from
+        the public category API over plain HTTP. None (→ browser) when the
+        state is missing or the API refuses a non-browser client.
+        """
+        from backend.agent_core.static_html import STATIC_FETCH_TIMEOUT
+
+        all_products = list(self._initial_state_products(data.get("initial_state") or {}))
+        if not all_products:
+            return None
+        print(f"    📦 Woohoo static __INITIAL_STATE__ (page 1): {len(all_products)} products")
+
+        sp = current_span()
+        for page_num in range(2, self.MAX_PAGES + 1):
+            api_url = f"https://www.woohoo.in/proxy/category/{self.CATEGORY_ID}?page={page_num}"
+            r = fetch_policy.get(api_url, session=session, timeout=STATIC_FETCH_TIMEOUT, headers={
+                "Accept": "application/json",
+                "X-Requested-With": "XMLHttpRequest",
+            })
+            if r.status_code != 200 or "json" not in r.headers.get("content-type", ""):
+                print(f"    ↪ Woohoo API page {page_num} refused ({r.status_code})")
+                return None
+            sp.count("pages")
+            sp.add_bytes(len(r.content))
+            products = (r.json().get("data", {})
+                                .get("_embedded", {})
+                                .get("products", []))
+            if not products:
+                break
+            all_products.extend(products)
+
+        print(f"    📊 Woohoo static total: {len(all_products)} products")
+        return [row for row in map(self._to_row, all_products) if row]
+
     def _to_row(self, p: dict) -> dict:
         """Convert a Woohoo product API object to our standard row format."""
         name = p.get("name") or p.get("product_name") or ""
@@ -623,7 +798,15 @@ class _FlipkartParser:
     These pages have JSON-LD ItemList with names + URLs AND render prices in DOM.
 
     If the configured URL is a search URL, we redirect to the category URL.
-    We also directly read any JSON-LD present and augment with DOM prices.
+    We also directly read any JSON-LD present and augment with DOM prices:
+    one in-page pass returns every product card's link, title and price, and
+    JSON-LD items are priced by joining on the product URL path – a card
+    without a price leaves only its own row unpriced.
+
+    The URL that worked last run for the configured URL (LAST_URL_FILE) is
+    loaded on its own first. Only when it yields nothing do the other
+    candidates load – together, one page each, settling in lockstep – and
+    the first of them with products wins.
     """
 
     # Flipkart gift card category URLs that actually work
@@ -639,6 +822,49 @@ class _FlipkartParser:
         "div[class*='_30jeq3']", "span[class*='_30jeq3']",
     ]
 
+    # Every product link's card as {href, title, price}: the card is the link's
+    # nearest <li>, else its third <div> ancestor; price is the first ₹ amount
+    # under the first matching price selector. Links sharing an href (image +
+    # title) are merged.
+    _CARDS_JS = r"""
+        ([priceSels, limit]) => {
+            const priceRe = /[₹₨]\s*([\d,]+(?:\.\d{1,2})?)/;
+            const cards = new Map();
+            for (const a of document.querySelectorAll("a[href*='/p/']")) {
+                const href = a.getAttribute("href");
+                if (!href) continue;
+                if (!cards.has(href)) {
+                    if (cards.size >= limit) continue;
+                    cards.set(href, {href, title: null, price: null});
+                }
+                const entry = cards.get(href);
+                if (!entry.title) {
+                    entry.title = a.getAttribute("title") ||
+                                  (a.innerText || "").trim().split("\n")[0] || null;
+                }
+                if (entry.price) continue;
+                let card = a.closest("li");
+                for (let el = a, divs = 0; !card && el.parentElement; ) {
+                    el = el.parentElement;
+                    if (el.tagName === "DIV" && ++divs === 3) card = el;
+                }
+                for (const sel of priceSels) {
+                    const el = (card || a).querySelector(sel);
+                    const m = el && (el.innerText || "").match(priceRe);
+                    if (m) { entry.price = m[1]; break; }
+                }
+            }
+            return Array.from(cards.values());
+        }
+    """
+    MAX_CARDS = 100
+    BASE_URL = "https://www.flipkart.com"
+
+    # Target URL that last produced products, per configured URL
+    LAST_URL_FILE = "memory/flipkart_last_url.json"
+    # How long candidates' DOMs may take, counted from their navigation start
+    PROBE_TIMEOUT = 30_000
+
     def extract(self, page, url: str) -> list[dict]:
         # If given search URL, try category URL first (more reliable)
         target_urls = []
@@ -647,174 +873,212 @@ class _FlipkartParser:
         else:
             target_urls = [url] + self.CATEGORY_URLS
 
-        all_results = []
-        for target_url in target_urls:
+        # Whichever URL worked last run goes first
+        last = self._last_url(url)
+        if last in target_urls:
+            target_urls = [last] + [u for u in target_urls if u != last]
+
+        # Preferred URL alone: a scan that works first time costs one page load
+        with span("navigate", targets=1):
+            candidates = self._settle(self._start_all([(page, target_urls[0])]))
+        winner, results = self._read_first(candidates)
+        if not results and len(target_urls) > 1:
+            winner, results = self._fan_out(page, target_urls[1:])
+        if results:
+            self._remember_url(url, winner)
+        return results
+
+    def _fan_out(self, page, target_urls: list[str]) -> tuple[str | None, list[dict]]:
+        """
+        Load the fallback URLs side by side (one page each, settled together)
+        and read them in order; closing the pages afterwards stops whatever
+        the first hit made unnecessary.
+        """
+        pages = [page.context.new_page() for _ in target_urls]
+        try:
+            with span("navigate", targets=len(pages)):
+                candidates = self._settle(self._start_all(list(zip(pages, target_urls))))
+            return self._read_first(candidates)
+        finally:
+            for probe_page in pages:
+                probe_page.close()
+
+    def _read_first(self, candidates: list[tuple]) -> tuple[str | None, list[dict]]:
+        """(url, rows) of the first settled (page, url) candidate with products."""
+        for probe_page, target_url in candidates:
             try:
-                results = self._scrape_url(page, target_url)
-                if results:
-                    print(f"    ✅ Flipkart got {len(results)} products from {target_url[:60]}")
-                    all_results = results
-                    break
+                with span("probe_url", url=target_url) as sp:
+                    results = self._read_url(probe_page)
+                    sp.count("rows", len(results))
             except Exception as e:
                 print(f"    ⚠️  Flipkart URL failed ({target_url[:50]}): {e}")
                 continue
+            if results:
+                print(f"    ✅ Flipkart got {len(results)} products from {target_url[:60]}")
+                return target_url, results
+        return None, []
+
+    def _start_all(self, candidates: list[tuple]) -> list[tuple]:
+        """
+        Start every (page, url) navigation without waiting for it to load.
+
+        The sync Playwright API blocks per call, so navigations only wait for
+        "commit" and the pages load in the background. Returns the candidates
+        that started.
+        """
+        started = []
+        for probe_page, target_url in candidates:
+            try:
+                fetch_policy.goto(probe_page, target_url, wait_until="commit", timeout=60_000)
+                started.append((probe_page, target_url))
+            except Exception as e:
+                print(f"    ⚠️  Flipkart URL failed ({target_url[:50]}): {e}")
+        return started
+
+    def _settle(self, candidates: list[tuple]) -> list[tuple]:
+        """
+        Wait for the candidates' DOMs and scroll them so every product renders.
+
+        All pages share one PROBE_TIMEOUT deadline and one set of waits, with
+        scrolls issued to each page per round – settling N pages costs about
+        the same as settling one. Returns the candidates whose DOM loaded.
+        """
+        deadline = time.monotonic() + self.PROBE_TIMEOUT / 1000
+        loaded = []
+        for probe_page, target_url in candidates:
+            remaining = max(deadline - time.monotonic(), 0.001) * 1000
+            try:
+                probe_page.wait_for_load_state("domcontentloaded", timeout=remaining)
+                loaded.append((probe_page, target_url))
+            except Exception as e:
+                print(f"    ⚠️  Flipkart URL failed ({target_url[:50]}): {e}")
+        if not loaded:
+            return []
 
-        return all_results
+        clock = loaded[0][0]
+        clock.wait_for_timeout(5_000)
+        for _ in range(6):
+            for probe_page, _url in loaded:
+                probe_page.evaluate("window.scrollBy(0, window.innerHeight)")
+            clock.wait_for_timeout(600)
+        clock.wait_for_timeout(2_000)
+        return loaded
 
-    def _scrape_url(self, page, url: str) -> list[dict]:
-        page.goto(url, wait_until="domcontentloaded", timeout=60_000)
-        page.wait_for_timeout(5_000)
+    def _load_last_urls(self) -> dict:
+        try:
+            with open(self.LAST_URL_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
-        # Scroll to render all products
-        for _ in range(6):
-            page.evaluate("window.scrollBy(0, window.innerHeight)")
-            page.wait_for_timeout(600)
-        page.wait_for_timeout(2_000)
+    def _last_url(self, url: str) -> str | None:
+        return self._load_last_urls().get(url)
 
+    def _remember_url(self, url: str, target_url: str):
+        # Re-read so other configured URLs written meanwhile are kept
+        last_urls = self._load_last_urls()
+        last_urls[url] = target_url
+        try:
+            os.makedirs(os.path.dirname(self.LAST_URL_FILE), exist_ok=True)
+            tmp = f"{self.LAST_URL_FILE}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(last_urls, f, indent=2)
+            os.replace(tmp, self.LAST_URL_FILE)   # scan workers may write concurrently
+        except OSError as e:
+            print(f"    ⚠️  Could not save Flipkart URL: {e}")
+
+    def _read_url(self, page) -> list[dict]:
         # Strategy 1: JSON-LD ItemList (names + URLs)
-        ld_products = self._read_json_ld(page)
+        with span("json_ld") as sp:
+            ld_products = self._read_json_ld(page)
+            sp.count("items", len(ld_products))
         print(f"    📋 Flipkart JSON-LD: {len(ld_products)} items")
 
-        # Strategy 2: DOM prices — read all price elements in order
-        dom_prices = self._read_dom_prices(page)
-        print(f"    💰 Flipkart DOM prices found: {len(dom_prices)}")
+        # Strategy 2: product cards (link + title + price) in one pass
+        with span("dom_cards") as sp:
+            cards = self._read_cards(page)
+            sp.count("cards", len(cards))
+            sp.count("priced", sum(1 for c in cards if c["price"]))
+        print(f"    💰 Flipkart cards found: {len(cards)}")
 
         if ld_products:
-            # Merge names from JSON-LD with prices from DOM by position
+            # Price JSON-LD items from the first priced card with the same product URL
+            prices = {}
+            for c in cards:
+                if c["price"] is not None:
+                    prices.setdefault(self._url_key(c["url"]), c["price"])
             results = []
-            for i, p in enumerate(ld_products):
-                price = dom_prices[i] if i < len(dom_prices) else None
-                sig = _get_signature(p["name"]) or _fallback_signature(p["name"])
-                results.append({
-                    "name": p["name"],
-                    "price": price,
-                    "variant_value": price,
-                    "min_price": price,
-                    "max_price": None,
-                    "discount_pct": None,
-                    "category": "gift_card",
-                    "url": p.get("url"),
-                    "signature": sig,
-                })
+            for p in ld_products:
+                price = prices.get(self._url_key(p.get("url")))
+                results.append(self._row(p["name"], price, p.get("url")))
             return results
 
-        # Strategy 3: Pure DOM fallback (product links + adjacent prices)
-        return self._dom_fallback(page)
+        # Strategy 3: Pure DOM fallback (the cards themselves)
+        with span("dom_fallback") as sp:
+            results = []
+            seen = set()
+            for c in cards:
+                name = c["title"]
+                if not name or _is_noise(name) or name in seen:
+                    continue
+                seen.add(name)
+                results.append(self._row(name, c["price"], c["url"]))
+            sp.count("rows", len(results))
+            return results
+
+    def _row(self, name: str, price: float | None, url_val: str | None) -> dict:
+        return {
+            "name": name,
+            "price": price,
+            "variant_value": price,
+            "min_price": price,
+            "max_price": None,
+            "discount_pct": None,
+            "category": "gift_card",
+            "url": url_val,
+            "signature": _get_signature(name) or _fallback_signature(name),
+        }
+
+    @staticmethod
+    def _url_key(url_val: str | None) -> str | None:
+        """Join key for JSON-LD items and cards: the URL path (tracking query dropped)."""
+        if not url_val:
+            return None
+        return urlparse(url_val).path.rstrip("/") or None
 
     def _read_json_ld(self, page) -> list[dict]:
-        products = []
         try:
             scripts = page.evaluate("""
                 () => Array.from(
                     document.querySelectorAll('script[type="application/ld+json"]')
                 ).map(s => s.textContent || '')
             """)
-            for text in (scripts or []):
-                if not text.strip():
-                    continue
-                try:
-                    data = json.loads(text)
-                    # Handle array wrapper
-                    if isinstance(data, list):
-                        for item in data:
-                            if isinstance(item, dict) and item.get("@type") == "ItemList":
-                                data = item
-                                break
-                        else:
-                            continue
-                    if data.get("@type") != "ItemList":
-                        continue
-                    for item in data.get("itemListElement", []):
-                        # item can be {"@type":"ListItem","name":...,"url":...}
-                        # or {"@type":"ListItem","item":{"name":...,"url":...}}
-                        name = item.get("name") or (item.get("item") or {}).get("name", "")
-                        url_val = item.get("url") or (item.get("item") or {}).get("url")
-                        if name and not _is_noise(name):
-                            products.append({
-                                "name": name,
-                                "url": url_val,
-                                "position": item.get("position", len(products)),
-                            })
-                except Exception:
-                    continue
         except Exception:
-            pass
-        return sorted(products, key=lambda x: x.get("position", 0))
-
-    def _read_dom_prices(self, page) -> list[float | None]:
-        """Read price elements from DOM in document order."""
-        for sel in self.PRICE_SELS:
+            return []
+        current_span().add_bytes(sum(len(t) for t in (scripts or [])))
+        docs = []
+        for text in (scripts or []):
+            if not text.strip():
+                continue
             try:
-                elements = page.locator(sel).all()
-                if len(elements) < 2:
-                    continue
-                prices = []
-                for el in elements:
-                    try:
-                        text = el.inner_text().strip()
-                        m = re.search(r"[₹₨]\s*([\d,]+(?:\.\d{1,2})?)", text)
-                        if not m:
-                            m = re.search(r"^[\d,]+$", text)
-                        if m:
-                            raw = m.group(1) if m.lastindex else m.group(0)
-                            v = _clean_price(raw.replace(",", ""))
-                            prices.append(v)
-                    except Exception:
-                        prices.append(None)
-                if prices:
-                    return prices
-            except Exception:
+                docs.append(json.loads(text))
+            except ValueError:
                 continue
-        return []
+        return _json_ld_item_list(docs)
 
-    def _dom_fallback(self, page) -> list[dict]:
-        results = []
-        seen = set()
+    def _read_cards(self, page) -> list[dict]:
         try:
-            links = page.locator("a[href*='/p/']").all()
-            for link in links[:100]:
-                try:
-                    name = link.get_attribute("title") or ""
-                    if not name:
-                        name = link.inner_text().strip().split("\n")[0]
-                    if not name or _is_noise(name) or name in seen:
-                        continue
-                    seen.add(name)
-
-                    href = link.get_attribute("href") or ""
-                    url_val = f"https://www.flipkart.com{href}" if href.startswith("/") else href
-
-                    # Try to find price near this link
-                    price = None
-                    for anc in ["xpath=ancestor::li[1]", "xpath=ancestor::div[3]"]:
-                        try:
-                            c = link.locator(anc).first
-                            if c.count() > 0:
-                                for psel in self.PRICE_SELS:
-                                    pel = c.locator(psel).first
-                                    if pel.count() > 0:
-                                        m = re.search(r"[₹₨]\s*([\d,]+)",
-                                                      pel.inner_text())
-                                        if m:
-                                            price = _clean_price(
-                                                m.group(1).replace(",", ""))
-                                            break
-                                if price:
-                                    break
-                        except Exception:
-                            continue
-
-                    results.append({
-                        "name": name, "price": price, "variant_value": price,
-                        "min_price": price, "max_price": None, "discount_pct": None,
-                        "category": "gift_card", "url": url_val,
-                        "signature": _get_signature(name) or _fallback_signature(name),
-                    })
-                except Exception:
-                    continue
+            cards = page.evaluate(self._CARDS_JS, [self.PRICE_SELS, self.MAX_CARDS])
         except Exception:
-            pass
-        return results
+            return []
+        return [
+            {
+                "title": c.get("title"),
+                "price": _clean_price(c.get("price")),
+                "url": urljoin(self.BASE_URL, c["href"]),
+            }
+            for c in cards or []
+        ]
 
 
 # ─────────────────────────────────────────────────────────────
@@ -823,6 +1087,15 @@ class _FlipkartParser:
 
 class SmartScraper:
 
+    def __init__(self, fixtures: str | None = None, fixture_dir: str | None = None):
+        """
+        fixtures: None (live), "record" or "replay" – see agent_core/fixtures.py.
+        Defaults to SCRAPER_FIXTURES / SCRAPER_FIXTURE_DIR.
+        """
+        self.fixtures = fixtures if fixtures is not None else (_fixtures.SCRAPER_FIXTURES or None)
+        self.fixture_dir = fixture_dir or _fixtures.SCRAPER_FIXTURE_DIR
+        self.strategies = StrategyMemory()
+
     def _get_parser(self, url: str):
         domain = urlparse(url).netloc.lower()
         if "kstore" in domain:
@@ -835,37 +1108,125 @@ class SmartScraper:
 
     def scrape(self, url: str) -> list[dict]:
         parser = self._get_parser(url)
-        print(f"  🔍 Using parser: {parser.__class__.__name__} for {url}")
+        print(f"  🔍 Using parser: {parser.__class__.__name__} for {url}"
+              + (f" [{self.fixtures}]" if self.fixtures else ""))
+
+        if not self.fixtures and fetch_policy.is_open(url):
+            print(f"  🚧 Skipping {url}: circuit open after repeated failures")
+            return []
+
+        # Fixture runs record/replay the browser, so they never take the static
+        # tier and don't touch the strategy memory.
+        if STATIC_TIER and not self.fixtures:
+            strategy, raw = self.strategies.run(url, [
+                ("static", lambda: self._static_tier(parser, url)),
+                ("browser", lambda: self._browser_scrape(parser, url)),
+            ])
+            current_span().set(strategy=strategy)
+        else:
+            raw = self._browser_scrape(parser, url)
+
+        with span("clean") as sp:
+            rows = self._clean(raw)
+            sp.count("rows", len(rows))
+        return rows
+
+    def _static_tier(self, parser, url: str) -> list[dict]:
+        with span("static_tier", parser=parser.__class__.__name__) as sp:
+            raw = self._static_scrape(parser, url)
+            sp.set(result="hit" if raw else "escalated")
+        if raw:
+            print(f"  ⚡ Static HTML gave {len(raw)} rows – no browser needed")
+        return raw
+
+    def _static_scrape(self, parser, url: str) -> list[dict]:
+        """Rows from one plain GET of the page, or [] when a browser is needed."""
+        from backend.agent_core import static_html
+
+        sp = current_span()
+        try:
+            session = static_html.new_session()
+            page_html = static_html.fetch(url, session)
+            if not page_html:
+                return []
+            sp.add_bytes(len(page_html))
+            data = static_html.embedded_data(page_html)
+            extract_static = getattr(parser, "extract_static", None)
+            if extract_static:
+                raw = extract_static(data, url, session) or []
+            else:
+                raw = _static_rows(data, "https://" + urlparse(url).netloc)
+        except Exception as e:
+            print(f"  ⚠️  Static tier failed: {e}")
+            return []
+
+        priced = sum(1 for r in raw if r.get("price"))
+        sp.count("raw_rows", len(raw))
+        sp.count("priced", priced)
+        if not raw or priced < STATIC_MIN_PRICED * len(raw):
+            print(f"  ↪ Static HTML: {priced}/{len(raw)} rows priced – launching browser")
+            return []
+        return raw
+
+    def _browser_scrape(self, parser, url: str) -> list[dict]:
+        from playwright.sync_api import sync_playwright
+
+        # Warm session + asset cache, except in hermetic fixture runs
+        warm = browser_state.BROWSER_STATE and not self.fixtures
+        assets = browser_state.AssetCache(url) if warm else None
 
         with sync_playwright() as pw:
-            browser = pw.chromium.launch(
-                headless=True,
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--no-sandbox",
-                    "--disable-dev-shm-usage",
-                ]
-            )
-            context = browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/122.0.0.0 Safari/537.36"
-                ),
-                viewport={"width": 1440, "height": 900},
-                locale="en-IN",
-                timezone_id="Asia/Kolkata",
-            )
-            page = context.new_page()
+            with span("browser_launch"):
+                browser = pw.chromium.launch(
+                    headless=True,
+                    args=[
+                        "--disable-blink-features=AutomationControlled",
+                        "--no-sandbox",
+                        "--disable-dev-shm-usage",
+                    ]
+                )
+                context = browser.new_context(
+                    user_agent=(
+                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                        "AppleWebKit/537.36 (KHTML, like Gecko) "
+                        "Chrome/122.0.0.0 Safari/537.36"
+                    ),
+                    viewport={"width": 1440, "height": 900},
+                    locale="en-IN",
+                    timezone_id="Asia/Kolkata",
+                    **_fixtures.context_options(self.fixtures, url, self.fixture_dir),
+                    **(browser_state.context_options(url) if warm else {}),
+                )
+                _fixtures.attach(context, self.fixtures, url, self.fixture_dir)
+                if assets:
+                    assets.attach(context)
+                page = context.new_page()
 
             try:
-                raw = parser.extract(page, url)
+                # Fixture runs bypass throttling / retries / the breaker: replay
+                # aborts must not count against the live site
+                with span("parser", parser=parser.__class__.__name__) as sp, \
+                        fetch_policy.bypassed(bool(self.fixtures)):
+                    raw = parser.extract(page, url)
+                    sp.count("raw_rows", len(raw))
+                    if assets:
+                        sp.count("asset_cache_hits", assets.hits)
+                        sp.count("asset_cache_misses", assets.misses)
+                        sp.count("asset_cache_bytes", assets.bytes_served)
+                # Only a session that got through to products is worth keeping
+                if warm and raw:
+                    browser_state.save(context, url)
             except Exception as e:
                 print(f"  ⚠️  Parser error: {e}")
                 raw = []
             finally:
+                context.close()    # flushes the HAR when recording
                 browser.close()
 
+        return raw
+
+    def _clean(self, raw: list[dict]) -> list[dict]:
+        """Drop noise and duplicates, normalise every row to the standard shape."""
         seen = set()
         results = []
         for p in raw:
@@ -0,0 +1,94 @@
+"""
+static_html.py – plain-HTTP page fetch and embedded-data extraction.
+
+The first tier of SmartScraper: one GET, no browser. Server-rendered shops
+ship most of what the Playwright parsers read in the page source already:
+
+    json_ld        every <script type="application/ld+json"> block, parsed
+    next_data      <script id="__NEXT_DATA__"> (Next.js)
+    initial_state  the object assigned to window.__INITIAL_STATE__
+
+Parsed with lxml (C parser, no DOM rendering). Turning these into product
+rows is the scraper's job – see SmartScraper._static_scrape.
+"""
+
+import json
+import os
+
+import requests
+from lxml import html as lxml_html
+
+from backend.agent_core import fetch_policy
+
+
+STATIC_FETCH_TIMEOUT = float(os.environ.get("STATIC_FETCH_TIMEOUT", "20"))
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+_decoder = json.JSONDecoder()
+
+
+def new_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    return session
+
+
+def fetch(url: str, session: requests.Session) -> str | None:
+    """Page HTML, or None for non-200 / non-HTML responses."""
+    r = fetch_policy.get(url, session=session, timeout=STATIC_FETCH_TIMEOUT)
+    if r.status_code != 200 or "html" not in r.headers.get("content-type", ""):
+        return None
+    return r.text
+
+
+def _assigned_object(text: str, marker: str):
+    """The JSON object literal assigned after `marker` in a script, if any."""
+    idx = text.find(marker)
+    if idx < 0:
+        return None
+    start = text.find("{", idx + len(marker))
+    if start < 0 or "=" not in text[idx + len(marker):start]:
+        return None
+    try:
+        obj, _ = _decoder.raw_decode(text, start)
+        return obj
+    except ValueError:
+        return None
+
+
+def embedded_data(page_html: str) -> dict:
+    out = {"json_ld": [], "next_data": None, "initial_state": None}
+    if not page_html or not page_html.strip():
+        return out
+    doc = lxml_html.fromstring(page_html)
+
+    for text in doc.xpath('//script[@type="application/ld+json"]/text()'):
+        try:
+            out["json_ld"].append(json.loads(text))
+        except ValueError:
+            continue
+
+    for text in doc.xpath('//script[@id="__NEXT_DATA__"]/text()'):
+        try:
+            out["next_data"] = json.loads(text)
+            break
+        except ValueError:
+            continue
+
+    for text in doc.xpath("//script[not(@src)]/text()"):
+        if "__INITIAL_STATE__" in text:
+            state = _assigned_object(text, "__INITIAL_STATE__")
+            if state is not None:
+                out["initial_state"] = state
+                break
+
+    return out
@@ -0,0 +1,131 @@
+"""
+strategy_memory.py – remembers which extraction strategy worked per source.
+
+Fetchers with a cascade of strategies (SmartScraper: static HTML → browser;
+run_agent_v3: API → API discovery → crawl → DOM) run it through
+StrategyMemory.run(). The strategy that won last time for a source is tried
+first; the rest keep their default order behind it.
+
+An attempt is accepted when it returns products and at least
+STRATEGY_DROP_RATIO of the source's last accepted count. A winner that fails
+or drops below that is demoted for this run and the cascade continues; if
+nothing is accepted, the attempt with the most products is returned and
+becomes the new winner (the catalogue really did shrink). A run where every
+strategy came back empty (outage, bot wall, open circuit) keeps the winner –
+only its `failures` count grows.
+
+State lives in STRATEGY_MEMORY_FILE as
+    {source: {"winner", "products", "strategies": {name: {products, seconds, ok, failures, at}}}}
+Scan workers run in parallel, so a run's results are merged into what is on
+disk at save time – under an flock on STRATEGY_MEMORY_FILE.lock – and
+written with an atomic replace.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+
+
+STRATEGY_MEMORY_FILE = os.environ.get("STRATEGY_MEMORY_FILE", "memory/strategies.json")
+STRATEGY_DROP_RATIO = float(os.environ.get("STRATEGY_DROP_RATIO", "0.5"))
+
+
+class StrategyMemory:
+
+    def __init__(self, path: str = STRATEGY_MEMORY_FILE):
+        self.path = path
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)     # released when the file closes
+            yield
+
+    def _save_run(self, source: str, attempts: dict, winner: str | None, products: int):
+        """Merge one run's attempts into the stored entry for `source`."""
+        try:
+            with self._locked():
+                # Re-read under the lock so other workers' updates are kept
+                state = self._load()
+                entry = state.get(source) or {"winner": None, "products": 0, "strategies": {}}
+                for name, attempt in attempts.items():
+                    prev = entry["strategies"].get(name, {})
+                    attempt["failures"] = 0 if attempt["ok"] else prev.get("failures", 0) + 1
+                    entry["strategies"][name] = attempt
+                if winner:
+                    entry["winner"] = winner
+                    entry["products"] = products
+                state[source] = entry
+
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(state, f, indent=2)
+                os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"  ⚠️  Could not save strategy memory: {e}")
+
+    def order(self, source: str, names: list[str]) -> list[str]:
+        """`names` with the remembered winner for `source` moved to the front."""
+        winner = self._load().get(source, {}).get("winner")
+        if winner in names:
+            return [winner] + [n for n in names if n != winner]
+        return list(names)
+
+    def run(self, source: str, strategies: list[tuple]) -> tuple[str | None, list]:
+        """
+        Run (name, fn) strategies for `source` in remembered order until one
+        is accepted. Returns (strategy name, rows); (None, []) if all came
+        back empty.
+        """
+        entry = self._load().get(source) or {"winner": None, "products": 0, "strategies": {}}
+        funcs = dict(strategies)
+        names = self.order(source, [name for name, _ in strategies])
+        if entry["winner"] in funcs:
+            print(f"  🧠 Strategy memory: trying '{entry['winner']}' first")
+
+        baseline = entry.get("products") or 0
+        attempts = {}
+        best_name, best_rows = None, []
+        for name in names:
+            t0 = time.perf_counter()
+            try:
+                rows = funcs[name]() or []
+            except Exception as e:
+                print(f"  ⚠️  Strategy '{name}' failed: {e}")
+                rows = []
+            seconds = time.perf_counter() - t0
+
+            accepted = bool(rows) and len(rows) >= STRATEGY_DROP_RATIO * baseline
+            attempts[name] = {
+                "products": len(rows),
+                "seconds": round(seconds, 2),
+                "ok": accepted,
+                "at": datetime.now().isoformat(),
+            }
+            if len(rows) > len(best_rows):
+                best_name, best_rows = name, rows
+            if accepted:
+                break
+            if name == entry["winner"]:
+                print(f"  🧠 Demoting '{name}': {len(rows)} products (last {baseline})")
+
+        # An accepted attempt always has the most rows (the others were empty
+        # or below the drop threshold), so the best attempt is the winner.
+        self._save_run(source, attempts, best_name, len(best_rows))
+        return best_name, best_rows
@@ -0,0 +1,163 @@
+"""
+tracing.py – lightweight span tracing for agent runs.
+
+    tracer = Tracer()
+    with tracer.activate():
+        with span("scrape", source="Woohoo") as sp:
+            ...
+            sp.count("products", len(rows))
+            sp.add_bytes(len(body))
+    digest["profile"] = tracer.profile()
+
+Spans nest through a contextvar, so parsers deep inside SmartScraper can open
+spans without a tracer being passed down. With no active tracer span() is a
+no-op, so the instrumented code runs unchanged from scripts and benchmarks.
+
+Don't open spans inside Playwright event callbacks (page.on("response")) –
+they run outside the caller's context. Accumulate into the enclosing span
+after the fact instead.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+
+_tracer: ContextVar = ContextVar("ci_agent_tracer", default=None)
+_parent: ContextVar = ContextVar("ci_agent_span", default=None)
+
+
+class Span:
+
+    __slots__ = ("name", "attrs", "start", "end", "counts", "bytes", "error", "children")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+        self.counts = {}
+        self.bytes = 0
+        self.error = None
+        self.children = []
+
+    def count(self, key: str, n: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def add_bytes(self, n: int):
+        self.bytes += n
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self, t0: float) -> dict:
+        out = {
+            "name":        self.name,
+            "start_ms":    round((self.start - t0) * 1000, 1),
+            "duration_ms": round(self.duration_ms, 1),
+        }
+        if self.attrs:
+            out["attrs"] = self.attrs
+        if self.counts:
+            out["counts"] = self.counts
+        if self.bytes:
+            out["bytes"] = self.bytes
+        if self.error:
+            out["error"] = self.error
+        if self.children:
+            out["children"] = [c.to_dict(t0) for c in self.children]
+        return out
+
+
+class _NullSpan:
+
+    def count(self, key, n=1):
+        pass
+
+    def add_bytes(self, n):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat()
+        self.t0 = time.perf_counter()
+        self.roots: list[Span] = []
+
+    @contextmanager
+    def activate(self):
+        token = _tracer.set(self)
+        try:
+            yield self
+        finally:
+            _tracer.reset(token)
+
+    def _walk(self, spans):
+        for sp in spans:
+            yield sp
+            yield from self._walk(sp.children)
+
+    def summary(self) -> dict:
+        """Per span name: calls, total/max duration, summed counts and bytes."""
+        out = {}
+        for sp in self._walk(self.roots):
+            s = out.setdefault(sp.name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            d = sp.duration_ms
+            s["calls"] += 1
+            s["total_ms"] = round(s["total_ms"] + d, 1)
+            s["max_ms"] = round(max(s["max_ms"], d), 1)
+            if sp.bytes:
+                s["bytes"] = s.get("bytes", 0) + sp.bytes
+            for k, v in sp.counts.items():
+                s.setdefault("counts", {})
+                s["counts"][k] = s["counts"].get(k, 0) + v
+            if sp.error:
+                s["errors"] = s.get("errors", 0) + 1
+        return out
+
+    def profile(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "total_ms":   round((time.perf_counter() - self.t0) * 1000, 1),
+            "summary":    self.summary(),
+            "spans":      [sp.to_dict(self.t0) for sp in self.roots],
+        }
+
+
+@contextmanager
+def span(name: str, **attrs):
+    tracer = _tracer.get()
+    if tracer is None:
+        yield _NULL_SPAN
+        return
+
+    parent = _parent.get()
+    sp = Span(name, attrs)
+    (parent.children if parent else tracer.roots).append(sp)
+    token = _parent.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.error = type(e).__name__
+        raise
+    finally:
+        sp.end = time.perf_counter()
+        _parent.reset(token)
+
+
+def current_span():
+    """The innermost open span (or a no-op span outside a traced run)."""
+    return _parent.get() or _NULL_SPAN
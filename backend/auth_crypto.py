@@ -0,0 +1,88 @@
+"""
+auth_crypto.py – bcrypt hashing/verification off the event loop.
+
+bcrypt is deliberately slow (~100-300 ms per call at the default cost), so
+running it inside an async handler stalls every other request on the worker.
+Calls here go to a dedicated, bounded thread pool; bcrypt releases the GIL
+while hashing, so the loop keeps serving /api/health, dashboard polls, etc.
+
+crypto_stats() reports how long calls waited for a free thread (queue time)
+and how long the hash itself took, so pool saturation is visible.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+
+AUTH_CRYPTO_WORKERS = int(os.environ.get("AUTH_CRYPTO_WORKERS", "4"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor = ThreadPoolExecutor(
+    max_workers=AUTH_CRYPTO_WORKERS, thread_name_prefix="auth-crypto"
+)
+
+_lock  = threading.Lock()
+_stats = {
+    "calls":          0,
+    "in_flight":      0,
+    "queue_time_sum": 0.0,
+    "queue_time_max": 0.0,
+    "run_time_sum":   0.0,
+    "run_time_max":   0.0,
+}
+
+
+async def _run(fn, *args):
+    enqueued = time.perf_counter()
+    with _lock:
+        _stats["in_flight"] += 1
+
+    def job():
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            queued, ran = started - enqueued, finished - started
+            with _lock:
+                _stats["calls"] += 1
+                _stats["in_flight"] -= 1
+                _stats["queue_time_sum"] += queued
+                _stats["queue_time_max"] = max(_stats["queue_time_max"], queued)
+                _stats["run_time_sum"] += ran
+                _stats["run_time_max"] = max(_stats["run_time_max"], ran)
+
+    return await asyncio.get_running_loop().run_in_executor(_executor, job)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run(pwd_context.verify, password, hashed)
+
+
+def crypto_stats() -> dict:
+    with _lock:
+        s = dict(_stats)
+    calls = s["calls"] or 1
+    return {
+        "workers":          AUTH_CRYPTO_WORKERS,
+        "calls":            s["calls"],
+        "in_flight":        s["in_flight"],
+        "queue_time_avg_ms": round(s["queue_time_sum"] / calls * 1000, 2),
+        "queue_time_max_ms": round(s["queue_time_max"] * 1000, 2),
+        "run_time_avg_ms":   round(s["run_time_sum"] / calls * 1000, 2),
+        "run_time_max_ms":   round(s["run_time_max"] * 1000, 2),
+    }
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
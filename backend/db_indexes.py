@@ -0,0 +1,91 @@
+"""
+db_indexes.py – MongoDB index declarations and the query shapes they serve.
+
+INDEXES is created at server startup (see server_v2.lifespan). QUERY_SHAPES
+mirrors every find/count the API issues; check_query_plans.py runs explain()
+on each one and fails if any of them falls back to a COLLSCAN. When adding a
+new query to the API, add its shape here too.
+"""
+
+from bson import ObjectId
+
+
+# collection → [(keys, options)]
+INDEXES = {
+    "users": [
+        ([("email", 1)], {"unique": True}),
+    ],
+    "competitors": [
+        ([("user_id", 1)], {}),
+    ],
+    "reports": [
+        # latest/count of successful reports
+        ([("user_id", 1), ("status", 1), ("created_at", -1)], {}),
+        # report history listing
+        ([("user_id", 1), ("created_at", -1)], {}),
+    ],
+    "scan_jobs": [
+        # at most one queued/running scan per user
+        ([("user_id", 1)], {"unique": True, "name": "one_active_scan_per_user",
+                            "partialFilterExpression": {"active": True}}),
+        ([("status", 1), ("created_at", 1)], {}),
+        ([("user_id", 1), ("created_at", -1)], {}),
+    ],
+    "scrape_cache": [
+        ([("url", 1), ("window", 1)], {"unique": True}),
+        ([("url", 1), ("scraped_at", -1)], {}),
+        ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+    "scan_events": [
+        ([("job_id", 1), ("seq", 1)], {"unique": True}),
+        ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+    "source_schedule": [
+        ([("next_due_at", 1)], {}),
+    ],
+}
+
+
+_UID = "000000000000000000000000"
+_OID = ObjectId(_UID)
+
+# Every query the API runs, with representative values.
+QUERY_SHAPES = [
+    {"name": "login / register lookup", "collection": "users",
+     "filter": {"email": "user@example.com"}},
+    {"name": "auth/me",                 "collection": "users",
+     "filter": {"_id": _OID}},
+    {"name": "list competitors",        "collection": "competitors",
+     "filter": {"user_id": _UID}},
+    {"name": "competitor by id",        "collection": "competitors",
+     "filter": {"_id": _OID, "user_id": _UID}},
+    {"name": "list reports",            "collection": "reports",
+     "filter": {"user_id": _UID}, "sort": [("created_at", -1)],
+     "projection": {"digest": 0}, "limit": 20},
+    {"name": "latest report",           "collection": "reports",
+     "filter": {"user_id": _UID, "status": "success"}, "sort": [("created_at", -1)],
+     "limit": 1},
+    {"name": "count reports",           "collection": "reports",
+     "filter": {"user_id": _UID, "status": "success"}},
+    {"name": "report by id",            "collection": "reports",
+     "filter": {"_id": _OID, "user_id": _UID}},
+    {"name": "dashboard stats",         "collection": "dashboard_stats",
+     "filter": {"_id": _UID}},
+    {"name": "claim scan job",          "collection": "scan_jobs",
+     "filter": {"status": "queued"}, "sort": [("created_at", 1)], "limit": 1},
+    {"name": "active scan for user",    "collection": "scan_jobs",
+     "filter": {"user_id": _UID, "active": True}},
+    {"name": "list scan jobs",          "collection": "scan_jobs",
+     "filter": {"user_id": _UID}, "sort": [("created_at", -1)], "limit": 20},
+    {"name": "scan job by id",          "collection": "scan_jobs",
+     "filter": {"_id": _OID, "user_id": _UID}},
+    {"name": "scan events since seq",   "collection": "scan_events",
+     "filter": {"job_id": _UID, "seq": {"$gt": 0}}, "sort": [("seq", 1)], "limit": 100},
+]
+
+
+async def ensure_indexes(db):
+    """Create every declared index (no-op for ones that already exist)."""
+    for coll, specs in INDEXES.items():
+        for keys, opts in specs:
+            await db[coll].create_index(keys, **opts)
@@ -0,0 +1,240 @@
+"""
+metrics.py – Prometheus text-format metrics for the API server and scans.
+
+Served at GET /metrics by server_v2. Instruments:
+
+  ci_http_request_duration_seconds   per method / route template / status
+  ci_scan_job_duration_seconds       whole scan jobs, per final status
+  ci_source_scrape_duration_seconds  one source scrape, per domain and path
+                                     (scan = inside a user's scan job,
+                                      scheduled = scheduler phase 1)
+  ci_products_extracted_total        rows produced per domain and path
+  ci_parser_fallback_total           parser fallbacks taken (dom_fallback,
+                                     Flipkart target URLs past the first)
+  ci_llm_request_duration_seconds    insight LLM calls, per model / outcome
+  ci_scrape_cache_lookups_total      shared scrape cache hit/miss in scan jobs
+  ci_cache_hits_total / _misses_total in-process TTL caches (token, user,
+                                     dashboard stats)
+
+Scan workers are separate processes, so nothing is recorded there: every
+scan's digest carries a tracing profile (agent_core/tracing.py) and the
+parent folds it in with observe_profile() once the job returns.
+
+Metrics live in process memory – run one scrape target per server process.
+Sources are labelled by domain rather than competitor name to keep label
+cardinality bounded.
+"""
+
+import threading
+from urllib.parse import urlparse
+
+
+_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_SCAN_BUCKETS     = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+def _fmt_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (),
+                 buckets: tuple = _DURATION_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: dict[tuple, list] = {}    # key → [bucket counts…, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(series[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class _CacheCounter:
+    """Counter read from registered TTLCache instances at scrape time."""
+
+    kind = "counter"
+    labels = ("cache",)
+
+    def __init__(self, name: str, help: str, attr: str):
+        self.name = name
+        self.help = help
+        self.attr = attr
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_fmt_labels(self.labels, (name,))} {getattr(cache, self.attr)}"
+            for name, cache in sorted(_caches.items())
+        ]
+
+
+# ──────────────────────────────────────────────────────────────
+# INSTRUMENTS
+# ──────────────────────────────────────────────────────────────
+
+HTTP_LATENCY = Histogram(
+    "ci_http_request_duration_seconds", "API request latency",
+    ("method", "route", "status"),
+)
+SCAN_JOB_DURATION = Histogram(
+    "ci_scan_job_duration_seconds", "Scan job wall time from claim to finish",
+    ("status",), buckets=_SCAN_BUCKETS,
+)
+SOURCE_SCRAPE_DURATION = Histogram(
+    "ci_source_scrape_duration_seconds", "Time to scrape one source",
+    ("source", "path"), buckets=_SCAN_BUCKETS,
+)
+PRODUCTS_EXTRACTED = Counter(
+    "ci_products_extracted_total", "Product rows extracted from sources",
+    ("source", "path"),
+)
+PARSER_FALLBACKS = Counter(
+    "ci_parser_fallback_total", "Parser fallbacks taken",
+    ("parser", "step"),
+)
+LLM_LATENCY = Histogram(
+    "ci_llm_request_duration_seconds", "Insight LLM call latency",
+    ("model", "outcome"), buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+STATIC_TIER_RESULTS = Counter(
+    "ci_static_tier_total", "Static-HTML scrape attempts (hit, or escalated to a browser)",
+    ("parser", "result"),
+)
+SCRAPE_CACHE_LOOKUPS = Counter(
+    "ci_scrape_cache_lookups_total", "Shared scrape cache lookups by scan jobs",
+    ("result",),
+)
+
+_caches: dict = {}
+
+_METRICS = [
+    HTTP_LATENCY, SCAN_JOB_DURATION, SOURCE_SCRAPE_DURATION, PRODUCTS_EXTRACTED,
+    PARSER_FALLBACKS, STATIC_TIER_RESULTS, LLM_LATENCY, SCRAPE_CACHE_LOOKUPS,
+    _CacheCounter("ci_cache_hits_total", "In-process cache hits", "hits"),
+    _CacheCounter("ci_cache_misses_total", "In-process cache misses", "misses"),
+]
+
+
+def register_cache(name: str, cache):
+    """Export hit/miss counts of a TTLCache under cache=<name>."""
+    _caches[name] = cache
+
+
+def source_label(url: str | None) -> str:
+    return urlparse(url or "").netloc.lower().removeprefix("www.") or "unknown"
+
+
+def observe_scrape(url: str, seconds: float, products: int, path: str):
+    source = source_label(url)
+    SOURCE_SCRAPE_DURATION.observe(seconds, source=source, path=path)
+    PRODUCTS_EXTRACTED.inc(products, source=source, path=path)
+
+
+def observe_profile(profile: dict | None):
+    """Fold a scan's tracing profile (digest["profile"]) into the metrics."""
+    if not profile:
+        return
+    for sp in profile.get("spans", []):
+        _observe_span(sp, parser=None)
+
+
+def _observe_span(sp: dict, parser: str | None):
+    name = sp.get("name")
+    attrs = sp.get("attrs", {})
+    seconds = sp.get("duration_ms", 0) / 1000
+
+    if name == "scrape":
+        if attrs.get("cached"):
+            SCRAPE_CACHE_LOOKUPS.inc(result="hit")
+        else:
+            SCRAPE_CACHE_LOOKUPS.inc(result="miss")
+            observe_scrape(attrs.get("url"), seconds,
+                           sp.get("counts", {}).get("products", 0), path="scan")
+    elif name == "parser":
+        parser = attrs.get("parser")
+        probes = [c for c in sp.get("children", []) if c.get("name") == "probe_url"]
+        if len(probes) > 1:
+            PARSER_FALLBACKS.inc(len(probes) - 1, parser=parser, step="next_target_url")
+    elif name == "static_tier":
+        STATIC_TIER_RESULTS.inc(parser=attrs.get("parser", "unknown"),
+                                result=attrs.get("result", "escalated"))
+    elif name == "dom_fallback":
+        PARSER_FALLBACKS.inc(parser=parser or "unknown", step="dom_fallback")
+    elif name == "llm_call":
+        LLM_LATENCY.observe(seconds, model=attrs.get("model", ""),
+                            outcome="error" if sp.get("error") else "ok")
+
+    for child in sp.get("children", []):
+        _observe_span(child, parser)
+
+
+def render() -> str:
+    lines = []
+    for m in _METRICS:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
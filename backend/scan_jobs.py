@@ -0,0 +1,458 @@
+"""
+scan_jobs.py – persisted scan job queue with a bounded process worker pool.
+
+A scan is a document in the `scan_jobs` collection:
+
+    queued → running → done | error | cancelled
+
+* At most one queued/running job per user: active jobs carry `active: true`
+  and a partial unique index on user_id rejects a second one, so a repeated
+  POST /api/reports/run returns the job already in flight.
+* ScanWorkerPool claims queued jobs atomically (find_one_and_update, so
+  several server processes can share one queue) and runs each scan in its
+  own spawned process, at most SCAN_WORKERS at a time. One task per child
+  means every scan starts with a fresh Chromium and a clean heap.
+* The worker process turns the orchestrator's structured events into
+  `scan_events` documents (numbered per job by `event_seq`) and a progress
+  summary on the job, and checks `cancel_requested` at every event;
+  cancelling a running scan takes effect once the stage in flight finishes.
+  GET /api/scans/{id}/events streams those events to the browser (SSE);
+  every job ends with a `job_finished` event.
+* Jobs queued with a `scrape_window` read their sources from the shared
+  scrape cache (backend/scrape_cache.py) and only scrape URLs missing there.
+  ScanWorkerPool.scrape() fills that cache on the same process pool.
+* While a job runs, its server touches `updated_at` every
+  SCAN_HEARTBEAT_INTERVAL seconds; a running job that goes quiet for
+  SCAN_STALE_MINUTES lost its server and is failed by the next sweep, which
+  releases the user's active slot.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from backend import metrics
+from backend.scrape_cache import load_rows_sync
+from backend.stats_store import refresh_user_stats
+
+
+SCAN_WORKERS       = int(os.environ.get("SCAN_WORKERS", "2"))
+SCAN_POLL_INTERVAL = float(os.environ.get("SCAN_POLL_INTERVAL", "2"))
+# A running job whose document hasn't been touched for this long belongs to
+# a server that died mid-scan (live jobs heartbeat far more often).
+SCAN_STALE_AFTER   = timedelta(minutes=int(os.environ.get("SCAN_STALE_MINUTES", "5")))
+SCAN_HEARTBEAT_INTERVAL = float(os.environ.get("SCAN_HEARTBEAT_INTERVAL", "30"))
+SCAN_EVENTS_TTL    = timedelta(days=int(os.environ.get("SCAN_EVENTS_TTL_DAYS", "7")))
+# How often the dispatcher sweeps for orphaned running jobs
+SCAN_EXPIRE_INTERVAL = float(os.environ.get("SCAN_EXPIRE_INTERVAL", "60"))
+
+
+class ScanCancelled(Exception):
+    """Raised inside a worker when its job was cancelled between stages."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _event_update(event: str, data: dict) -> dict:
+    """Job update that bumps event_seq and mirrors the event into `progress`."""
+    progress = {"stage": event}
+    for k in ("done", "total", "source"):
+        if k in data:
+            progress[k] = data[k]
+    return {"$set": {"updated_at": _now(), **{f"progress.{k}": v for k, v in progress.items()}},
+            "$inc": {"event_seq": 1}}
+
+
+def _event_doc(job_id: str, seq: int, event: str, data: dict) -> dict:
+    now = datetime.now(timezone.utc)
+    return {"job_id": job_id, "seq": seq, "event": event, "data": data,
+            "ts": now.isoformat(), "expires_at": now + SCAN_EVENTS_TTL}
+
+
+# ──────────────────────────────────────────────────────────────
+# SHARED SCAN HELPERS (server + scheduler)
+# ──────────────────────────────────────────────────────────────
+
+def build_scan_config(comps: list[dict]) -> dict | None:
+    """Orchestrator config from a user's competitor documents (None without a baseline)."""
+    baseline = next((c for c in comps if c.get("is_baseline")), None)
+    if not baseline:
+        return None
+    return {
+        "baseline": {"name": baseline["name"], "url": baseline["website"]},
+        "competitors": [
+            {"name": c["name"], "url": c["website"]}
+            for c in comps if not c.get("is_baseline")
+        ],
+    }
+
+
+async def save_scan_report(db, user_id: str, digest: dict) -> dict:
+    """Store a successful scan, stamp competitors and refresh dashboard stats."""
+    total_changes = (digest.get("changes") or {}).get("total", 0)
+    all_missing = sum(
+        len(c.get("diff", {}).get("missing", []))
+        for c in digest.get("competitors", [])
+    )
+
+    report = {
+        "user_id":       user_id,
+        "status":        "success",
+        "report_date":   datetime.now(timezone.utc).strftime("%B %d, %Y • %H:%M"),
+        "changes_count": total_changes,
+        "gaps_count":    all_missing,
+        "digest":        digest,
+        "created_at":    _now(),
+    }
+    await db.reports.insert_one(report)
+    await refresh_user_stats(db, user_id, latest_report=report)
+
+    await db.competitors.update_many(
+        {"user_id": user_id},
+        {"$set": {"last_checked": datetime.now(timezone.utc).strftime("%b %d, %I:%M %p")}}
+    )
+    return report
+
+
+async def save_scan_error(db, user_id: str, error: str):
+    await db.reports.insert_one({
+        "user_id":    user_id,
+        "status":     "error",
+        "error":      error,
+        "created_at": _now(),
+    })
+
+
+# ──────────────────────────────────────────────────────────────
+# WORKER PROCESS
+# ──────────────────────────────────────────────────────────────
+
+def _scrape_in_worker(url: str) -> list[dict]:
+    """Scrape one source inside a spawned worker process."""
+    from backend.agent_core.smart_scraper import SmartScraper
+    return SmartScraper().scrape(url)
+
+
+def _run_in_worker(job_id: str, config: dict, mongo_url: str, db_name: str,
+                   scrape_window: str | None = None) -> dict:
+    """Entry point inside the spawned worker process."""
+    from pymongo import MongoClient
+    from backend.agent_core.orchestrator_v2 import CIAgentOrchestrator
+
+    client = MongoClient(mongo_url)
+    jobs = client[db_name].scan_jobs
+    events = client[db_name].scan_events
+    oid = ObjectId(job_id)
+
+    prefetched = {}
+    if scrape_window:
+        urls = [config["baseline"]["url"]] + [c["url"] for c in config["competitors"]]
+        prefetched = load_rows_sync(client[db_name], urls, scrape_window)
+
+    def on_event(event: str, data: dict):
+        job = jobs.find_one_and_update(
+            {"_id": oid}, _event_update(event, data),
+            projection={"cancel_requested": 1, "event_seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not job:
+            return
+        events.insert_one(_event_doc(job_id, job["event_seq"], event, data))
+        if job.get("cancel_requested"):
+            raise ScanCancelled(event)
+
+    try:
+        return CIAgentOrchestrator(config, on_event=on_event, prefetched=prefetched).run()
+    finally:
+        client.close()
+
+
+# ──────────────────────────────────────────────────────────────
+# POOL
+# ──────────────────────────────────────────────────────────────
+
+class ScanWorkerPool:
+
+    def __init__(self, db, mongo_url: str, db_name: str, workers: int = SCAN_WORKERS):
+        self.db = db
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = None
+        self._dispatcher = None
+        self._running: dict[str, asyncio.Task] = {}
+        self._wake = asyncio.Event()
+
+    # ── lifecycle ─────────────────────────────────────────────
+
+    async def start(self):
+        await self._expire_stale()
+        self._executor = self._new_executor()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        print(f"🧵 Scan worker pool started – {self.workers} worker process(es)")
+
+    async def stop(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+        in_flight = list(self._running)
+        for task in list(self._running.values()):
+            task.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        # Their tasks are gone: release the jobs so the users can scan again
+        for jid in in_flight:
+            await self._abandon(jid, "Server stopped")
+        print("🧵 Scan worker pool stopped")
+
+    async def _abandon(self, job_id: str, error: str):
+        """Fail a job this process can no longer finish; its worker stops at the next event."""
+        res = await self.db.scan_jobs.update_one(
+            {"_id": ObjectId(job_id), "status": {"$in": ["queued", "running"]}},
+            {"$set": {"status": "error", "error": error, "cancel_requested": True,
+                      "finished_at": _now(), "updated_at": _now()},
+             "$unset": {"active": ""}},
+        )
+        if res.modified_count:
+            await self._publish(job_id, "job_finished", {"status": "error", "error": error})
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1,
+        )
+
+    async def _expire_stale(self):
+        cutoff = (datetime.now(timezone.utc) - SCAN_STALE_AFTER).isoformat()
+        own = [ObjectId(jid) for jid in self._running]
+        res = await self.db.scan_jobs.update_many(
+            {"status": "running", "updated_at": {"$lt": cutoff}, "_id": {"$nin": own}},
+            {"$set": {"status": "error", "error": "Worker lost", "finished_at": _now()},
+             "$unset": {"active": ""}},
+        )
+        if res.modified_count:
+            print(f"  ⚠️  Marked {res.modified_count} orphaned scan job(s) as failed")
+
+    # ── public API ────────────────────────────────────────────
+
+    async def enqueue(self, user_id: str, trigger: str = "api",
+                      scrape_window: str | None = None) -> tuple[dict, bool]:
+        """Queue a scan. Returns (job, created); created=False means deduplicated."""
+        job = {
+            "user_id":          user_id,
+            "status":           "queued",
+            "active":           True,
+            "trigger":          trigger,
+            "scrape_window":    scrape_window,
+            "progress":         {"stage": "queued", "done": 0, "total": 0},
+            "event_seq":        0,
+            "cancel_requested": False,
+            "created_at":       _now(),
+            "updated_at":       _now(),
+        }
+        for _ in range(3):
+            try:
+                await self.db.scan_jobs.insert_one(job)
+                self._wake.set()
+                return job, True
+            except DuplicateKeyError:
+                existing = await self.db.scan_jobs.find_one({"user_id": user_id, "active": True})
+                if existing:
+                    return existing, False
+                job.pop("_id", None)   # the active job finished in between – retry
+        raise RuntimeError("Could not enqueue scan")
+
+    async def cancel(self, job_id: str, user_id: str) -> dict | None:
+        oid = ObjectId(job_id)
+        job = await self.db.scan_jobs.find_one_and_update(
+            {"_id": oid, "user_id": user_id, "status": "queued"},
+            {"$set": {"status": "cancelled", "finished_at": _now(), "updated_at": _now()},
+             "$unset": {"active": ""}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job:
+            await self._publish(job_id, "job_finished", {"status": "cancelled"})
+            return job
+        job = await self.db.scan_jobs.find_one_and_update(
+            {"_id": oid, "user_id": user_id, "status": "running"},
+            {"$set": {"cancel_requested": True, "updated_at": _now()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job:
+            return job
+        return await self.db.scan_jobs.find_one({"_id": oid, "user_id": user_id})
+
+    async def wait(self, job_id: str) -> dict | None:
+        """Block until a job leaves queued/running; returns its final document."""
+        oid = ObjectId(job_id)
+        while True:
+            job = await self.db.scan_jobs.find_one({"_id": oid})
+            if job is None or job["status"] not in ("queued", "running"):
+                return job
+            await asyncio.sleep(SCAN_POLL_INTERVAL)
+
+    async def scrape(self, url: str) -> list[dict]:
+        """Scrape a single URL on the worker pool (no job document)."""
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, _scrape_in_worker, url
+            )
+        except BrokenProcessPool:
+            if self._executor is executor:
+                self._executor = self._new_executor()
+            raise
+
+    # ── dispatch ──────────────────────────────────────────────
+
+    async def _dispatch_loop(self):
+        last_expiry = time.monotonic()
+        while True:
+            try:
+                # Jobs orphaned by another server (or before our start-up
+                # sweep counted them as stale) are picked up here
+                if time.monotonic() - last_expiry >= SCAN_EXPIRE_INTERVAL:
+                    last_expiry = time.monotonic()
+                    await self._expire_stale()
+                while len(self._running) < self.workers:
+                    job = await self._claim()
+                    if not job:
+                        break
+                    jid = str(job["_id"])
+                    task = asyncio.create_task(self._execute(job))
+                    self._running[jid] = task
+                    task.add_done_callback(lambda _t, jid=jid: self._on_done(jid))
+            except Exception as e:
+                print(f"  ❌ Scan dispatcher error: {e}")
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), SCAN_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_done(self, job_id: str):
+        self._running.pop(job_id, None)
+        self._wake.set()
+
+    async def _claim(self) -> dict | None:
+        return await self.db.scan_jobs.find_one_and_update(
+            {"status": "queued"},
+            {"$set": {
+                "status":     "running",
+                "worker":     self.worker_id,
+                "started_at": _now(),
+                "updated_at": _now(),
+            }},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _execute(self, job: dict):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            status = await self._run_job(job)
+        finally:
+            metrics.SCAN_JOB_DURATION.observe(time.perf_counter() - started, status=status)
+
+    async def _run_job(self, job: dict) -> str:
+        """Run one claimed job to completion; returns its final status."""
+        jid = str(job["_id"])
+        heartbeat = asyncio.create_task(self._heartbeat(jid))
+        try:
+            return await self._run_scan(job)
+        except Exception as e:
+            # Anything outside the worker (DB, report saving, _finish itself):
+            # never leave the job running and holding the user's active slot
+            print(f"  ❌ Scan job {jid} crashed: {e}")
+            try:
+                await self._abandon(jid, str(e))
+            except Exception as release_error:
+                print(f"  ⚠️  Could not release scan job {jid}: {release_error}")
+            return "error"
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        """Keep a running job's updated_at fresh so sweeps know its server is alive."""
+        while True:
+            await asyncio.sleep(SCAN_HEARTBEAT_INTERVAL)
+            try:
+                await self.db.scan_jobs.update_one(
+                    {"_id": ObjectId(job_id), "status": "running"},
+                    {"$set": {"updated_at": _now()}},
+                )
+            except Exception as e:
+                print(f"  ⚠️  Scan job heartbeat failed: {e}")
+
+    async def _run_scan(self, job: dict) -> str:
+        jid, user_id = str(job["_id"]), job["user_id"]
+        print(f"\n🚀 Running scan job {jid} for user {user_id}")
+        await self._publish(jid, "job_started", {"trigger": job.get("trigger")})
+
+        comps = await self.db.competitors.find({"user_id": user_id}).to_list(100)
+        config = build_scan_config(comps) if comps else None
+        if config is None:
+            reason = "No baseline configured" if comps else "No competitors configured"
+            print(f"  ⚠️  {reason}")
+            await self._finish(jid, "error", error=reason)
+            return "error"
+
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            digest = await loop.run_in_executor(
+                executor, _run_in_worker, jid, config,
+                self.mongo_url, self.db_name, job.get("scrape_window"),
+            )
+        except ScanCancelled:
+            print(f"  🛑 Scan job {jid} cancelled")
+            await self._finish(jid, "cancelled")
+            return "cancelled"
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                # A worker died (OOM, Chromium crash) – the pool is unusable.
+                self._executor = self._new_executor()
+            print(f"  ❌ Scan failed: {e}")
+            await save_scan_error(self.db, user_id, str(e))
+            await self._finish(jid, "error", error=str(e))
+            return "error"
+
+        metrics.observe_profile(digest.get("profile"))
+        report = await save_scan_report(self.db, user_id, digest)
+        await self._finish(jid, "done", report_id=str(report["_id"]))
+        print(f"  ✅ Scan job {jid} saved to DB")
+        return "done"
+
+    async def _finish(self, job_id: str, status: str, **fields):
+        await self.db.scan_jobs.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"status": status, "finished_at": _now(), "updated_at": _now(), **fields},
+             "$unset": {"active": ""}},
+        )
+        await self._publish(job_id, "job_finished", {"status": status, **fields})
+
+    async def _publish(self, job_id: str, event: str, data: dict):
+        job = await self.db.scan_jobs.find_one_and_update(
+            {"_id": ObjectId(job_id)}, {"$inc": {"event_seq": 1}},
+            projection={"event_seq": 1}, return_document=ReturnDocument.AFTER,
+        )
+        if job:
+            await self.db.scan_events.insert_one(_event_doc(job_id, job["event_seq"], event, data))
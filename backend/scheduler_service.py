@@ -1,101 +1,394 @@
 """
 scheduler_service.py – APScheduler integration for the FastAPI backend.
 
-Runs the CI agent every 24 hours automatically.
-Import this in server_v2.py lifespan to activate.
+Runs the CI agent for every user once a day, in two phases on the server's
+ScanWorkerPool (backend/scan_jobs.py):
 
-Usage in lifespan:
+  1. Collect the distinct source URLs across all users and scrape each one
+     once per window into the shared scrape cache (backend/scrape_cache.py),
+     so N users tracking M sites cost M scrapes instead of N×M.
+  2. Queue one scan job per user that runs matching, change detection and
+     insights from the cached rows.
+
+  * SCHEDULE_CONCURRENCY caps how many scrapes / user scans run at once.
+  * SCHEDULE_DOMAIN_CONCURRENCY caps concurrent scrapes of the same site and
+    SCHEDULE_DOMAIN_INTERVAL spaces out their starts.
+  * Each run is recorded in `scan_runs` with its makespan, phase timings and
+    per-source / per-user wait and run times.
+
+SCHEDULE_MODE=adaptive replaces the single daily spike with a tick every
+ADAPTIVE_TICK_MINUTES. Every scrape is diffed against the previous one with
+ChangeDetectorV2 and folded into a per-source EWMA change rate
+(`source_schedule`); volatile sources come due every ADAPTIVE_MIN_HOURS,
+stable ones every ADAPTIVE_MAX_HOURS, with jitter spreading them over the
+day. A tick scrapes only due sources and rescans only users tracking a
+source that changed, reading everything else from the latest cached rows.
+A failing source backs off instead: due again after two ticks, doubling per
+consecutive failure up to ADAPTIVE_MAX_HOURS.
+
+Enabled from server_v2.py lifespan when SCHEDULER_ENABLED=1:
     from backend.scheduler_service import start_scheduler, stop_scheduler
-    start_scheduler(db)
+    start_scheduler(db, scan_pool)
     ...
     stop_scheduler()
 """
 
 import asyncio
-import json
 import os
-from datetime import datetime, timezone
+import random
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
+from urllib.parse import urlparse
+
+from backend import metrics
+from backend.agent_core.change_detector_v2 import ChangeDetectorV2
+from backend.scan_jobs import SCAN_WORKERS, build_scan_config
+from backend.scrape_cache import LATEST, cached_urls, current_window, latest_rows, store_rows
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 
-_scheduler = AsyncIOScheduler()
+SCHEDULE_CONCURRENCY        = int(os.environ.get("SCHEDULE_CONCURRENCY", str(SCAN_WORKERS)))
+SCHEDULE_DOMAIN_CONCURRENCY = int(os.environ.get("SCHEDULE_DOMAIN_CONCURRENCY", "2"))
+SCHEDULE_DOMAIN_INTERVAL    = float(os.environ.get("SCHEDULE_DOMAIN_INTERVAL", "30"))
+
+# "daily" (one 09:00 UTC run) or "adaptive" (per-source cadence)
+SCHEDULE_MODE          = os.environ.get("SCHEDULE_MODE", "daily")
+ADAPTIVE_TICK_MINUTES  = int(os.environ.get("ADAPTIVE_TICK_MINUTES", "15"))
+ADAPTIVE_MIN_HOURS     = float(os.environ.get("ADAPTIVE_MIN_HOURS", "2"))
+ADAPTIVE_MAX_HOURS     = float(os.environ.get("ADAPTIVE_MAX_HOURS", "48"))
+ADAPTIVE_ALPHA         = 0.3    # EWMA weight of the latest observation
+ADAPTIVE_INITIAL_RATE  = 0.5    # new sources start at a ~10h cadence
+
+_scheduler = None       # created by start_scheduler (APScheduler is imported there)
 _db = None
+_pool = None
 
 
-async def _run_all_users_scan():
-    """Scan all users' configured competitors."""
-    if _db is None:
-        return
+def _domain(url: str) -> str:
+    netloc = urlparse(url or "").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
 
-    print(f"\n🕐 Scheduled scan starting at {datetime.now(timezone.utc).isoformat()}")
 
+class DomainLimiter:
+    """Per-domain concurrency cap plus a minimum gap between scan starts."""
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.min_interval = min_interval
+        self._sems = defaultdict(lambda: asyncio.Semaphore(concurrency))
+        self._next_start = defaultdict(float)
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def hold(self, domains: set[str]):
+        acquired = []
+        try:
+            # Fixed order so two scans sharing domains can't deadlock
+            for d in sorted(domains):
+                await self._sems[d].acquire()
+                acquired.append(d)
+
+            loop = asyncio.get_running_loop()
+            async with self._lock:
+                now = loop.time()
+                start = max([now] + [self._next_start[d] for d in domains])
+                for d in domains:
+                    self._next_start[d] = start + self.min_interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+        finally:
+            for d in acquired:
+                self._sems[d].release()
+
+
+async def _load_configs() -> dict[str, dict]:
+    """user_id → orchestrator config for every user with a baseline."""
     # Get all unique user IDs with competitors
     cursor = _db.competitors.aggregate([
         {"$group": {"_id": "$user_id"}}
     ])
     user_ids = [doc["_id"] async for doc in cursor]
 
-    print(f"  👥 Running scans for {len(user_ids)} user(s)")
-
+    configs = {}
     for user_id in user_ids:
-        try:
-            await _scan_user(user_id)
-        except Exception as e:
-            print(f"  ❌ Scan failed for user {user_id}: {e}")
+        comps = await _db.competitors.find({"user_id": user_id}).to_list(100)
+        config = build_scan_config(comps)
+        if config is None:
+            print(f"  ⚠️  No baseline for user {user_id}")
+            continue
+        configs[user_id] = config
+    return configs
+
+
+def _config_urls(config: dict) -> list[str]:
+    urls = [config["baseline"]["url"]] + [c["url"] for c in config["competitors"]]
+    return [u for u in urls if u]
 
 
-async def _scan_user(user_id: str):
-    comps = await _db.competitors.find({"user_id": user_id}).to_list(100)
-    if not comps:
+async def _run_all_users_scan():
+    """Daily mode: scrape every distinct source once, then scan all users."""
+    if _db is None or _pool is None:
         return
 
-    baseline = next((c for c in comps if c.get("is_baseline")), None)
-    competitors = [c for c in comps if not c.get("is_baseline")]
+    started_at = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    print(f"\n🕐 Scheduled scan starting at {started_at.isoformat()}")
+
+    configs = await _load_configs()
+    global_slots = asyncio.Semaphore(SCHEDULE_CONCURRENCY)
+
+    # ── Phase 1: scrape each distinct source once ────────────
+    window = current_window()
+    urls = sorted({u for cfg in configs.values() for u in _config_urls(cfg)})
+    fresh = await cached_urls(_db, urls, window)
+    todo = [u for u in urls if u not in fresh]
+    print(f"  🌐 {len(urls)} distinct source(s) across {len(configs)} user(s) – "
+          f"{len(fresh)} already cached, scraping {len(todo)}")
+
+    scrapes = await _scrape_sources(todo, window, global_slots)
+    scrape_s = time.perf_counter() - t0
 
-    if not baseline:
-        print(f"  ⚠️  No baseline for user {user_id}")
+    # ── Phase 2: per-user match / changes / insights from cache ──
+    results = await _scan_users(list(configs), window, global_slots)
+
+    await _record_run("daily_scan", started_at, t0, scrape_s, window, urls, scrapes, results)
+
+
+async def _run_due_sources():
+    """
+    Adaptive mode tick: scrape only sources whose next_due_at has passed,
+    then rescan the users tracking a source that actually changed.
+    """
+    if _db is None or _pool is None:
         return
 
-    config = {
-        "baseline": {"name": baseline["name"], "url": baseline["website"]},
-        "competitors": [{"name": c["name"], "url": c["website"]} for c in competitors],
+    started_at = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+
+    configs = await _load_configs()
+    urls = sorted({u for cfg in configs.values() for u in _config_urls(cfg)})
+
+    known = {
+        doc["_id"]: doc
+        async for doc in _db.source_schedule.find({"_id": {"$in": urls}})
     }
+    now = started_at.isoformat()
+    due = [u for u in urls if u not in known or known[u].get("next_due_at", "") <= now]
+    if not due:
+        return
+
+    print(f"\n🕐 Adaptive tick {now} – {len(due)}/{len(urls)} source(s) due")
+    global_slots = asyncio.Semaphore(SCHEDULE_CONCURRENCY)
+    scrapes = await _scrape_sources(due, current_window(), global_slots)
+    scrape_s = time.perf_counter() - t0
+
+    changed = {s["url"] for s in scrapes if s["status"] == "done" and s.get("changed")}
+    users = [uid for uid, cfg in configs.items() if changed & set(_config_urls(cfg))]
+    if users:
+        print(f"  🔁 {len(changed)} source(s) changed – rescanning {len(users)} user(s)")
+    results = await _scan_users(users, LATEST, global_slots)
 
-    loop = asyncio.get_event_loop()
+    await _record_run("adaptive_tick", started_at, t0, scrape_s, LATEST, due, scrapes, results)
 
-    from backend.agent_core.orchestrator_v2 import CIAgentOrchestrator
-    digest = await loop.run_in_executor(
-        None, lambda: CIAgentOrchestrator(config).run()
+
+async def _record_run(trigger, started_at, t0, scrape_s, window, urls, scrapes, results):
+    makespan = time.perf_counter() - t0
+    succeeded = sum(1 for r in results if r["status"] == "done")
+    await _db.scan_runs.insert_one({
+        "trigger":     trigger,
+        "window":      window,
+        "started_at":  started_at.isoformat(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "makespan_s":  round(makespan, 1),
+        "scrape_phase_s": round(scrape_s, 1),
+        "users":       len(results),
+        "sources":     len(urls),
+        "scraped":     len(scrapes),
+        "succeeded":   succeeded,
+        "failed":      len(results) - succeeded,
+        "concurrency": SCHEDULE_CONCURRENCY,
+        "domain_concurrency": SCHEDULE_DOMAIN_CONCURRENCY,
+        "source_scrapes": scrapes,
+        "scans":       results,
+    })
+    print(f"🕐 {trigger} finished – {succeeded}/{len(results)} scan(s) succeeded, "
+          f"{len(scrapes)} scrape(s), makespan {makespan / 60:.1f} min")
+
+
+# ──────────────────────────────────────────────────────────────
+# PHASES
+# ──────────────────────────────────────────────────────────────
+
+async def _scrape_sources(urls: list[str], window: str,
+                          global_slots: asyncio.Semaphore) -> list[dict]:
+    limiter = DomainLimiter(SCHEDULE_DOMAIN_CONCURRENCY, SCHEDULE_DOMAIN_INTERVAL)
+    return await asyncio.gather(
+        *(_scrape_source(url, window, global_slots, limiter) for url in urls)
     )
 
-    total_changes = (digest.get("changes") or {}).get("total", 0)
-    all_missing = sum(
-        len(c.get("diff", {}).get("missing", []))
-        for c in digest.get("competitors", [])
+
+async def _scrape_source(url: str, window: str, global_slots: asyncio.Semaphore,
+                         limiter: DomainLimiter) -> dict:
+    t_wait = time.perf_counter()
+    async with limiter.hold({_domain(url)}), global_slots:
+        waited = time.perf_counter() - t_wait
+        t_run = time.perf_counter()
+        try:
+            products = await _pool.scrape(url)
+        except Exception as e:
+            # Not cached – user jobs fall back to scraping this URL themselves
+            print(f"  ❌ Scrape failed for {url}: {e}")
+            failures = await _track_failure(url, str(e))
+            return {"url": url, "status": "error", "error": str(e),
+                    "failures": failures, "wait_s": round(waited, 1)}
+        ran = time.perf_counter() - t_run
+        metrics.observe_scrape(url, ran, len(products), path="scheduled")
+
+    previous = await latest_rows(_db, url)
+    await store_rows(_db, url, window, products, ran)
+    n_changes = await _track_changes(url, products, previous)
+    print(f"  📦 {url[:60]} – {len(products)} products in {ran:.0f}s, {n_changes} change(s)")
+    return {"url": url, "status": "done", "products": len(products),
+            "changes": n_changes, "changed": previous is None or n_changes > 0,
+            "wait_s": round(waited, 1), "run_s": round(ran, 1)}
+
+
+async def _scan_users(user_ids: list[str], window: str,
+                      global_slots: asyncio.Semaphore) -> list[dict]:
+    async def guarded(user_id):
+        try:
+            return await _scan_user(user_id, window, global_slots)
+        except Exception as e:
+            print(f"  ❌ Scan failed for user {user_id}: {e}")
+            return {"user_id": user_id, "status": "error", "error": str(e)}
+
+    return await asyncio.gather(*(guarded(u) for u in user_ids))
+
+
+async def _scan_user(user_id: str, window: str, global_slots: asyncio.Semaphore) -> dict:
+    t_wait = time.perf_counter()
+    async with global_slots:
+        waited = time.perf_counter() - t_wait
+        t_run = time.perf_counter()
+        job, _ = await _pool.enqueue(user_id, trigger="schedule", scrape_window=window)
+        job = await _pool.wait(str(job["_id"]))
+        ran = time.perf_counter() - t_run
+
+    status = (job or {}).get("status", "error")
+    print(f"  {'✅' if status == 'done' else '❌'} Scan {status} for user {user_id} "
+          f"(waited {waited:.0f}s, ran {ran:.0f}s)")
+    return {
+        "user_id":   user_id,
+        "job_id":    str(job["_id"]) if job else None,
+        "status":    status,
+        "wait_s":    round(waited, 1),
+        "run_s":     round(ran, 1),
+    }
+
+
+# ──────────────────────────────────────────────────────────────
+# CHANGE-RATE TRACKING
+# ──────────────────────────────────────────────────────────────
+
+def _interval_hours(change_rate: float) -> float:
+    """Geometric blend: rate 0 → ADAPTIVE_MAX_HOURS, rate 1 → ADAPTIVE_MIN_HOURS."""
+    rate = min(max(change_rate, 0.0), 1.0)
+    return ADAPTIVE_MAX_HOURS * (ADAPTIVE_MIN_HOURS / ADAPTIVE_MAX_HOURS) ** rate
+
+
+def _failure_backoff_hours(failures: int) -> float:
+    """Retry delay after `failures` consecutive failed scrapes: 2 ticks, doubling, capped."""
+    return min(ADAPTIVE_TICK_MINUTES / 60 * 2 ** failures, ADAPTIVE_MAX_HOURS)
+
+
+async def _track_changes(url: str, products: list[dict], previous: list[dict] | None) -> int:
+    """
+    Diff a fresh scrape against the previous one with ChangeDetectorV2 and
+    fold "did anything change" into the source's EWMA change rate, which
+    sets when it is next due in adaptive mode.
+    """
+    if previous is None:
+        n_changes = 0
+    else:
+        result = ChangeDetectorV2().detect(
+            {"competitors": [{"name": url, "products": products}]},
+            {"competitors": [{"name": url, "products": previous}]},
+        )
+        n_changes = result.get("total", 0)
+
+    doc = await _db.source_schedule.find_one({"_id": url}) or {}
+    if previous is None:
+        rate = doc.get("change_rate", ADAPTIVE_INITIAL_RATE)
+    else:
+        observed = 1.0 if n_changes else 0.0
+        rate = ADAPTIVE_ALPHA * observed + (1 - ADAPTIVE_ALPHA) * doc.get("change_rate", ADAPTIVE_INITIAL_RATE)
+
+    # Jitter spreads sources that share a cadence across the day
+    interval = _interval_hours(rate) * random.uniform(0.85, 1.15)
+    now = datetime.now(timezone.utc)
+    await _db.source_schedule.update_one(
+        {"_id": url},
+        {"$set": {
+            "change_rate":    round(rate, 4),
+            "interval_hours": round(interval, 2),
+            "last_scraped_at": now.isoformat(),
+            "last_changes":   n_changes,
+            "next_due_at":    (now + timedelta(hours=interval)).isoformat(),
+            "consecutive_failures": 0,
+        },
+         "$inc": {"scrapes": 1, "changed_scrapes": 1 if n_changes else 0}},
+        upsert=True,
     )
+    return n_changes
 
-    await _db.reports.insert_one({
-        "user_id":       user_id,
-        "status":        "success",
-        "report_date":   datetime.now(timezone.utc).strftime("%B %d, %Y • %H:%M"),
-        "changes_count": total_changes,
-        "gaps_count":    all_missing,
-        "digest":        digest,
-        "created_at":    datetime.now(timezone.utc).isoformat(),
-    })
 
-    await _db.competitors.update_many(
-        {"user_id": user_id},
-        {"$set": {"last_checked": datetime.now(timezone.utc).strftime("%b %d, %I:%M %p")}}
+async def _track_failure(url: str, error: str) -> int:
+    """
+    Record a failed scrape and push the source's next_due_at out with
+    exponential backoff, so a broken source isn't retried every tick.
+    Returns the consecutive failure count.
+    """
+    doc = await _db.source_schedule.find_one({"_id": url}) or {}
+    failures = doc.get("consecutive_failures", 0) + 1
+    now = datetime.now(timezone.utc)
+    await _db.source_schedule.update_one(
+        {"_id": url},
+        {"$set": {
+            "consecutive_failures": failures,
+            "last_failed_at": now.isoformat(),
+            "last_error":     error[:500],
+            "next_due_at":    (now + timedelta(hours=_failure_backoff_hours(failures))).isoformat(),
+        },
+         "$inc": {"failed_scrapes": 1}},
+        upsert=True,
     )
+    return failures
 
-    print(f"  ✅ Scan complete for user {user_id} – {total_changes} changes, {all_missing} gaps")
 
+def start_scheduler(db_instance, scan_pool):
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
 
-def start_scheduler(db_instance):
-    global _db
+    global _db, _pool, _scheduler
     _db = db_instance
+    _pool = scan_pool
+    _scheduler = AsyncIOScheduler()
+
+    if SCHEDULE_MODE == "adaptive":
+        _scheduler.add_job(
+            _run_due_sources,
+            IntervalTrigger(minutes=ADAPTIVE_TICK_MINUTES),
+            id="adaptive_scan",
+            name="Adaptive Competitive Intelligence Scan",
+            replace_existing=True,
+            max_instances=1,
+        )
+        _scheduler.start()
+        print(f"⏰ Scheduler started – adaptive mode, checking due sources every "
+              f"{ADAPTIVE_TICK_MINUTES} min ({ADAPTIVE_MIN_HOURS:g}–{ADAPTIVE_MAX_HOURS:g}h cadence)")
+        return
 
     # Run daily at 9 AM UTC (2:30 PM IST)
     _scheduler.add_job(
@@ -111,6 +404,6 @@ def start_scheduler(db_instance):
 
 
 def stop_scheduler():
-    if _scheduler.running:
+    if _scheduler and _scheduler.running:
         _scheduler.shutdown()
-        print("⏰ Scheduler stopped")
\ No newline at end of file
+        print("⏰ Scheduler stopped")
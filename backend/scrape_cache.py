@@ -0,0 +1,82 @@
+"""
+scrape_cache.py – shared product rows per source URL and scrape window.
+
+Many users track the same sites (KStore, Woohoo, Flipkart gift cards), so the
+scheduler scrapes every distinct URL once per window, stores the cleaned rows
+here and lets each user's scan job read them instead of launching its own
+browser. Documents expire SCRAPE_CACHE_TTL_DAYS after they were written.
+
+Jobs may also ask for LATEST instead of a window: the most recent rows per
+URL whatever window they were scraped in (adaptive scheduling refreshes
+sources on their own cadence, so there is no single shared window).
+
+Async helpers take a Motor database (server/scheduler); load_rows_sync takes
+a PyMongo database (scan worker processes).
+"""
+
+import os
+import time
+from datetime import datetime, timezone, timedelta
+
+
+SCRAPE_WINDOW_HOURS   = float(os.environ.get("SCRAPE_WINDOW_HOURS", "24"))
+SCRAPE_CACHE_TTL_DAYS = int(os.environ.get("SCRAPE_CACHE_TTL_DAYS", "3"))
+
+LATEST = "latest"
+
+
+def current_window(now: float | None = None) -> str:
+    """Start of the window containing `now`, as a UTC ISO timestamp."""
+    size = SCRAPE_WINDOW_HOURS * 3600
+    start = int((now or time.time()) // size * size)
+    return datetime.fromtimestamp(start, timezone.utc).isoformat()
+
+
+async def cached_urls(db, urls: list[str], window: str) -> set[str]:
+    cursor = db.scrape_cache.find(
+        {"window": window, "url": {"$in": list(urls)}}, {"url": 1}
+    )
+    return {doc["url"] async for doc in cursor}
+
+
+async def store_rows(db, url: str, window: str, products: list[dict], duration_s: float):
+    now = datetime.now(timezone.utc)
+    await db.scrape_cache.update_one(
+        {"url": url, "window": window},
+        {"$set": {
+            "products":      products,
+            "product_count": len(products),
+            "duration_s":    round(duration_s, 1),
+            "scraped_at":    now.isoformat(),
+            "expires_at":    now + timedelta(days=SCRAPE_CACHE_TTL_DAYS),
+        }},
+        upsert=True,
+    )
+
+
+async def latest_rows(db, url: str) -> list[dict] | None:
+    """Most recently scraped rows for a URL, or None if it was never cached."""
+    doc = await db.scrape_cache.find_one(
+        {"url": url}, {"products": 1}, sort=[("scraped_at", -1)]
+    )
+    return doc.get("products", []) if doc else None
+
+
+def load_rows_sync(db, urls: list[str], window: str) -> dict[str, list[dict]]:
+    """url → products for every URL cached in `window` (missing URLs are absent)."""
+    if window == LATEST:
+        out = {}
+        for url in urls:
+            doc = db.scrape_cache.find_one(
+                {"url": url}, {"products": 1}, sort=[("scraped_at", -1)]
+            )
+            if doc:
+                out[url] = doc.get("products", [])
+        return out
+    return {
+        doc["url"]: doc.get("products", [])
+        for doc in db.scrape_cache.find(
+            {"window": window, "url": {"$in": list(urls)}},
+            {"url": 1, "products": 1},
+        )
+    }
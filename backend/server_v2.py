@@ -5,36 +5,52 @@ Endpoints:
   POST /api/auth/register
   POST /api/auth/login
   GET  /api/auth/me
+  PUT  /api/auth/me
 
   GET    /api/competitors
   POST   /api/competitors
   PUT    /api/competitors/:id
   DELETE /api/competitors/:id
 
-  POST /api/reports/run        (triggers background scan)
+  POST /api/reports/run        (queues a scan job)
   GET  /api/reports            (list reports)
   GET  /api/reports/latest     (latest report JSON)
+  GET  /api/reports/:id/profile (per-stage timings of that scan)
   GET  /api/dashboard/stats
 
+  GET  /api/scans              (recent scan jobs)
+  GET  /api/scans/:id          (job status + progress)
+  GET  /api/scans/:id/events   (Server-Sent Events progress stream)
+  POST /api/scans/:id/cancel
+
   GET  /api/health
+  GET  /metrics                (Prometheus text format)
 """
 
 import os
 import json
+import time
 import asyncio
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
 from jose import jwt, JWTError
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
 
+from backend import auth_crypto, metrics
+from backend.db_indexes import ensure_indexes
+from backend.scan_jobs import ScanWorkerPool
+from backend.scheduler_service import start_scheduler, stop_scheduler
+from backend.stats_store import get_user_stats, refresh_competitor_counts
+from backend.ttl_cache import TTLCache
+
 # ──────────────────────────────────────────────────────────────
 # CONFIG
 # ──────────────────────────────────────────────────────────────
@@ -43,11 +59,22 @@ MONGO_URL  = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME    = "competitive_intelligence"
 JWT_SECRET = os.environ.get("JWT_SECRET", "ci_agent_2026_secret_key")
 
+# Run the daily scan from this process (enable on exactly one replica)
+SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "0") == "1"
+
+# /api/auth/me profile cache lifetime. Invalidation on PUT /api/auth/me only
+# reaches the worker that served it: with several uvicorn workers / replicas
+# the others serve the old profile for up to this long.
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "60"))
+SSE_POLL_INTERVAL = float(os.environ.get("SSE_POLL_INTERVAL", "1"))
+SSE_KEEPALIVE     = 15   # seconds between comment pings on an idle stream
+
 INTELLIGENCE_DATA_DIR = "intelligence_data"
 REPORTS_DIR           = "reports"
 
-client = None
-db     = None
+client    = None
+db        = None
+scan_pool = None
 
 
 # ──────────────────────────────────────────────────────────────
@@ -56,16 +83,24 @@ db     = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global client, db
+    global client, db, scan_pool
     try:
         client = AsyncIOMotorClient(MONGO_URL)
         db = client[DB_NAME]
         await client.admin.command("ping")
         print("✅ MongoDB connected")
-        await db.users.create_index("email", unique=True)
+        await ensure_indexes(db)
+        scan_pool = ScanWorkerPool(db, MONGO_URL, DB_NAME)
+        await scan_pool.start()
+        if SCHEDULER_ENABLED:
+            start_scheduler(db, scan_pool)
     except Exception as e:
         print(f"❌ MongoDB failed: {e}")
     yield
+    stop_scheduler()
+    if scan_pool:
+        await scan_pool.stop()
+    auth_crypto.shutdown()
     if client:
         client.close()
 
@@ -80,8 +115,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-security    = HTTPBearer()
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path, so ids don't explode cardinality.
+        # Streaming responses (SSE) are timed until their headers are sent.
+        route = request.scope.get("route")
+        metrics.HTTP_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
+security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 # ──────────────────────────────────────────────────────────────
@@ -97,6 +152,9 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+class UserUpdate(BaseModel):
+    name: str
+
 class PageMonitor(BaseModel):
     name: str = "Homepage"
     url: Optional[str] = None
@@ -126,14 +184,43 @@ def create_token(user_id: str, email: str) -> str:
         JWT_SECRET, algorithm="HS256"
     )
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> dict:
+# Both caches are per process. Verified tokens, each cached until its own
+# `exp`, so repeated polling with the same bearer token skips the HMAC check
+# and claim parsing – safe in every worker, since a token's claims never change.
+_token_cache = TTLCache(ttl=3600, maxsize=10_000)
+# Public user profiles for /api/auth/me. A profile update invalidates only this
+# process's copy; other workers catch up within USER_CACHE_TTL.
+_user_cache  = TTLCache(ttl=USER_CACHE_TTL, maxsize=10_000)
+metrics.register_cache("token", _token_cache)
+metrics.register_cache("user", _user_cache)
+
+def _verify_token(token: str) -> dict:
+    cu = _token_cache.get(token)
+    if cu is not None:
+        return dict(cu)
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=["HS256"])
-        return {"id": payload["sub"], "email": payload["email"]}
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    cu = {"id": payload["sub"], "email": payload["email"]}
+    _token_cache.set(token, cu, ttl=payload["exp"] - time.time())
+    return dict(cu)
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    return _verify_token(credentials.credentials)
+
+async def get_stream_user(
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> dict:
+    """Like get_current_user, but also accepts ?token= (EventSource can't set headers)."""
+    if credentials:
+        return _verify_token(credentials.credentials)
+    if token:
+        return _verify_token(token)
+    raise HTTPException(status_code=401, detail="Not authenticated")
 
 
 # ──────────────────────────────────────────────────────────────
@@ -148,7 +235,7 @@ async def register(user: UserRegister):
     res = await db.users.insert_one({
         "name": user.name,
         "email": email,
-        "password": pwd_context.hash(user.password),
+        "password": await auth_crypto.hash_password(user.password),
         "created_at": datetime.now(timezone.utc).isoformat(),
     })
     uid = str(res.inserted_id)
@@ -162,7 +249,7 @@ async def register(user: UserRegister):
 async def login(user: UserLogin):
     email = user.email.lower()
     u = await db.users.find_one({"email": email})
-    if not u or not pwd_context.verify(user.password, u["password"]):
+    if not u or not await auth_crypto.verify_password(user.password, u["password"]):
         raise HTTPException(401, "Invalid credentials")
     uid = str(u["_id"])
     return {
@@ -173,10 +260,25 @@ async def login(user: UserLogin):
 
 @app.get("/api/auth/me")
 async def get_me(cu: dict = Depends(get_current_user)):
-    u = await db.users.find_one({"_id": ObjectId(cu["id"])})
+    profile = _user_cache.get(cu["id"])
+    if profile is not None:
+        return profile
+    u = await db.users.find_one({"_id": ObjectId(cu["id"])}, {"password": 0})
     if not u:
         raise HTTPException(404, "User not found")
-    return {"id": str(u["_id"]), "name": u["name"], "email": u["email"]}
+    profile = {"id": str(u["_id"]), "name": u["name"], "email": u["email"]}
+    _user_cache.set(cu["id"], profile)
+    return profile
+
+@app.put("/api/auth/me")
+async def update_me(update: UserUpdate, cu: dict = Depends(get_current_user)):
+    res = await db.users.update_one(
+        {"_id": ObjectId(cu["id"])}, {"$set": {"name": update.name}}
+    )
+    _user_cache.pop(cu["id"])
+    if res.matched_count == 0:
+        raise HTTPException(404, "User not found")
+    return await get_me(cu)
 
 
 # ──────────────────────────────────────────────────────────────
@@ -203,6 +305,7 @@ async def create_competitor(comp: CompetitorCreate, cu: dict = Depends(get_curre
     doc["status"]  = "active"
     doc["last_checked"] = None
     res = await db.competitors.insert_one(doc)
+    await refresh_competitor_counts(db, cu["id"])
     doc["id"] = str(res.inserted_id)
     doc.pop("_id", None)
     return doc
@@ -231,94 +334,105 @@ async def delete_competitor(comp_id: str, cu: dict = Depends(get_current_user)):
     res = await db.competitors.delete_one({"_id": ObjectId(comp_id), "user_id": cu["id"]})
     if res.deleted_count == 0:
         raise HTTPException(404, "Competitor not found")
+    await refresh_competitor_counts(db, cu["id"])
     return {"deleted": True}
 
 
 # ──────────────────────────────────────────────────────────────
-# SCAN ENGINE
+# SCAN JOBS  (queue + worker pool in backend/scan_jobs.py)
 # ──────────────────────────────────────────────────────────────
 
-async def _run_scan(user_id: str):
-    """Background task: build config from DB, run orchestrator, save report."""
-    print(f"\n🚀 Running scan for user {user_id}")
-
-    comps = await db.competitors.find({"user_id": user_id}).to_list(100)
-    if not comps:
-        print("  ⚠️  No competitors configured")
-        return
-
-    baseline = next((c for c in comps if c.get("is_baseline")), None)
-    competitors = [c for c in comps if not c.get("is_baseline")]
-
-    if not baseline:
-        print("  ⚠️  No baseline configured")
-        return
-
-    # Build config dict
-    config = {
-        "baseline": {
-            "name": baseline["name"],
-            "url": baseline["website"],
-        },
-        "competitors": [
-            {"name": c["name"], "url": c["website"]}
-            for c in competitors
-        ],
+@app.post("/api/reports/run")
+async def run_scan(cu: dict = Depends(get_current_user)):
+    job, created = await scan_pool.enqueue(cu["id"])
+    return {
+        "status":  job["status"],
+        "job_id":  str(job["_id"]),
+        "message": "Scan queued" if created else "A scan is already in progress",
     }
 
-    # Run agent in executor to avoid blocking event loop
-    loop = asyncio.get_event_loop()
-    try:
-        from backend.agent_core.orchestrator_v2 import CIAgentOrchestrator
-        digest = await loop.run_in_executor(
-            None, lambda: CIAgentOrchestrator(config).run()
-        )
-    except Exception as e:
-        print(f"  ❌ Scan failed: {e}")
-        await db.reports.insert_one({
-            "user_id": user_id,
-            "status": "error",
-            "error": str(e),
-            "created_at": datetime.now(timezone.utc).isoformat(),
-        })
-        return
-
-    # Build summary
-    total_changes = (digest.get("changes") or {}).get("total", 0)
-    all_missing = sum(
-        len(c.get("diff", {}).get("missing", []))
-        for c in digest.get("competitors", [])
-    )
 
-    # Save to DB
-    await db.reports.insert_one({
-        "user_id":       user_id,
-        "status":        "success",
-        "report_date":   datetime.now(timezone.utc).strftime("%B %d, %Y • %H:%M"),
-        "changes_count": total_changes,
-        "gaps_count":    all_missing,
-        "digest":        digest,
-        "created_at":    datetime.now(timezone.utc).isoformat(),
-    })
+@app.get("/api/scans")
+async def list_scans(cu: dict = Depends(get_current_user)):
+    docs = await db.scan_jobs.find(
+        {"user_id": cu["id"]}
+    ).sort("created_at", -1).to_list(20)
+    return [_ser(d) for d in docs]
 
-    # Update last_checked on all competitors
-    await db.competitors.update_many(
-        {"user_id": user_id},
-        {"$set": {"last_checked": datetime.now(timezone.utc).strftime("%b %d, %I:%M %p")}}
+
+@app.get("/api/scans/{job_id}")
+async def get_scan(job_id: str, cu: dict = Depends(get_current_user)):
+    doc = await db.scan_jobs.find_one({"_id": ObjectId(job_id), "user_id": cu["id"]})
+    if not doc:
+        raise HTTPException(404, "Scan job not found")
+    return _ser(doc)
+
+
+@app.get("/api/scans/{job_id}/events")
+async def stream_scan_events(job_id: str, request: Request,
+                             cu: dict = Depends(get_stream_user)):
+    job = await db.scan_jobs.find_one(
+        {"_id": ObjectId(job_id), "user_id": cu["id"]}, {"status": 1}
     )
+    if not job:
+        raise HTTPException(404, "Scan job not found")
 
-    print(f"  ✅ Scan saved to DB")
+    try:
+        last_seq = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        last_seq = 0
+
+    async def events():
+        nonlocal last_seq
+        idle = 0.0
+        while not await request.is_disconnected():
+            docs = await db.scan_events.find(
+                {"job_id": job_id, "seq": {"$gt": last_seq}}
+            ).sort("seq", 1).to_list(100)
+
+            for d in docs:
+                last_seq = d["seq"]
+                yield (f"id: {d['seq']}\nevent: {d['event']}\n"
+                       f"data: {json.dumps(d['data'], default=str)}\n\n")
+                if d["event"] == "job_finished":
+                    return
+
+            if docs:
+                idle = 0.0
+                continue
+
+            # Jobs expired as orphaned never get a job_finished event
+            state = await db.scan_jobs.find_one({"_id": ObjectId(job_id)}, {"status": 1})
+            if not state or state["status"] not in ("queued", "running"):
+                status = state["status"] if state else "unknown"
+                yield f"event: job_finished\ndata: {json.dumps({'status': status})}\n\n"
+                return
+
+            idle += SSE_POLL_INTERVAL
+            if idle >= SSE_KEEPALIVE:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@app.post("/api/reports/run")
-async def run_scan(
-    background_tasks: BackgroundTasks,
-    cu: dict = Depends(get_current_user),
-):
-    background_tasks.add_task(_run_scan, cu["id"])
-    return {"status": "started", "message": "Scan running in background"}
+@app.post("/api/scans/{job_id}/cancel")
+async def cancel_scan(job_id: str, cu: dict = Depends(get_current_user)):
+    doc = await scan_pool.cancel(job_id, cu["id"])
+    if not doc:
+        raise HTTPException(404, "Scan job not found")
+    return _ser(doc)
 
 
+# ──────────────────────────────────────────────────────────────
+# REPORTS
+# ──────────────────────────────────────────────────────────────
+
 @app.get("/api/reports")
 async def list_reports(cu: dict = Depends(get_current_user)):
     docs = await db.reports.find(
@@ -349,41 +463,29 @@ async def get_report(report_id: str, cu: dict = Depends(get_current_user)):
     return _ser(doc)
 
 
+@app.get("/api/reports/{report_id}/profile")
+async def get_report_profile(report_id: str, cu: dict = Depends(get_current_user)):
+    """Per-stage timings, counts and bytes recorded during the scan (see agent_core/tracing.py)."""
+    doc = await db.reports.find_one(
+        {"_id": ObjectId(report_id), "user_id": cu["id"]},
+        {"digest.profile": 1, "created_at": 1},
+    )
+    if not doc:
+        raise HTTPException(404, "Report not found")
+    profile = (doc.get("digest") or {}).get("profile")
+    if not profile:
+        raise HTTPException(404, "No profile recorded for this report")
+    return {"id": str(doc["_id"]), "created_at": doc.get("created_at"), "profile": profile}
+
+
 # ──────────────────────────────────────────────────────────────
 # DASHBOARD
 # ──────────────────────────────────────────────────────────────
 
 @app.get("/api/dashboard/stats")
 async def dashboard_stats(cu: dict = Depends(get_current_user)):
-    comp_count   = await db.competitors.count_documents({"user_id": cu["id"]})
-    report_count = await db.reports.count_documents({"user_id": cu["id"], "status": "success"})
-
-    latest = await db.reports.find_one(
-        {"user_id": cu["id"], "status": "success"},
-        sort=[("created_at", -1)]
-    )
-
-    changes_count = latest.get("changes_count", 0) if latest else 0
-    ai_insights   = ""
-
-    if latest and latest.get("digest"):
-        digest = latest["digest"]
-        for comp in digest.get("competitors", []):
-            insights = comp.get("insights", {})
-            if isinstance(insights, dict) and insights.get("summary"):
-                ai_insights += f"### {comp['name']}\n{insights['summary']}\n\n"
-                for rec in (insights.get("recommendations") or [])[:2]:
-                    ai_insights += f"- {rec}\n"
-                ai_insights += "\n"
-
-    return {
-        "competitors":       comp_count,
-        "reports":           report_count,
-        "active_monitors":   comp_count,
-        "changes_detected":  changes_count,
-        "last_scan":         latest.get("report_date") if latest else None,
-        "ai_insights":       ai_insights or "Run a scan to generate AI insights.",
-    }
+    # Materialised by the scan pipeline – see backend/stats_store.py
+    return await get_user_stats(db, cu["id"])
 
 
 # ──────────────────────────────────────────────────────────────
@@ -396,4 +498,10 @@ async def health():
         "status": "ok",
         "db": "connected" if db else "disconnected",
         "time": datetime.now(timezone.utc).isoformat(),
-    }
\ No newline at end of file
+        "auth_crypto": auth_crypto.crypto_stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,112 @@
+"""
+stats_store.py – materialised per-user dashboard stats.
+
+The scan pipeline rewrites one `dashboard_stats` document per user whenever a
+report is saved (and the competitor counts whenever competitors change), so
+GET /api/dashboard/stats is a single _id lookup instead of two
+count_documents calls plus a walk over the latest digest on every poll.
+
+An in-process TTL cache sits in front of the collection; writes made by this
+process invalidate it immediately, writes made elsewhere (scheduler, other
+server workers) show up within STATS_CACHE_TTL seconds.
+"""
+
+import os
+from datetime import datetime, timezone
+
+from backend import metrics
+from backend.ttl_cache import TTLCache
+
+
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", "15"))
+NO_INSIGHTS     = "Run a scan to generate AI insights."
+
+_cache = TTLCache(ttl=STATS_CACHE_TTL, maxsize=4096)
+metrics.register_cache("dashboard_stats", _cache)
+
+
+def summarise_insights(digest: dict | None) -> str:
+    """Markdown summary of each competitor's insights (top 2 recommendations)."""
+    out = ""
+    for comp in (digest or {}).get("competitors", []):
+        insights = comp.get("insights", {})
+        if isinstance(insights, dict) and insights.get("summary"):
+            out += f"### {comp['name']}\n{insights['summary']}\n\n"
+            for rec in (insights.get("recommendations") or [])[:2]:
+                out += f"- {rec}\n"
+            out += "\n"
+    return out
+
+
+def _public(doc: dict) -> dict:
+    return {
+        "competitors":      doc.get("competitors", 0),
+        "reports":          doc.get("reports", 0),
+        "active_monitors":  doc.get("active_monitors", 0),
+        "changes_detected": doc.get("changes_detected", 0),
+        "last_scan":        doc.get("last_scan"),
+        "ai_insights":      doc.get("ai_insights") or NO_INSIGHTS,
+    }
+
+
+async def refresh_user_stats(db, user_id: str, latest_report: dict | None = None) -> dict:
+    """
+    Recompute and store the full stats document for a user.
+
+    Pass the report that was just written as `latest_report` to avoid
+    re-reading its digest from the reports collection.
+    """
+    comp_count   = await db.competitors.count_documents({"user_id": user_id})
+    report_count = await db.reports.count_documents({"user_id": user_id, "status": "success"})
+
+    latest = latest_report
+    if latest is None:
+        latest = await db.reports.find_one(
+            {"user_id": user_id, "status": "success"},
+            sort=[("created_at", -1)]
+        )
+
+    doc = {
+        "competitors":      comp_count,
+        "reports":          report_count,
+        "active_monitors":  comp_count,
+        "changes_detected": latest.get("changes_count", 0) if latest else 0,
+        "last_scan":        latest.get("report_date") if latest else None,
+        "ai_insights":      summarise_insights(latest.get("digest")) if latest else "",
+        "updated_at":       datetime.now(timezone.utc).isoformat(),
+    }
+    await db.dashboard_stats.update_one({"_id": user_id}, {"$set": doc}, upsert=True)
+
+    stats = _public(doc)
+    _cache.set(user_id, stats)
+    return stats
+
+
+async def refresh_competitor_counts(db, user_id: str):
+    """Cheap partial refresh after competitor create/delete."""
+    comp_count = await db.competitors.count_documents({"user_id": user_id})
+    await db.dashboard_stats.update_one(
+        {"_id": user_id},
+        {"$set": {
+            "competitors":     comp_count,
+            "active_monitors": comp_count,
+            "updated_at":      datetime.now(timezone.utc).isoformat(),
+        }},
+        upsert=True,
+    )
+    _cache.pop(user_id)
+
+
+async def get_user_stats(db, user_id: str) -> dict:
+    stats = _cache.get(user_id)
+    if stats is not None:
+        return stats
+
+    doc = await db.dashboard_stats.find_one({"_id": user_id})
+    if doc is None or "reports" not in doc:
+        # First request for a user whose reports predate materialisation
+        return await refresh_user_stats(db, user_id)
+
+    stats = _public(doc)
+    _cache.set(user_id, stats)
+    return stats
@@ -0,0 +1,60 @@
+"""
+ttl_cache.py – small in-process TTL cache for hot API reads.
+
+Entries expire `ttl` seconds after they are written (or after a per-entry
+ttl passed to set()), and the cache holds at most `maxsize` entries,
+evicting the oldest write first. Not shared between processes – every
+server worker keeps its own copy, so callers must tolerate staleness of
+up to one TTL.
+
+`hits` / `misses` count get() outcomes (exported by backend/metrics.py).
+"""
+
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class TTLCache:
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()   # key → (deadline, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        deadline, value = entry
+        if deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic() + ttl, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
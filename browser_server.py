@@ -1,4 +1,3 @@
-import asyncio
 import json
 import logging
 from mcp.server.fastmcp import FastMCP
@@ -6,6 +5,8 @@ from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 import html2text
 
+from backend.agent_core import fetch_policy
+
 # --- ROBUST STEALTH IMPORT ---
 try:
     from playwright_stealth import stealth_async
@@ -44,28 +45,28 @@ async def get_page_content_safe(url, retries=3):
         page = await context.new_page()
         await stealth_async(page)
 
-        for attempt in range(retries):
-            try:
-                print(f"Attempt {attempt+1}: Navigating to {url}")
-                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                await page.wait_for_timeout(2000) # Human pause
-                
-                # Scroll down to trigger lazy-loading images/prices
-                await page.evaluate("window.scrollTo(0, document.body.scrollHeight / 2)")
-                await page.wait_for_timeout(1000)
-
-                content = await page.content()
-                await browser.close()
-                return content
-            except Exception as e:
-                print(f"Attempt {attempt+1} failed: {e}")
-                if attempt == retries - 1:
-                    await browser.close()
-                    raise e
-                await asyncio.sleep(2)
-        
-        await browser.close()
-        return None
+        async def attempt():
+            print(f"Navigating to {url}")
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            if response is not None and response.status in fetch_policy.RETRY_STATUSES:
+                raise fetch_policy.RetryableStatus(response, response.status)
+            await page.wait_for_timeout(2000) # Human pause
+
+            # Scroll down to trigger lazy-loading images/prices
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight / 2)")
+            await page.wait_for_timeout(1000)
+
+            return await page.content()
+
+        # Throttling, backoff between attempts and the per-domain circuit
+        # breaker come from the shared fetch policy
+        try:
+            return await fetch_policy.call_async(url, attempt, attempts=retries)
+        except fetch_policy.RetryableStatus:
+            # Still 429 / 5xx after the last attempt: hand back that page as-is
+            return await page.content()
+        finally:
+            await browser.close()
 
 def extract_universal_data(soup):
     """
@@ -0,0 +1,71 @@
+"""
+check_query_plans.py – verify every API query is served by an index.
+
+Creates the indexes declared in backend/db_indexes.py, runs explain() on each
+entry in QUERY_SHAPES and exits non-zero if any winning plan contains a
+COLLSCAN stage.
+
+Run: MONGO_URL=mongodb://localhost:27017 python check_query_plans.py [--db NAME]
+"""
+
+import argparse
+import os
+import sys
+
+from pymongo import MongoClient
+
+from backend.db_indexes import INDEXES, QUERY_SHAPES
+
+
+def _stages(plan) -> list[str]:
+    """Flatten every `stage` name found anywhere in an explain plan tree."""
+    found = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.append(plan["stage"])
+        for v in plan.values():
+            found.extend(_stages(v))
+    elif isinstance(plan, list):
+        for v in plan:
+            found.extend(_stages(v))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail on COLLSCAN query plans")
+    parser.add_argument("--db", default="competitive_intelligence", help="Database name")
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[args.db]
+
+    for coll, specs in INDEXES.items():
+        for keys, opts in specs:
+            db[coll].create_index(keys, **opts)
+
+    failures = 0
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"], shape.get("projection"))
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        if shape.get("limit"):
+            cursor = cursor.limit(shape["limit"])
+
+        winning = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = _stages(winning)
+        if "COLLSCAN" in stages:
+            failures += 1
+            print(f"❌ {shape['name']:<26} {shape['collection']}: {' → '.join(stages)}")
+        else:
+            print(f"✅ {shape['name']:<26} {shape['collection']}: {' → '.join(stages)}")
+
+    client.close()
+
+    if failures:
+        print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} scan a whole collection")
+        sys.exit(1)
+    print("\nAll API queries use an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ export default function Dashboard() {
   const [stats, setStats]       = useState(null);
   const [report, setReport]     = useState(null);
   const [scanning, setScanning] = useState(false);
+  const [progress, setProgress] = useState(null);
   const [loading, setLoading]   = useState(true);
   const [activeTab, setActiveTab] = useState("overview");
 
@@ -39,19 +40,31 @@ export default function Dashboard() {
 
   async function runScan() {
     setScanning(true);
+    setProgress(null);
     try {
-      await api.post("/reports/run");
-      // Poll every 5s for up to 3 min
-      let tries = 0;
-      const poll = setInterval(async () => {
-        tries++;
-        await loadData();
-        if (tries > 36) clearInterval(poll);
-      }, 5000);
-      setTimeout(() => {
-        clearInterval(poll);
+      const { data } = await api.post("/reports/run");
+      // Server pushes progress events until the job finishes – no polling
+      const token = localStorage.getItem("token");
+      const stream = new EventSource(
+        `${api.defaults.baseURL}/scans/${data.job_id}/events?token=${encodeURIComponent(token)}`
+      );
+      const onProgress = (e) => setProgress(JSON.parse(e.data));
+      ["source_started", "products_extracted", "match_done",
+       "changes_detected", "insights_done", "report_generated"].forEach(
+        (type) => stream.addEventListener(type, onProgress)
+      );
+      const finish = () => {
+        stream.close();
         setScanning(false);
-      }, 180_000);
+        setProgress(null);
+        loadData();
+      };
+      stream.addEventListener("job_finished", finish);
+      // Dropped connections reconnect on their own (resuming from
+      // Last-Event-ID); only give up once the browser has stopped retrying
+      stream.onerror = () => {
+        if (stream.readyState === EventSource.CLOSED) finish();
+      };
     } catch (e) {
       setScanning(false);
     }
@@ -75,7 +88,10 @@ export default function Dashboard() {
           data-testid="run-scan-btn"
         >
           {scanning ? (
-            <><span style={styles.spinner} />Scanning…</>
+            <><span style={styles.spinner} />
+              {progress?.total
+                ? `Scanning ${progress.source ?? ""} (${progress.done}/${progress.total})…`
+                : "Scanning…"}</>
           ) : (
             <><span>⟳</span> Run Scan Now</>
           )}
@@ -0,0 +1,98 @@
+"""
+parser_fixtures.py – record parser traffic once, then run parsers offline.
+
+    record  scrape each URL live, saving its HAR and the rows it produced
+    replay  re-run every recorded fixture (or the given URLs) with the
+            network cut off, compare rows to the recording and report timing
+
+Fixtures live in SCRAPER_FIXTURE_DIR (default fixtures/scrapers), one HAR per
+site – see backend/agent_core/fixtures.py. Replay exits non-zero when a
+parser's output no longer matches its recording.
+
+Run: python parser_fixtures.py record https://www.woohoo.in/brand-gift-cards ...
+     python parser_fixtures.py replay [URL ...] [--runs 3]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from backend.agent_core import fixtures
+from backend.agent_core.smart_scraper import SmartScraper
+from backend.agent_core.tracing import Tracer
+
+
+def _key(row: dict) -> tuple:
+    return (row.get("signature"), row.get("name"), row.get("variant_value"), row.get("url"))
+
+
+def _diff(expected: list[dict], actual: list[dict]) -> dict:
+    want = {_key(r) for r in expected}
+    got = {_key(r) for r in actual}
+    return {"missing": len(want - got), "extra": len(got - want)}
+
+
+def record(urls: list[str], fixture_dir: str) -> int:
+    scraper = SmartScraper(fixtures="record", fixture_dir=fixture_dir)
+    for url in urls:
+        rows = scraper.scrape(url)
+        fixtures.save_expected(url, rows, fixture_dir)
+        print(f"💾 {fixtures.site_key(url)}: {len(rows)} rows → {fixtures.har_path(url, fixture_dir)}")
+    return 0
+
+
+def replay(urls: list[str], fixture_dir: str, runs: int, show_profile: bool) -> int:
+    recorded = {fx["url"]: fx for fx in fixtures.load_expected(fixture_dir)}
+    targets = urls or list(recorded)
+    if not targets:
+        print(f"No fixtures in {fixture_dir} – record some first.")
+        return 1
+
+    scraper = SmartScraper(fixtures="replay", fixture_dir=fixture_dir)
+    failed = False
+    print(f"\n{'site':<22}{'rows':>6}{'expected':>10}{'missing':>9}{'extra':>7}{'median s':>10}")
+    for url in targets:
+        fx = recorded.get(url)
+        if fx is None:
+            print(f"{fixtures.site_key(url):<22}  no recording for {url}")
+            failed = True
+            continue
+
+        timings, rows, tracer = [], [], None
+        for _ in range(runs):
+            tracer = Tracer()
+            t0 = time.perf_counter()
+            with tracer.activate():
+                rows = scraper.scrape(url)
+            timings.append(time.perf_counter() - t0)
+
+        d = _diff(fx["rows"], rows)
+        failed |= bool(d["missing"] or d["extra"])
+        print(f"{fixtures.site_key(url):<22}{len(rows):>6}{len(fx['rows']):>10}"
+              f"{d['missing']:>9}{d['extra']:>7}{statistics.median(timings):>10.2f}")
+        if show_profile and tracer:
+            print(json.dumps(tracer.summary(), indent=2))
+
+    return 1 if failed else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("mode", choices=fixtures.MODES)
+    ap.add_argument("urls", nargs="*")
+    ap.add_argument("--dir", default=fixtures.SCRAPER_FIXTURE_DIR)
+    ap.add_argument("--runs", type=int, default=1, help="replay runs per fixture (median reported)")
+    ap.add_argument("--profile", action="store_true", help="print per-span timings of the last run")
+    args = ap.parse_args()
+
+    if args.mode == "record":
+        if not args.urls:
+            ap.error("record needs at least one URL")
+        sys.exit(record(args.urls, args.dir))
+    sys.exit(replay(args.urls, args.dir, args.runs, args.profile))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+pipeline_bench.py – time the offline pipeline stages on synthetic catalogues.
+
+Generates a seeded baseline catalogue, one competitor catalogue and a
+"yesterday" snapshot per size, then times:
+
+    match     ProductMatcher.match
+    variant   VariantEngine.compare
+    changes   ChangeDetectorV2.detect
+    insights  InsightEngine._rule_based_insights
+    report    generate_report (written to a temp dir)
+
+Catalogues mimic the scraped data: brand popularity follows a Zipf curve,
+denominations cluster on the usual ₹100–₹10,000 face values, about 70% of a
+competitor's brands overlap the baseline and ~15% of rows carry no price.
+Yesterday's snapshot differs by a few percent of repriced, added and removed
+rows.
+
+Every run appends one JSON line per (stage, size) to the history file and
+compares it with the previous run of the same stage/size on this host;
+slowdowns beyond --threshold are flagged (and fail the run with --strict).
+
+Run: python pipeline_bench.py [--sizes 1000,10000,100000] [--repeat 3]
+     python pipeline_bench.py --sizes 1000000 --stages match,changes
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from backend.agent_core.change_detector_v2 import ChangeDetectorV2
+from backend.agent_core.insight_engine import InsightEngine
+from backend.agent_core.matcher_v2 import ProductMatcher
+from backend.agent_core.variant_engine import VariantEngine
+from backend.reporting.report_generator import generate_report
+
+
+HISTORY_FILE = "benchmarks/pipeline_history.jsonl"
+STAGES       = ("match", "variant", "changes", "insights", "report")
+
+DENOMINATIONS = [100, 250, 500, 1000, 1500, 2000, 2500, 5000, 10000]
+DENOM_WEIGHTS = [6, 6, 14, 18, 4, 10, 4, 8, 3]
+WORDS = ["amazon", "flipkart", "myntra", "swiggy", "zomato", "google", "play",
+         "steam", "xbox", "uber", "ola", "croma", "tanishq", "pvr", "bookmyshow",
+         "nykaa", "ajio", "decathlon", "starbucks", "dominos", "lifestyle",
+         "shoppers", "stop", "reliance", "trends", "titan", "fastrack", "bata"]
+
+
+# ──────────────────────────────────────────────────────────────
+# SYNTHETIC DATA
+# ──────────────────────────────────────────────────────────────
+
+def _brands(n: int, rng: random.Random) -> list[tuple[str, str]]:
+    out = []
+    for i in range(n):
+        name = " ".join(w.title() for w in rng.sample(WORDS, 2)) + f" {i}"
+        out.append((name + " Gift Card", "_".join(name.lower().split())))
+    return out
+
+
+def _catalogue(brands: list, rows: int, rng: random.Random, site: str) -> list[dict]:
+    weights = [1 / (rank + 1) for rank in range(len(brands))]   # Zipf, s=1
+    picks = rng.choices(brands, weights=weights, k=rows)
+    denoms = rng.choices(DENOMINATIONS, weights=DENOM_WEIGHTS, k=rows)
+    out = []
+    for (name, sig), denom in zip(picks, denoms):
+        priced = rng.random() > 0.15
+        price = round(denom * (1 - rng.choice((0, 0, 0.02, 0.04, 0.05, 0.08))), 2) if priced else None
+        variant = denom if priced else None
+        out.append({
+            "name": name, "price": price, "variant_value": variant,
+            "min_price": price, "max_price": None, "discount_pct": None,
+            "category": "gift_card", "signature": sig,
+            "url": f"https://www.{site}.example/{sig}/{denom}",
+        })
+    return out
+
+
+def _yesterday(rows: list[dict], rng: random.Random) -> list[dict]:
+    """Copy of `rows` with ~3% repriced, ~1% removed and ~1% extra rows."""
+    out = []
+    for r in rows:
+        roll = rng.random()
+        if roll < 0.01:
+            continue
+        r = dict(r)
+        if roll < 0.04 and r["price"]:
+            r["price"] = round(r["price"] * rng.uniform(0.9, 1.1), 2)
+        out.append(r)
+    for r in rng.sample(rows, max(1, len(rows) // 100)):
+        out.append({**r, "variant_value": (r["variant_value"] or 0) + 1})
+    return out
+
+
+def build_dataset(size: int, seed: int) -> dict:
+    rng = random.Random(seed + size)
+    brands = _brands(max(50, size // 20), rng)
+    overlap = int(len(brands) * 0.7)
+    comp_brands = brands[:overlap] + _brands(len(brands) - overlap, rng)
+
+    baseline = _catalogue(brands, size, rng, "baseline")
+    competitor = _catalogue(comp_brands, size, rng, "competitor")
+    today = {
+        "generated_at": datetime.now().isoformat(),
+        "baseline": {"name": "Baseline", "products": baseline},
+        "competitors": [{"name": "Competitor", "products": competitor}],
+    }
+    yesterday = {
+        "baseline": {"name": "Baseline", "products": _yesterday(baseline, rng)},
+        "competitors": [{"name": "Competitor", "products": _yesterday(competitor, rng)}],
+    }
+    return {"today": today, "yesterday": yesterday}
+
+
+# ──────────────────────────────────────────────────────────────
+# STAGES
+# ──────────────────────────────────────────────────────────────
+
+def _stage_fns(data: dict, out_dir: str) -> dict:
+    baseline = data["today"]["baseline"]["products"]
+    competitor = data["today"]["competitors"][0]["products"]
+    matcher, variants = ProductMatcher(), VariantEngine()
+    detector, insights = ChangeDetectorV2(), InsightEngine.__new__(InsightEngine)
+
+    # Later stages consume earlier outputs, computed once outside the timings.
+    diff = matcher.match(baseline, competitor)
+    changes = detector.detect(data["today"], data["yesterday"])
+    digest = {**data["today"], "changes": changes}
+    digest["competitors"] = [{**data["today"]["competitors"][0], "diff": diff}]
+    digest["competitors"][0]["insights"] = insights._rule_based_insights(
+        "Baseline", baseline, "Competitor", diff, changes["changes"])
+    report_path = os.path.join(out_dir, "report.html")
+
+    return {
+        "match":    lambda: matcher.match(baseline, competitor),
+        "variant":  lambda: variants.compare(baseline, competitor),
+        "changes":  lambda: detector.detect(data["today"], data["yesterday"]),
+        "insights": lambda: insights._rule_based_insights(
+            "Baseline", baseline, "Competitor", diff, changes["changes"]),
+        "report":   lambda: generate_report(digest, report_path),
+    }
+
+
+def _time(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+# ──────────────────────────────────────────────────────────────
+# HISTORY
+# ──────────────────────────────────────────────────────────────
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def _load_history(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _previous(history: list[dict], stage: str, size: int, host: str) -> dict | None:
+    for rec in reversed(history):
+        if rec["stage"] == stage and rec["size"] == size and rec["host"] == host:
+            return rec
+    return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--sizes", default="1000,10000,100000",
+                    help="comma-separated catalogue sizes (rows per site)")
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--history", default=HISTORY_FILE)
+    ap.add_argument("--threshold", type=float, default=20.0,
+                    help="flag median slowdowns above this percentage")
+    ap.add_argument("--strict", action="store_true", help="exit 1 on a flagged regression")
+    ap.add_argument("--no-save", action="store_true")
+    args = ap.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    host = platform.node()
+    history = _load_history(args.history)
+    run = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "git": _git_rev(),
+        "host": host,
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+    }
+
+    records, regressions = [], 0
+    print(f"\n{'stage':<10}{'size':>10}{'median s':>11}{'min s':>10}{'rows/s':>12}{'vs prev':>10}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for size in sizes:
+            t0 = time.perf_counter()
+            data = build_dataset(size, args.seed)
+            print(f"-- {size:,} rows per site (generated in {time.perf_counter() - t0:.1f}s)")
+            fns = _stage_fns(data, out_dir)
+            for stage in stages:
+                timings = _time(fns[stage], args.repeat)
+                median = statistics.median(timings)
+                rec = {**run, "stage": stage, "size": size,
+                       "median_s": round(median, 6), "min_s": round(min(timings), 6)}
+                records.append(rec)
+
+                prev = _previous(history, stage, size, host)
+                delta = ""
+                if prev and prev["median_s"]:
+                    pct = (median - prev["median_s"]) / prev["median_s"] * 100
+                    delta = f"{pct:+.0f}%"
+                    if pct > args.threshold:
+                        delta += " ⚠️"
+                        regressions += 1
+                print(f"{stage:<10}{size:>10,}{median:>11.4f}{min(timings):>10.4f}"
+                      f"{size / median if median else 0:>12,.0f}{delta:>10}")
+            del data, fns
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+        with open(args.history, "a") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+        print(f"\n💾 {len(records)} result(s) appended to {args.history}")
+
+    if regressions:
+        print(f"⚠️  {regressions} stage(s) slower than the previous run by >{args.threshold:.0f}%")
+        if args.strict:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
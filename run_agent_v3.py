@@ -20,6 +20,7 @@ from backend.agent_core.product_normalizer import ProductNormalizer
 from backend.agent_core.product_signature_engine import ProductSignatureEngine
 from backend.agent_core.variant_engine import VariantEngine
 from backend.agent_core.product_source_resolver import ProductSourceResolver
+from backend.agent_core.strategy_memory import StrategyMemory
 
 # ---------------------------------------------------------
 # HISTORY + CHANGE DETECTION
@@ -59,6 +60,7 @@ class CIAgentV3:
         self.normalizer = ProductNormalizer()
         self.variant_engine = VariantEngine()
         self.source_resolver = ProductSourceResolver()
+        self.strategies = StrategyMemory()
 
         # -----------------------------
         # Memory + Change Detection
@@ -73,55 +75,19 @@ class CIAgentV3:
 
         print(f"\n📡 Fetching products for {source['name']}")
 
-        raw_products = []
-
-        # -------------------------------------------------
-        # 1️⃣ Explicit API ingestion
-        # -------------------------------------------------
+        # Cascade in default order; the strategy that won last run for this
+        # source goes first (strategy_memory.py)
+        strategies = []
         if source.get("api"):
-            try:
-                raw_products = self.ingestion.fetch(source)
-                print("✅ API ingestion success")
-            except Exception as e:
-                print(f"⚠️ API failed: {e}")
-
-        # -------------------------------------------------
-        # 2️⃣ Smart API Discovery
-        # -------------------------------------------------
-        if not raw_products:
-            try:
-                api_payloads = self.source_resolver.detect_api_products(
-                    source["url"]
-                )
-
-                if api_payloads:
-                    raw_products = self.ingestion.parse_api_payloads(
-                        api_payloads
-                    )
-                    print("🔥 Smart API discovery used")
-
-            except Exception as e:
-                print(f"⚠️ Smart API detection failed: {e}")
-
-        # -------------------------------------------------
-        # 3️⃣ Navigator + Extractor Fallback
-        # -------------------------------------------------
-        if not raw_products:
-
-            print("⚠️ No API products found — crawl fallback")
-
-            try:
-                site_map = self.navigator.discover(source["url"])
-                raw_products = self.extractor.extract(site_map)
-            except Exception as e:
-                print(f"❌ Navigator failed: {e}")
-
-        # -------------------------------------------------
-        #  4️⃣ DOM FALLBACK (ONLY IF ZERO PRODUCTS FOUND)
-        # -------------------------------------------------
-        if not raw_products:
-            print("⚠️ No products detected — activating DOM fallback")
-            raw_products = self.ingestion.dom_price_fallback(source["url"])
+            strategies.append(("api", lambda: self._fetch_api(source)))
+        strategies += [
+            ("api_discovery", lambda: self._discover_api(source)),
+            ("crawl", lambda: self._crawl(source)),
+            ("dom", lambda: self._dom_fallback(source)),
+        ]
+        _strategy, raw_products = self.strategies.run(
+            source.get("name") or source["url"], strategies
+        )
 
         # -------------------------------------------------
         # Normalize Products
@@ -134,6 +100,43 @@ class CIAgentV3:
 
         return normalized
 
+    # -------------------------------------------------
+    # 1️⃣ Explicit API ingestion
+    # -------------------------------------------------
+    def _fetch_api(self, source):
+        raw_products = self.ingestion.fetch(source)
+        print("✅ API ingestion success")
+        return raw_products
+
+    # -------------------------------------------------
+    # 2️⃣ Smart API Discovery
+    # -------------------------------------------------
+    def _discover_api(self, source):
+        api_payloads = self.source_resolver.detect_api_products(
+            source["url"]
+        )
+
+        if not api_payloads:
+            return []
+
+        print("🔥 Smart API discovery used")
+        return self.ingestion.parse_api_payloads(api_payloads)
+
+    # -------------------------------------------------
+    # 3️⃣ Navigator + Extractor
+    # -------------------------------------------------
+    def _crawl(self, source):
+        print("🕸 Crawling with Navigator + Extractor")
+        site_map = self.navigator.discover(source["url"])
+        return self.extractor.extract(site_map)
+
+    # -------------------------------------------------
+    # 4️⃣ DOM FALLBACK
+    # -------------------------------------------------
+    def _dom_fallback(self, source):
+        print("⚠️ Activating DOM fallback")
+        return self.ingestion.dom_price_fallback(source["url"])
+
     # =====================================================
     # RUN FULL AGENT
     # =====================================================
@@ -0,0 +1,132 @@
+"""
+startup_bench.py – cold-start import cost of the server and the CLI runners.
+
+Each target is imported in a fresh interpreter under `python -X importtime`;
+the script reports wall time to "imports done" (median over --runs) and the
+modules with the largest cumulative import time, grouped by top-level
+package so one slow SDK shows up as one line.
+
+Targets:
+    server        backend.server_v2
+    run_agent     run_agent + the orchestrator it loads before a run
+    run_agent_v3  run_agent_v3
+
+A target whose imports fail (missing optional dependency, stale module
+names) is reported with its error instead of timings.
+
+Run: python startup_bench.py [--runs 5] [--top 15] [--targets server,run_agent]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+
+TARGETS = {
+    "server":       ["backend.server_v2"],
+    "run_agent":    ["run_agent", "backend.agent_core.orchestrator_v2"],
+    "run_agent_v3": ["run_agent_v3"],
+}
+
+_PROBE = """
+import time, importlib
+t0 = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+print("__WALL_MS__", (time.perf_counter() - t0) * 1000)
+"""
+
+
+def _run_once(modules: list[str]) -> tuple[float | None, str, str]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(modules=modules)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    wall = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("__WALL_MS__"):
+            wall = float(line.split()[1])
+    error = ""
+    if proc.returncode:
+        tb = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        error = tb[-1] if tb else f"exit {proc.returncode}"
+    return wall, proc.stderr, error
+
+
+def _parse_importtime(stderr: str) -> dict[str, int]:
+    """module → cumulative µs, from `-X importtime` output."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _self_us, cumulative, name = line[len("import time:"):].split("|")
+            out[name.strip()] = int(cumulative)
+        except ValueError:
+            continue
+    return out
+
+
+def _by_package(cumulative: dict[str, int]) -> dict[str, int]:
+    """Top-level package → cumulative µs (counted at the package's own import)."""
+    out = defaultdict(int)
+    for name, us in cumulative.items():
+        top = name.split(".")[0]
+        if name == top or top not in cumulative:
+            out[top] = max(out[top], us)
+    return dict(out)
+
+
+def bench(target: str, runs: int, top: int) -> dict:
+    modules = TARGETS[target]
+    walls, error, cumulative = [], "", {}
+    for _ in range(runs):
+        wall, stderr, error = _run_once(modules)
+        if error:
+            break
+        walls.append(wall)
+        cumulative = _parse_importtime(stderr)
+
+    if error:
+        return {"target": target, "modules": modules, "error": error}
+    packages = sorted(_by_package(cumulative).items(), key=lambda kv: -kv[1])[:top]
+    return {
+        "target": target,
+        "modules": modules,
+        "median_ms": round(statistics.median(walls), 1),
+        "min_ms": round(min(walls), 1),
+        "modules_loaded": len(cumulative),
+        "top_packages_ms": {name: round(us / 1000, 1) for name, us in packages},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time startup benchmark")
+    ap.add_argument("--targets", default=",".join(TARGETS))
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15, help="packages to list per target")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    results = [bench(t, args.runs, args.top) for t in args.targets.split(",") if t]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for r in results:
+        print(f"\n🚀 {r['target']}  ({', '.join(r['modules'])})")
+        if "error" in r:
+            print(f"   ❌ import failed: {r['error']}")
+            continue
+        print(f"   median {r['median_ms']:.0f} ms  min {r['min_ms']:.0f} ms  "
+              f"{r['modules_loaded']} modules")
+        for name, ms in r["top_packages_ms"].items():
+            print(f"   {ms:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
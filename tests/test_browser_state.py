@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+from backend.agent_core.browser_state import AssetCache
+
+SITE = "https://www.woohoo.in/"
+
+
+class FakeResponse:
+    def __init__(self, url: str, body: bytes):
+        self.url = url
+        self.status = 200
+        self.headers = {"cache-control": "max-age=3600", "content-type": "text/javascript"}
+        self._body = body
+
+    def body(self):
+        return self._body
+
+
+class FakeRoute:
+    def __init__(self, url: str, body: bytes = b""):
+        self.request = type("Request", (), {"url": url, "method": "GET"})()
+        self._body = body
+        self.fulfilled = None
+
+    def fetch(self):
+        return FakeResponse(self.request.url, self._body)
+
+    def fulfill(self, **kwargs):
+        self.fulfilled = kwargs
+
+    def fallback(self):
+        pass
+
+
+class FakeContext:
+    def route(self, pattern, handler):
+        pass
+
+
+def _cache(tmp_path, max_bytes=10_000):
+    cache = AssetCache(SITE, cache_dir=str(tmp_path), max_bytes=max_bytes)
+    cache.attach(FakeContext())
+    return cache
+
+
+def _files(cache):
+    return sorted(os.listdir(cache.dir))
+
+
+def test_second_request_is_served_from_disk(tmp_path):
+    cache = _cache(tmp_path)
+    cache._handle(FakeRoute("https://cdn.woohoo.in/app.js", b"x" * 100))
+    route = FakeRoute("https://cdn.woohoo.in/app.js")
+    cache._handle(route)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert "path" in route.fulfilled
+
+
+def test_expired_entry_is_deleted_on_lookup(tmp_path):
+    cache = _cache(tmp_path)
+    cache._handle(FakeRoute("https://cdn.woohoo.in/app.js", b"x" * 100))
+    meta_path, _body_path = cache._paths("https://cdn.woohoo.in/app.js")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["expires"] = time.time() - 1
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+    route = FakeRoute("https://cdn.woohoo.in/app.js", b"y" * 100)
+    cache._handle(route)
+    assert cache.misses == 2
+    assert len(_files(cache)) == 2          # the stale pair was replaced, not kept alongside
+
+
+def test_oldest_entries_are_evicted_over_the_cap(tmp_path):
+    cache = _cache(tmp_path, max_bytes=1_500)
+    for i in range(5):
+        url = f"https://cdn.woohoo.in/chunk.{i}.js"
+        cache._handle(FakeRoute(url, b"x" * 400))
+        _meta, body = cache._paths(url)
+        os.utime(body, (1000 + i, 1000 + i))   # strictly increasing ages
+
+    kept = {f for f in _files(cache) if f.endswith(".body")}
+    expected = {os.path.basename(cache._paths(f"https://cdn.woohoo.in/chunk.{i}.js")[1])
+                for i in (3, 4)}
+    assert kept == expected
+    assert cache._size <= 1_500
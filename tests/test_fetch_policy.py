@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from backend.agent_core import fetch_policy
+
+URL = "https://www.example.com/page"
+_real_time = time.time        # captured before the fixture fakes the clock
+
+
+@pytest.fixture(autouse=True)
+def policy(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_policy, "FETCH_STATE_FILE", str(tmp_path / "fetch_policy.json"))
+    monkeypatch.setattr(fetch_policy, "FETCH_RATE", 2.0)
+    monkeypatch.setattr(fetch_policy, "FETCH_BURST", 2.0)
+    monkeypatch.setattr(fetch_policy, "FETCH_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(fetch_policy, "FETCH_BREAKER_COOLDOWN", 60.0)
+    clock = [1000.0]
+    monkeypatch.setattr(fetch_policy.time, "time", lambda: clock[0])
+    return clock
+
+
+def _reserve_in_child(path, queue):
+    fetch_policy.FETCH_STATE_FILE = path
+    fetch_policy.FETCH_RATE = 0.01
+    queue.put(fetch_policy._reserve(URL))
+
+
+def test_bucket_allows_burst_then_paces(policy):
+    assert fetch_policy._reserve(URL) == 0
+    assert fetch_policy._reserve(URL) == 0
+    assert fetch_policy._reserve(URL) == pytest.approx(0.5)
+    policy[0] += 10                       # refilled, capped at the burst
+    assert fetch_policy._reserve(URL) == 0
+    assert fetch_policy._reserve(URL) == 0
+    assert fetch_policy._reserve(URL) > 0
+
+
+def test_bucket_is_shared_across_processes(policy, monkeypatch):
+    monkeypatch.setattr(fetch_policy, "FETCH_RATE", 0.01)
+    policy[0] = _real_time()               # the child runs on the real clock
+    fetch_policy._reserve(URL)
+    fetch_policy._reserve(URL)
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_reserve_in_child, args=(fetch_policy.FETCH_STATE_FILE, queue))
+    child.start()
+    child.join(30)
+    assert queue.get(timeout=5) > 0       # the child found the bucket already drained
+
+
+def test_breaker_opens_after_consecutive_failures(policy):
+    fetch_policy._record(URL, ok=False)
+    assert not fetch_policy.is_open(URL)
+    fetch_policy._record(URL, ok=False)
+    assert fetch_policy.is_open(URL)
+    with pytest.raises(fetch_policy.CircuitOpenError):
+        fetch_policy._reserve(URL)
+
+
+def test_half_open_lets_one_probe_through(policy):
+    fetch_policy._record(URL, ok=False)
+    fetch_policy._record(URL, ok=False)
+    policy[0] += 61
+    assert not fetch_policy.is_open(URL)
+    fetch_policy._reserve(URL)            # the probe
+    assert fetch_policy.is_open(URL)
+    with pytest.raises(fetch_policy.CircuitOpenError):
+        fetch_policy._reserve(URL)
+
+
+def test_failed_probe_reopens_and_success_closes(policy):
+    fetch_policy._record(URL, ok=False)
+    fetch_policy._record(URL, ok=False)
+    policy[0] += 61
+    fetch_policy._reserve(URL)
+    fetch_policy._record(URL, ok=False)   # one failure is enough while half-open
+    with pytest.raises(fetch_policy.CircuitOpenError):
+        fetch_policy._reserve(URL)
+
+    policy[0] += 61
+    fetch_policy._reserve(URL)
+    fetch_policy._record(URL, ok=True)
+    fetch_policy._reserve(URL)
+    fetch_policy._reserve(URL)            # closed again: no probe lease in the way
+
+
+def test_call_returns_after_retry(policy, monkeypatch):
+    monkeypatch.setattr(fetch_policy.time, "sleep", lambda s: None)
+    outcomes = [ValueError("boom"), "ok"]
+
+    def fn():
+        out = outcomes.pop(0)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+    assert fetch_policy.call(URL, fn, attempts=3) == "ok"
+    assert not fetch_policy.is_open(URL)
+
+
+class AbortingPage:
+    """A replayed page: every unrecorded navigation is aborted."""
+
+    def __init__(self):
+        self.navigations = 0
+
+    def goto(self, url, **kwargs):
+        self.navigations += 1
+        raise RuntimeError("net::ERR_FAILED")
+
+
+def test_bypassed_replay_abort_leaves_state_untouched(policy, monkeypatch):
+    monkeypatch.setattr(fetch_policy.time, "sleep", lambda s: pytest.fail("throttled or backed off"))
+    page = AbortingPage()
+    with fetch_policy.bypassed():
+        for _ in range(5):
+            with pytest.raises(RuntimeError):
+                fetch_policy.goto(page, URL)
+    assert page.navigations == 5          # one attempt each, no retries
+    assert not os.path.exists(fetch_policy.FETCH_STATE_FILE)
+    assert not fetch_policy.is_open(URL)
+
+
+def test_bypass_is_off_unless_active(policy, monkeypatch):
+    monkeypatch.setattr(fetch_policy.time, "sleep", lambda s: None)
+    with fetch_policy.bypassed(False):
+        with pytest.raises(RuntimeError):
+            fetch_policy.goto(AbortingPage(), URL, attempts=2)
+    assert fetch_policy.is_open(URL)      # two failures hit the breaker threshold
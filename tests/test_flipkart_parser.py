@@ -0,0 +1,105 @@
+import pytest
+
+from backend.agent_core import fetch_policy
+from backend.agent_core.smart_scraper import _FlipkartParser
+
+CONFIGURED = "https://www.flipkart.com/gift-cards/store"
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = None
+        self.closed = False
+
+    def goto(self, url, **kwargs):
+        self.url = url
+        self.context.navigations.append(url)
+
+    def wait_for_load_state(self, state, timeout):
+        pass
+
+    def wait_for_timeout(self, ms):
+        self.context.waited_ms += ms
+
+    def evaluate(self, script):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.navigations = []
+        self.waited_ms = 0
+
+    def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+
+@pytest.fixture
+def parser(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_policy, "FETCH_STATE_FILE", str(tmp_path / "fetch_policy.json"))
+    monkeypatch.setattr(fetch_policy, "FETCH_RATE", 0)
+    parser = _FlipkartParser()
+    parser.LAST_URL_FILE = str(tmp_path / "flipkart_last_url.json")
+    parser.read = []
+    return parser
+
+
+def _extract(parser, products_at):
+    def read_url(page):
+        parser.read.append(page.url)
+        return [{"name": "Card"}] if page.url == products_at else []
+
+    parser._read_url = read_url
+    context = FakeContext()
+    page = FakePage(context)
+    return parser.extract(page, CONFIGURED), context
+
+
+def test_working_preferred_url_loads_nothing_else(parser):
+    rows, context = _extract(parser, CONFIGURED)
+    assert rows
+    assert parser.read == [CONFIGURED]
+    assert context.navigations == [CONFIGURED]
+    assert context.pages == []
+
+
+def test_fallbacks_settle_together_and_stop_at_first_hit(parser):
+    winner = _FlipkartParser.CATEGORY_URLS[0]
+    rows, context = _extract(parser, winner)
+    assert rows
+    assert parser.read == [CONFIGURED, winner]
+    assert len(context.pages) == len(_FlipkartParser.CATEGORY_URLS)
+    assert all(p.closed for p in context.pages)
+    # Preferred page settled once, then all fallbacks in one shared settle
+    single = 5_000 + 6 * 600 + 2_000
+    assert context.waited_ms == 2 * single
+
+
+def test_last_good_url_is_read_first_per_configured_url(parser):
+    winner = _FlipkartParser.CATEGORY_URLS[0]
+    _extract(parser, winner)
+    assert parser.read[-1] == winner
+    assert parser._last_url(CONFIGURED) == winner
+    assert parser._last_url("https://www.flipkart.com/other") is None
+
+    parser.read.clear()
+    _extract(parser, winner)
+    assert parser.read == [winner]
+
+
+def test_json_ld_item_takes_price_from_a_priced_card(parser):
+    item = "https://www.flipkart.com/amazon-gift-card/p/itm1"
+    parser._read_json_ld = lambda page: [{"name": "Amazon Gift Card", "url": item}]
+    parser._read_cards = lambda page: [
+        {"title": "Amazon Gift Card", "price": None, "url": f"{item}?pid=1"},   # image link
+        {"title": "Amazon Gift Card", "price": 500.0, "url": f"{item}?pid=1&lid=2"},
+    ]
+    rows = parser._read_url(None)
+    assert [r["price"] for r in rows] == [500.0]
@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+scan_jobs = pytest.importorskip("backend.scan_jobs")
+
+from backend.db_indexes import INDEXES  # noqa: E402
+
+
+async def _pool():
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    for keys, opts in INDEXES["scan_jobs"]:
+        await db.scan_jobs.create_index(keys, **opts)
+    return scan_jobs.ScanWorkerPool(db, "mongodb://unused", "test"), db
+
+
+def _ago(minutes: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(minutes=minutes)).isoformat()
+
+
+def test_enqueue_deduplicates_active_job():
+    async def run():
+        pool, _db = await _pool()
+        first, created = await pool.enqueue("u1")
+        again, created_again = await pool.enqueue("u1")
+        return first, created, again, created_again
+
+    first, created, again, created_again = asyncio.run(run())
+    assert created and not created_again
+    assert again["_id"] == first["_id"]
+
+
+def test_expire_stale_releases_only_old_foreign_jobs():
+    async def run():
+        pool, db = await _pool()
+        old = await db.scan_jobs.insert_one(
+            {"user_id": "u1", "status": "running", "active": True, "updated_at": _ago(120)})
+        fresh = await db.scan_jobs.insert_one(
+            {"user_id": "u2", "status": "running", "active": True, "updated_at": _ago(1)})
+        mine = await db.scan_jobs.insert_one(
+            {"user_id": "u3", "status": "running", "active": True, "updated_at": _ago(120)})
+        pool._running[str(mine.inserted_id)] = None
+        await pool._expire_stale()
+        return [await db.scan_jobs.find_one({"_id": r.inserted_id}) for r in (old, fresh, mine)]
+
+    old, fresh, mine = asyncio.run(run())
+    assert old["status"] == "error" and "active" not in old
+    assert fresh["status"] == "running" and fresh["active"]
+    assert mine["status"] == "running"
+
+
+def test_stop_fails_in_flight_jobs_so_user_can_rescan():
+    async def run():
+        pool, db = await _pool()
+        job, _ = await pool.enqueue("u1")
+        await db.scan_jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "running"}})
+        pool._running[str(job["_id"])] = asyncio.get_running_loop().create_future()
+        await pool.stop()
+        stopped = await db.scan_jobs.find_one({"_id": job["_id"]})
+        _new, created = await pool.enqueue("u1")
+        return stopped, created
+
+    stopped, created = asyncio.run(run())
+    assert stopped["status"] == "error"
+    assert stopped["cancel_requested"] is True
+    assert "active" not in stopped
+    assert created
+
+
+def test_crash_outside_the_worker_releases_the_job(monkeypatch):
+    async def run():
+        pool, db = await _pool()
+        job, _ = await pool.enqueue("u1")
+        job = await pool._claim()
+
+        async def broken_publish(*args):
+            raise RuntimeError("mongo went away")
+
+        monkeypatch.setattr(pool, "_publish", broken_publish)
+        status = await pool._run_job(job)
+        crashed = await db.scan_jobs.find_one({"_id": job["_id"]})
+        _new, created = await pool.enqueue("u1")
+        return status, crashed, created
+
+    status, crashed, created = asyncio.run(run())
+    assert status == "error"
+    assert crashed["status"] == "error" and "active" not in crashed
+    assert created
+
+
+def test_heartbeat_keeps_running_job_fresh(monkeypatch):
+    monkeypatch.setattr(scan_jobs, "SCAN_HEARTBEAT_INTERVAL", 0.01)
+
+    async def run():
+        pool, db = await _pool()
+        res = await db.scan_jobs.insert_one(
+            {"user_id": "u1", "status": "running", "active": True, "updated_at": _ago(120)})
+        beat = asyncio.create_task(pool._heartbeat(str(res.inserted_id)))
+        await asyncio.sleep(0.05)
+        beat.cancel()
+        await pool._expire_stale()
+        return await db.scan_jobs.find_one({"_id": res.inserted_id})
+
+    job = asyncio.run(run())
+    assert job["status"] == "running" and job["active"]
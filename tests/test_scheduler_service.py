@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+scheduler_service = pytest.importorskip("backend.scheduler_service")
+
+URL = "https://www.example.com/gift-cards"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(scheduler_service, "_db", db)
+    return db
+
+
+def _hours_until(iso: str) -> float:
+    return (datetime.fromisoformat(iso) - datetime.now(timezone.utc)) / timedelta(hours=1)
+
+
+def test_interval_spans_min_to_max():
+    assert scheduler_service._interval_hours(0) == pytest.approx(scheduler_service.ADAPTIVE_MAX_HOURS)
+    assert scheduler_service._interval_hours(1) == pytest.approx(scheduler_service.ADAPTIVE_MIN_HOURS)
+    assert scheduler_service._interval_hours(5) == pytest.approx(scheduler_service.ADAPTIVE_MIN_HOURS)
+    mid = scheduler_service._interval_hours(0.5)
+    assert scheduler_service.ADAPTIVE_MIN_HOURS < mid < scheduler_service.ADAPTIVE_MAX_HOURS
+
+
+def test_failure_backoff_doubles_up_to_max(monkeypatch):
+    monkeypatch.setattr(scheduler_service, "ADAPTIVE_TICK_MINUTES", 15)
+    monkeypatch.setattr(scheduler_service, "ADAPTIVE_MAX_HOURS", 48.0)
+    delays = [scheduler_service._failure_backoff_hours(n) for n in range(1, 10)]
+    assert delays[:3] == [0.5, 1.0, 2.0]
+    assert delays[-1] == 48.0
+    assert delays == sorted(delays)
+
+
+def test_failures_push_next_due_out_and_success_resets(db):
+    async def run():
+        first = await scheduler_service._track_failure(URL, "timeout")
+        second = await scheduler_service._track_failure(URL, "timeout")
+        after_failures = await db.source_schedule.find_one({"_id": URL})
+        await scheduler_service._track_changes(URL, [], None)
+        after_success = await db.source_schedule.find_one({"_id": URL})
+        return first, second, after_failures, after_success
+
+    first, second, after_failures, after_success = asyncio.run(run())
+    assert (first, second) == (1, 2)
+    assert after_failures["failed_scrapes"] == 2
+    assert _hours_until(after_failures["next_due_at"]) == pytest.approx(
+        scheduler_service._failure_backoff_hours(2), abs=0.01)
+    assert after_success["consecutive_failures"] == 0
@@ -0,0 +1,107 @@
+import gzip
+import io
+
+import pytest
+
+pytest.importorskip("requests")
+
+from backend.agent_core import fetch_policy  # noqa: E402
+from backend.agent_core.sitemap_discovery import SitemapDiscovery  # noqa: E402
+
+SITE = "https://www.shop.example"
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _urlset(*locs: str) -> bytes:
+    body = "".join(f"<url><loc>{loc}</loc><lastmod>2026-01-01</lastmod></url>" for loc in locs)
+    return f'<?xml version="1.0"?><urlset {NS}>{body}</urlset>'.encode()
+
+
+def _index(*locs: str) -> bytes:
+    body = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f'<?xml version="1.0"?><sitemapindex {NS}>{body}</sitemapindex>'.encode()
+
+
+class FakeResponse:
+    def __init__(self, body: bytes | None):
+        self.status_code = 200 if body is not None else 404
+        self.headers = {}
+        self.text = (body or b"").decode("latin-1")
+        self.raw = io.BytesIO(body or b"")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, pages: dict[str, bytes]):
+        self.pages = pages
+        self.headers = {}
+        self.fetched = []
+
+    def get(self, url, **kwargs):
+        self.fetched.append(url)
+        return FakeResponse(self.pages.get(url))
+
+
+@pytest.fixture(autouse=True)
+def policy(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_policy, "FETCH_STATE_FILE", str(tmp_path / "fetch_policy.json"))
+    monkeypatch.setattr(fetch_policy, "FETCH_RATE", 0)
+
+
+def test_reads_index_and_gzipped_children_filtering_products():
+    session = FakeSession({
+        f"{SITE}/robots.txt": (f"User-agent: *\nDisallow: /gift-cards/private\n"
+                               f"Sitemap: {SITE}/sitemap_index.xml\n").encode(),
+        f"{SITE}/sitemap_index.xml": _index(f"{SITE}/products.xml.gz", f"{SITE}/pages.xml"),
+        f"{SITE}/products.xml.gz": gzip.compress(_urlset(
+            f"{SITE}/gift-cards/amazon",
+            f"{SITE}/gift-cards/private/x",        # disallowed by robots.txt
+            "https://other.example/gift-cards/y",  # other domain
+        )),
+        f"{SITE}/pages.xml": _urlset(f"{SITE}/about", f"{SITE}/help/gift-cards"),
+    })
+
+    site_map = SitemapDiscovery(session=session).discover(SITE)
+    assert site_map["product_links"] == [f"{SITE}/gift-cards/amazon"]
+    assert site_map["source"] == "sitemap"
+
+
+def test_stops_at_max_products():
+    session = FakeSession({
+        f"{SITE}/sitemap.xml": _urlset(*(f"{SITE}/gift-cards/{i}" for i in range(20))),
+        f"{SITE}/sitemap_index.xml": _urlset(f"{SITE}/gift-cards/never-read"),
+    })
+    site_map = SitemapDiscovery(session=session, max_products=5).discover(SITE)
+    assert len(site_map["product_links"]) == 5
+    assert f"{SITE}/sitemap_index.xml" not in session.fetched
+
+
+def test_no_sitemap_returns_none():
+    assert SitemapDiscovery(session=FakeSession({})).discover(SITE) is None
+
+
+def test_entries_do_not_accumulate_under_the_root(monkeypatch):
+    from backend.agent_core import sitemap_discovery
+
+    roots = []
+    real_iterparse = sitemap_discovery.iterparse
+
+    def spying_iterparse(source, events):
+        for event, elem in real_iterparse(source, events):
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(sitemap_discovery, "iterparse", spying_iterparse)
+    session = FakeSession({f"{SITE}/sitemap.xml": _urlset(*(f"{SITE}/p/{i}" for i in range(50)))})
+    entries = list(SitemapDiscovery(session=session)._entries(f"{SITE}/sitemap.xml"))
+    assert len(entries) == 50
+    assert len(roots[0]) == 0           # no emptied <url> elements left behind
@@ -0,0 +1,61 @@
+from backend.agent_core.strategy_memory import StrategyMemory
+
+
+def _memory(tmp_path):
+    return StrategyMemory(str(tmp_path / "strategies.json"))
+
+
+def test_winner_is_tried_first_next_run(tmp_path):
+    memory = _memory(tmp_path)
+    calls = []
+
+    def strategy(name, rows):
+        def fn():
+            calls.append(name)
+            return rows
+        return name, fn
+
+    assert memory.run("shop", [strategy("static", []), strategy("browser", [1, 2])]) == ("browser", [1, 2])
+    calls.clear()
+    memory.run("shop", [strategy("static", []), strategy("browser", [1, 2])])
+    assert calls == ["browser"]
+    assert memory._load()["shop"]["strategies"]["static"]["failures"] == 1
+
+
+def test_concurrent_runs_merge_instead_of_overwriting(tmp_path):
+    worker_a, worker_b = _memory(tmp_path), _memory(tmp_path)
+
+    # Worker B saves while worker A's run (started earlier) is still going
+    def slow_static():
+        worker_b.run("other", [("browser", lambda: [1])])
+        worker_b.run("shop", [("api", lambda: [])])
+        return [1, 2, 3]
+
+    worker_a.run("shop", [("static", slow_static)])
+
+    state = worker_a._load()
+    assert state["other"]["winner"] == "browser"
+    assert set(state["shop"]["strategies"]) == {"static", "api"}
+    assert state["shop"]["winner"] == "static"
+    assert state["shop"]["products"] == 3
+
+
+def test_shrunk_catalogue_still_becomes_baseline(tmp_path):
+    memory = _memory(tmp_path)
+    memory.run("shop", [("static", lambda: list(range(10)))])
+    name, rows = memory.run("shop", [("static", lambda: [1, 2])])
+    assert name == "static" and len(rows) == 2
+    assert memory._load()["shop"]["products"] == 2
+    assert memory._load()["shop"]["strategies"]["static"]["failures"] == 1
+
+
+def test_all_empty_run_keeps_the_winner(tmp_path):
+    memory = _memory(tmp_path)
+    memory.run("shop", [("static", lambda: []), ("browser", lambda: [1, 2, 3])])
+    assert memory.run("shop", [("static", lambda: []), ("browser", lambda: [])]) == (None, [])
+
+    entry = memory._load()["shop"]
+    assert entry["winner"] == "browser"
+    assert entry["products"] == 3
+    assert entry["strategies"]["browser"]["failures"] == 1
+    assert memory.order("shop", ["static", "browser"]) == ["browser", "static"]